@@ -1,23 +1,147 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Auction, Bid, Vehicle
+from django.core.files.storage import default_storage
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+from .models import Auction, AuctionSettlement, Bid, ProxyBid, Vehicle
 from django.utils.html import format_html
 
+SEARCH_LOOKUPS = {'^': 'istartswith', '=': 'iexact', '@': 'search'}
+
+
+def estimated_row_count(model, using):
+    """
+    Cheap upper bound on the number of rows in ``model``'s table, or None when
+    the backend has no such shortcut. On SQLite the largest rowid is a single
+    index probe; it overshoots by the number of deleted rows, which is harmless
+    for page links.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT MAX(_rowid_) FROM {connection.ops.quote_name(model._meta.db_table)}")
+        return cursor.fetchone()[0] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator that never counts a whole large table.
+
+    The unfiltered changelist uses estimated_row_count() once the table holds
+    more than ADMIN_EXACT_COUNT_LIMIT rows. Filtered and searched changelists
+    count at most ADMIN_EXACT_COUNT_LIMIT + 1 matches, so past that point the
+    count (and the last page link) stops growing instead of scanning every match.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = getattr(settings, 'ADMIN_EXACT_COUNT_LIMIT', 10000)
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+            return queryset.count()
+        return queryset.order_by()[:limit + 1].count()
+
+
+def _search_q(model, lookups, term):
+    """
+    OR of ``lookups`` ((field path, lookup) pairs) for ``term``, with every
+    relation turned into an ``__in`` subquery on its own table. That keeps each
+    condition on one table, where the database can answer it from an index,
+    instead of filtering the join of all of them row by row.
+    """
+    query, related = Q(), {}
+    for path, lookup in lookups:
+        name, _, rest = path.partition('__')
+        if rest:
+            related.setdefault(name, []).append((rest, lookup))
+            continue
+        field = model._meta.get_field(name)
+        try:
+            # A term the column cannot hold (text against year) matches nothing
+            field.to_python(term)
+        except ValidationError:
+            continue
+        if lookup == 'iexact' and not isinstance(field, (models.CharField, models.TextField)):
+            lookup = 'exact'
+        query |= Q(**{f'{name}__{lookup}': term})
+    for name, nested in related.items():
+        related_model = model._meta.get_field(name).related_model
+        query |= Q(**{f'{name}__in': related_model._default_manager.filter(_search_q(related_model, nested, term))})
+    return query
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base for changelists over tables that can grow to millions of rows.
+    Counts through EstimatedCountPaginator, skips the second unfiltered count
+    Django shows next to search results, and searches related fields through
+    per-table subqueries (see _search_q). Use ``^`` (prefix) or ``=`` (exact)
+    search_fields over columns with a NOCASE index (Vehicle and User
+    Meta.indexes); a plain ``icontains`` field can only be answered by a scan.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term:
+            return queryset, False
+        lookups = [
+            (field[1:], SEARCH_LOOKUPS[field[0]]) if field[0] in SEARCH_LOOKUPS else (field, 'icontains')
+            for field in search_fields
+        ]
+        for term in smart_split(search_term):
+            if term.startswith(('"', "'")) and term[0] == term[-1]:
+                term = unescape_string_literal(term)
+            queryset = queryset.filter(_search_q(self.model, lookups, term))
+        # Only forward relations are searched, so matches cannot repeat rows
+        return queryset, False
+
+
 @admin.register(Auction)
-class AuctionAdmin(admin.ModelAdmin):
-    list_display = ('id', 'get_vehicle_name', 'starting_price', 'start_time', 'end_time', 'highest_bid', 'highest_bidder')
-    search_fields = ('vehicle__make', 'vehicle__model', 'highest_bidder__email')
+class AuctionAdmin(LargeTableAdmin):
+    list_display = ('id', 'get_vehicle_name', 'starting_price', 'start_time', 'end_time', 'highest_bid', 'highest_bidder', 'closed_at')
+    list_select_related = ('vehicle', 'highest_bidder')
+    search_fields = ('^vehicle__make', '^vehicle__model', '^highest_bidder__email')
     list_filter = ('start_time', 'end_time')
 
     def get_vehicle_name(self, obj):
         return f"{obj.vehicle.make} {obj.vehicle.model} ({obj.vehicle.year})"  # Properly format the vehicle name
-    
+
     get_vehicle_name.short_description = "Vehicle"
 
+@admin.register(AuctionSettlement)
+class AuctionSettlementAdmin(LargeTableAdmin):
+    list_display = ('auction', 'winner', 'winning_bid', 'settled_at')
+    list_select_related = ('auction__vehicle', 'winner')
+    search_fields = ('^auction__vehicle__make', '^auction__vehicle__model', '^winner__email')
+    list_filter = ('settled_at',)
+    raw_id_fields = ('auction', 'winner')
+
+@admin.register(ProxyBid)
+class ProxyBidAdmin(LargeTableAdmin):
+    list_display = ('auction', 'bidder', 'max_amount', 'created_at', 'updated_at')
+    list_select_related = ('auction__vehicle', 'bidder')
+    search_fields = ('^auction__vehicle__make', '^auction__vehicle__model', '^bidder__email')
+    raw_id_fields = ('auction', 'bidder')
+
 @admin.register(Bid)
-class BidAdmin(admin.ModelAdmin):
+class BidAdmin(LargeTableAdmin):
     list_display = ('id', 'get_auction_vehicle', 'bidder', 'bid_amount', 'timestamp')
-    search_fields = ('auction__vehicle__make', 'auction__vehicle__model', 'bidder__email')
+    list_select_related = ('auction__vehicle', 'bidder')
+    search_fields = ('^auction__vehicle__make', '^auction__vehicle__model', '^bidder__email')
     list_filter = ('timestamp',)
+    # Newest first, walking bid_timestamp_id_idx backwards
+    ordering = ('-timestamp', '-id')
+    raw_id_fields = ('auction', 'bidder')
 
     def get_auction_vehicle(self, obj):
         return f"{obj.auction.vehicle.make} {obj.auction.vehicle.model} ({obj.auction.vehicle.year})"
@@ -25,18 +149,25 @@ class BidAdmin(admin.ModelAdmin):
     get_auction_vehicle.short_description = "Vehicle"
 
 @admin.register(Vehicle)
-class VehicleAdmin(admin.ModelAdmin):
+class VehicleAdmin(LargeTableAdmin):
     list_display = ('id', 'make', 'model', 'year', 'condition', 'max_price', 'available', 'image_count', 'image_preview')
-    search_fields = ('make', 'model', 'year')
+    search_fields = ('^make', '^model', '=year')
     list_filter = ('available', 'year')
 
+    def get_queryset(self, request):
+        # One query for the images of the whole page, shared by both image columns
+        return super().get_queryset(request).prefetch_related('images')
+
     def image_count(self, obj):
-        return obj.images.count()
+        return len(obj.images.all())
     image_count.short_description = 'Image Count'
 
     def image_preview(self, obj):
-        images = obj.images.all()[:1]  # Show only first image as preview
+        images = obj.images.all()  # Show only first image as preview
         if images:
-            return format_html('<img src="{}" width="100" />', images[0].image.url)
+            # The small WebP variant once auction.images has rendered it
+            thumbnail = images[0].variants.get('thumbnail')
+            url = default_storage.url(thumbnail) if thumbnail else images[0].image.url
+            return format_html('<img src="{}" width="100" />', url)
         return "-"
     image_preview.short_description = 'Thumbnail'
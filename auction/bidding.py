@@ -0,0 +1,148 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+from rest_framework import status
+
+from .models import Auction, Bid, ProxyBid
+from .proxy import apply_proxies
+from .live import publish_auction_update
+from .cache import invalidate_auction
+
+
+class BidRejected(Exception):
+    """Raised when a bid cannot be accepted. Carries the API error message and HTTP status."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def to_amount(value):
+    """Parse a bid amount into a Decimal (never a float)."""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        raise BidRejected("Bid amount must be a number.")
+    if not amount.is_finite():
+        raise BidRejected("Bid amount must be a number.")
+    if amount <= 0:
+        raise BidRejected("Bid amount must be positive.")
+    return amount.quantize(Decimal('0.01'))
+
+
+def place_bid(auction_id, bidder, bid_amount):
+    """
+    Place a bid with a single compare-and-set UPDATE on the auction row.
+
+    The UPDATE only matches while the auction is running and the new amount
+    beats both the current highest bid and the starting price, so concurrent
+    bidders can never overwrite a higher bid. The Bid row is inserted in the
+    same transaction, which means a bid exists if and only if it claimed the
+    auction. Registered proxies then answer it, and the auction's bid
+    statistics are updated, in that same transaction.
+    """
+    amount = to_amount(bid_amount)
+    current_time = now()
+
+    try:
+        with transaction.atomic():
+            claimed = Auction.objects.filter(
+                id=auction_id,
+                start_time__lte=current_time,
+                end_time__gt=current_time,
+                closed_at__isnull=True,
+                highest_bid__lt=amount,
+                starting_price__lte=amount,
+            ).update(highest_bid=amount, highest_bidder=bidder)
+
+            if claimed:
+                bid = Bid(auction_id=auction_id, bidder=bidder, bid_amount=amount)
+                # bulk_create skips Bid.save(), which would re-validate and re-save the auction
+                # we have just updated.
+                Bid.objects.bulk_create([bid])
+                _, _, proxy_bids = apply_proxies(auction_id, amount, bidder.pk)
+                Auction.objects.filter(id=auction_id).record_bids([bid] + proxy_bids)
+                return bid
+    except ValidationError:
+        # Malformed UUID
+        raise BidRejected("Auction not found.", status.HTTP_404_NOT_FOUND)
+
+    raise _rejection_reason(auction_id, amount, current_time)
+
+
+def _rejection_reason(auction_id, amount, current_time):
+    # Only reached when the conditional UPDATE matched nothing, so this read is
+    # purely to explain why.
+    auction = Auction.objects.filter(id=auction_id).values(
+        'start_time', 'end_time', 'closed_at', 'highest_bid', 'starting_price',
+    ).first()
+    if auction is None:
+        return BidRejected("Auction not found.", status.HTTP_404_NOT_FOUND)
+    if auction['closed_at'] is not None or auction['end_time'] <= current_time:
+        return BidRejected("This auction has ended.")
+    if auction['start_time'] > current_time:
+        return BidRejected("This auction has not started yet.")
+    if amount < auction['starting_price']:
+        return BidRejected("Your bid must be higher than the starting price.")
+    return BidRejected("Your bid must be higher than the current highest bid.")
+
+
+def set_max_bid(auction_id, bidder, max_amount):
+    """
+    Register (or change) ``bidder``'s proxy maximum and let the proxies answer
+    straight away, in one transaction. Returns the resulting highest bid and
+    leader as {"highest_bid", "highest_bidder_id", "bids"}.
+    """
+    amount = to_amount(max_amount)
+    current_time = now()
+    try:
+        with transaction.atomic():
+            # No-op write first, so the auction row is locked before we read it
+            if not Auction.objects.filter(
+                id=auction_id, start_time__lte=current_time, end_time__gt=current_time, closed_at__isnull=True,
+            ).update(highest_bid=F('highest_bid')):
+                raise _rejection_reason(auction_id, amount, current_time)
+            auction = Auction.objects.values('highest_bid', 'highest_bidder_id', 'starting_price').get(id=auction_id)
+            if amount < auction['starting_price']:
+                raise BidRejected("Your maximum bid must be at least the starting price.")
+            leading = auction['highest_bidder_id'] == bidder.pk
+            if amount < auction['highest_bid'] or (amount == auction['highest_bid'] and not leading):
+                raise BidRejected("Your maximum bid must be higher than the current highest bid.")
+
+            ProxyBid.objects.update_or_create(auction_id=auction_id, bidder=bidder, defaults={'max_amount': amount})
+            highest_bid, leader_id, bids = apply_proxies(
+                auction_id, auction['highest_bid'], auction['highest_bidder_id'], auction['starting_price'],
+            )
+            if bids:
+                Auction.objects.filter(id=auction_id).record_bids(bids)
+                transaction.on_commit(lambda: on_bid_accepted(auction_id))
+    except ValidationError:
+        # Malformed UUID
+        raise BidRejected("Auction not found.", status.HTTP_404_NOT_FOUND)
+    return {"highest_bid": highest_bid, "highest_bidder_id": leader_id, "bids": bids}
+
+
+def submit_bid(auction_id, bidder, bid_amount):
+    """
+    Entry point used by the views. Routes through the per-auction sequencer
+    when BID_SEQUENCER_ENABLED is set, otherwise places the bid directly, and
+    evicts the cached auction and pushes its new state to live subscribers
+    once committed.
+    """
+    if getattr(settings, 'BID_SEQUENCER_ENABLED', False):
+        from .sequencer import sequencer
+        bid = sequencer.submit(auction_id, bidder, bid_amount)
+    else:
+        bid = place_bid(auction_id, bidder, bid_amount)
+    transaction.on_commit(lambda: on_bid_accepted(bid.auction_id))
+    return bid
+
+
+def on_bid_accepted(auction_id):
+    invalidate_auction(auction_id)
+    publish_auction_update(auction_id)
@@ -0,0 +1,198 @@
+"""
+Server-side response cache for the public vehicle and auction reads.
+
+Rendered JSON for ``list``/``retrieve`` is cached under a key that embeds
+generation stamps. Writes never delete entries; they bump the generation of
+whatever they affect (a vehicle, an auction, or the lists), so stale entries
+simply stop being addressed and age out. The generation stamp is the time of
+the last change and doubles as Last-Modified; the ETag is a hash of the body,
+so clients revalidating with If-None-Match/If-Modified-Since get a 304.
+HTTP dates are whole seconds while stamps move several times a second during
+bidding, so Last-Modified is only sent (and If-Modified-Since only honoured)
+once the stamp's second is over; until then clients revalidate by ETag.
+
+The responses don't depend on who is asking, so the cache is shared by
+anonymous and authenticated callers alike. Entries also expire after
+PUBLIC_CACHE_TIMEOUT seconds, which bounds how long an auction's time-based
+status can lag. Invalidation is only as wide as the cache backend: with the
+default per-process LocMemCache, run a shared backend when serving from
+several workers.
+
+Misses are rendered from a read replica when car_auction.db_router allows it
+for this caller and the data's generation is older than the replication
+window.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from car_auction.db_router import replica_reads, use_replica
+
+KEY_PREFIX = 'public-response'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(scope, outcome):
+    with _stats_lock:
+        _stats[(scope, outcome)] += 1
+
+
+def cache_stats():
+    """Hit/miss/304 counters for this process, e.g. {'auction': {'hit': 10, 'miss': 2, 'not_modified': 1}}."""
+    with _stats_lock:
+        stats = {}
+        for (scope, outcome), count in _stats.items():
+            stats.setdefault(scope, {'hit': 0, 'miss': 0, 'not_modified': 0})[outcome] = count
+        return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _generation_key(scope, object_id=None):
+    if object_id is None:
+        return f"{KEY_PREFIX}:gen:{scope}:list"
+    return f"{KEY_PREFIX}:gen:{scope}:{object_id}"
+
+
+def _generation(key):
+    stamp = cache.get(key)
+    if stamp is None:
+        # Cold or evicted: start a new generation, which also orphans any
+        # entry cached under the old one.
+        stamp = time.time()
+        cache.set(key, stamp, timeout=None)
+    return stamp
+
+
+def _bump(*keys):
+    now = time.time()
+    cache.set_many({key: now for key in keys}, timeout=None)
+
+
+def invalidate_vehicle(vehicle_id):
+    """A vehicle or one of its images changed. Auctions embed vehicle details, so they go too."""
+    from .models import Auction
+    keys = [
+        _generation_key('vehicle'),
+        _generation_key('vehicle', vehicle_id),
+        _generation_key('auction'),
+    ]
+    for auction_id in Auction.objects.filter(vehicle_id=vehicle_id).values_list('id', flat=True):
+        keys.append(_generation_key('auction', auction_id))
+    _bump(*keys)
+
+
+def invalidate_vehicle_list():
+    """New vehicles only show up in the vehicle lists; nothing else can have cached them yet."""
+    _bump(_generation_key('vehicle'))
+
+
+def invalidate_auction(auction_id):
+    _bump(_generation_key('auction'), _generation_key('auction', auction_id))
+
+
+def invalidate_auctions(auction_ids):
+    _bump(_generation_key('auction'), *(_generation_key('auction', auction_id) for auction_id in auction_ids))
+
+
+def invalidate_closed_auctions(closed):
+    """Auctions were settled and their vehicles marked unavailable; ``closed`` is (auction_id, vehicle_id) pairs."""
+    keys = [_generation_key('auction'), _generation_key('vehicle')]
+    for auction_id, vehicle_id in closed:
+        keys += [_generation_key('auction', auction_id), _generation_key('vehicle', vehicle_id)]
+    _bump(*keys)
+
+
+def _last_modified(stamp):
+    """
+    Last-Modified (whole seconds) for a generation stamp, or None while its
+    second is still running: another change in that second would carry the
+    same date, and a client holding it would be told it is up to date.
+    """
+    second = int(stamp)
+    return second if time.time() >= second + 1 else None
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+    if last_modified is None:
+        return False
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def serve(request, scope, object_id, render):
+    """
+    Serve a cached response for ``scope`` ('vehicle' or 'auction'), calling
+    ``render()`` (the normal DRF handler) on a miss.
+    """
+    last_modified = _generation(_generation_key(scope, object_id))
+    replica = use_replica(request, last_modified)
+
+    renderer = getattr(request, 'accepted_renderer', None)
+    if not isinstance(renderer, JSONRenderer):
+        # Browsable API and other formats are not worth caching
+        with replica_reads(replica):
+            return render()
+    media_type = request.accepted_media_type
+
+    url_hash = hashlib.md5(f"{request.build_absolute_uri()}|{media_type}".encode()).hexdigest()
+    key = f"{KEY_PREFIX}:{scope}:{url_hash}:{last_modified!r}"
+
+    entry = cache.get(key)
+    if entry is None:
+        with replica_reads(replica):
+            response = render()
+        if response.status_code != 200:
+            return response
+        content = renderer.render(response.data, media_type, {'request': request})
+        entry = {
+            'content': content,
+            'content_type': f"{media_type}; charset={renderer.charset}" if renderer.charset else media_type,
+            'etag': quote_etag(hashlib.md5(content).hexdigest()),
+        }
+        cache.set(key, entry, timeout=getattr(settings, 'PUBLIC_CACHE_TIMEOUT', 30))
+        _count(scope, 'miss')
+    else:
+        _count(scope, 'hit')
+
+    modified_at = _last_modified(last_modified)
+    if _not_modified(request, entry['etag'], modified_at):
+        _count(scope, 'not_modified')
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    if modified_at is not None:
+        response['Last-Modified'] = http_date(modified_at)
+    return response
+
+
+class CachedReadMixin:
+    """Viewset mixin caching ``list`` and ``retrieve`` under ``cache_scope``."""
+    cache_scope = None
+
+    def list(self, request, *args, **kwargs):
+        return serve(request, self.cache_scope, None, lambda: super(CachedReadMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            object_id = uuid.UUID(str(kwargs.get(self.lookup_url_kwarg or self.lookup_field)))
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)
+        return serve(request, self.cache_scope, object_id, lambda: super(CachedReadMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,61 @@
+"""
+Closing auctions at their end_time.
+
+``close_auctions`` freezes a batch of ended auctions with one conditional
+UPDATE (so each is closed exactly once even with several schedulers
+running), writes their AuctionSettlement rows, marks the vehicles
+unavailable and, once committed, evicts cached responses and publishes a
+``closed`` event to live subscribers.
+"""
+from django.db import transaction
+from django.utils.timezone import now
+
+from .cache import invalidate_closed_auctions
+from .live import publish_auction_closed
+from .models import Auction, AuctionSettlement, Vehicle
+
+
+def close_auctions(auction_ids, at=None):
+    """Close those of ``auction_ids`` that have ended and are still open. Returns the new settlements."""
+    at = at or now()
+    auction_ids = list(auction_ids)
+    if not auction_ids:
+        return []
+
+    with transaction.atomic():
+        frozen = Auction.objects.filter(id__in=auction_ids).due_for_close(at).update(closed_at=at)
+        if not frozen:
+            return []
+        closed = list(
+            Auction.objects.filter(id__in=auction_ids, closed_at=at)
+            .values('id', 'vehicle_id', 'highest_bid', 'highest_bidder_id')
+        )
+        settlements = AuctionSettlement.objects.bulk_create([
+            AuctionSettlement(
+                auction_id=auction['id'],
+                winner_id=auction['highest_bidder_id'],
+                winning_bid=auction['highest_bid'] if auction['highest_bidder_id'] else None,
+                settled_at=at,
+            )
+            for auction in closed
+        ])
+        Vehicle.objects.filter(id__in=[auction['vehicle_id'] for auction in closed]).update(available=False)
+
+        # update()/bulk_create skip the post_save hooks, so evict and notify here
+        def after_commit():
+            invalidate_closed_auctions((auction['id'], auction['vehicle_id']) for auction in closed)
+            for auction, settlement in zip(closed, settlements):
+                publish_auction_closed(auction['id'], settlement)
+        transaction.on_commit(after_commit)
+    return settlements
+
+
+def close_due_auctions(at=None, batch_size=500):
+    """Close every auction whose end_time has passed. Returns how many were closed."""
+    at = at or now()
+    total = 0
+    while True:
+        ids = list(Auction.objects.due_for_close(at).order_by('end_time').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        total += len(close_auctions(ids, at))
@@ -0,0 +1,44 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+class AuctionStatusFilter(BaseFilterBackend):
+    """
+    ``?status=active|completed|upcoming`` filtered in the database through the
+    AuctionQuerySet range helpers, so only matching rows are fetched.
+    """
+    statuses = ('active', 'completed', 'upcoming')
+
+    def filter_queryset(self, request, queryset, view):
+        status = request.query_params.get('status')
+        if not status:
+            return queryset
+        if status not in self.statuses:
+            raise ValidationError({"status": f"Must be one of: {', '.join(self.statuses)}."})
+        return getattr(queryset, status)()
+
+
+class VehicleAvailableFilter(BaseFilterBackend):
+    """``?available=true|false`` on the vehicle list; the search endpoint takes the same parameter."""
+    values = {'true': True, '1': True, 'false': False, '0': False}
+
+    def filter_queryset(self, request, queryset, view):
+        available = request.query_params.get('available')
+        if not available:
+            return queryset
+        if available.lower() not in self.values:
+            raise ValidationError({"available": "Must be true or false."})
+        return queryset.filter(available=self.values[available.lower()])
+
+
+class MyAuctionStatusFilter(BaseFilterBackend):
+    """``?status=winning|outbid|won|lost`` on the bidder dashboard (AuctionQuerySet.bid_on_by)."""
+    statuses = ('winning', 'outbid', 'won', 'lost')
+
+    def filter_queryset(self, request, queryset, view):
+        status = request.query_params.get('status')
+        if not status:
+            return queryset
+        if status not in self.statuses:
+            raise ValidationError({"status": f"Must be one of: {', '.join(self.statuses)}."})
+        return queryset.filter(standing=status)
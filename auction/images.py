@@ -0,0 +1,109 @@
+"""
+Resized WebP variants for uploaded vehicle images.
+
+Uploads are stored untouched; once the upload has committed, the image is
+handed to a small process pool that writes one WebP per entry in VARIANTS
+and records their storage names on ``VehicleImage.variants``. Until that
+finishes the API serves the original.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# name -> bounding box; images are never upscaled
+VARIANTS = {
+    'thumbnail': (320, 240),
+    'card': (800, 600),
+    'full': (1920, 1440),
+}
+VARIANT_DIR = 'vehicle_images/variants'
+WEBP_QUALITY = 80
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def render_variants(source_path, target_dir, stem):
+    """
+    Write the WebP variants of ``source_path`` into ``target_dir``.
+
+    Runs inside the worker process, so it only deals in plain paths.
+    Returns {variant name: file name}.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    written = {}
+    with Image.open(source_path) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+        for name, size in VARIANTS.items():
+            variant = original.copy()
+            variant.thumbnail(size, Image.LANCZOS)
+            file_name = f"{stem}_{name}.webp"
+            variant.save(os.path.join(target_dir, file_name), 'WEBP', quality=WEBP_QUALITY, method=4)
+            written[name] = file_name
+    return written
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_VARIANT_WORKERS)
+    return _executor
+
+
+def _store_variants(image_id, vehicle_id, file_names):
+    from .cache import invalidate_vehicle
+    from .models import VehicleImage
+    variants = {name: f"{VARIANT_DIR}/{file_name}" for name, file_name in file_names.items()}
+    # update() rather than save() so the post_save hook doesn't schedule us again
+    VehicleImage.objects.filter(id=image_id).update(variants=variants)
+    invalidate_vehicle(vehicle_id)
+
+
+def generate_variants(image):
+    """Render the variants of a VehicleImage in the calling thread."""
+    file_names = render_variants(image.image.path, default_storage.path(VARIANT_DIR), image.id.hex)
+    _store_variants(image.id, image.vehicle_id, file_names)
+
+
+def schedule_variants(image):
+    """
+    Queue variant generation off the request path. With
+    IMAGE_VARIANT_WORKERS = 0 it runs inline instead (tests, one-off scripts).
+    """
+    if not settings.IMAGE_VARIANT_WORKERS:
+        try:
+            generate_variants(image)
+        except Exception:
+            logger.exception("Could not generate variants for vehicle image %s", image.id)
+        return
+
+    image_id, vehicle_id = image.id, image.vehicle_id
+    caller = threading.current_thread()
+    future = _get_executor().submit(
+        render_variants, image.image.path, default_storage.path(VARIANT_DIR), image_id.hex
+    )
+
+    def done(future):
+        # Normally runs on the executor's management thread, which has its own
+        # DB connection; if the future already finished it runs right here.
+        try:
+            _store_variants(image_id, vehicle_id, future.result())
+        except Exception:
+            logger.exception("Could not generate variants for vehicle image %s", image_id)
+        finally:
+            if threading.current_thread() is not caller:
+                connection.close()
+
+    future.add_done_callback(done)
@@ -0,0 +1,252 @@
+"""
+Bulk vehicle import from a JSONL or CSV manifest plus a zip of images.
+
+Each manifest row describes one vehicle::
+
+    {"make": "Toyota", "model": "Camry", "year": 2020, "condition": "New",
+     "max_price": "20000.00", "images": ["camry_1.jpg", "camry_2.jpg"]}
+
+CSV manifests use the same column names, with ``images`` separated by ``;``.
+Image names refer to files inside the archive. The manifest is parsed as a
+stream, rows are validated and de-duplicated in memory (against each other
+and against what is already stored, with the same case-insensitive rule as
+VehicleViewSet.create) and written with bulk_create in chunks. Bad rows are
+reported and skipped; they never abort the import. A manifest or archive that
+can't be read any further (not UTF-8, malformed CSV, a corrupt image in
+the zip) raises ImportAborted; the chunks written before it stay imported.
+"""
+import csv
+import io
+import json
+import os
+import posixpath
+import zipfile
+import zlib
+from decimal import Decimal, InvalidOperation
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .cache import invalidate_vehicle_list
+from .images import schedule_variants
+from .models import Vehicle, VehicleImage
+
+REQUIRED_FIELDS = ['make', 'model', 'year', 'condition', 'max_price']
+IMAGE_UPLOAD_DIR = 'vehicle_images'
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportAborted(Exception):
+    """The upload is unreadable from manifest row ``row`` on; ``report`` covers what was imported before it."""
+
+    def __init__(self, row, error):
+        super().__init__(f"row {row}: {error}")
+        self.row = row
+        self.error = error
+        self.report = None
+
+
+def _vehicle_key(make, model, year, condition, max_price):
+    return (make.lower(), model.lower(), year, condition.lower(), max_price)
+
+
+def read_jsonl(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, RowError(f"Invalid JSON: {exc.msg}.")
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError("Each line must be a JSON object.")
+            continue
+        yield line_number, row
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    try:
+        for row in reader:
+            images = row.get('images') or ''
+            row['images'] = [name.strip() for name in images.split(';') if name.strip()]
+            yield reader.line_num, row
+    except csv.Error as exc:
+        # line_num counts the lines read in full; the bad one is the next
+        raise ImportAborted(reader.line_num + 1, f"Invalid CSV: {exc}.")
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+def _utf8_rows(rows):
+    line_number = 0
+    try:
+        for line_number, row in rows:
+            yield line_number, row
+    except UnicodeDecodeError:
+        # The text stream decodes ahead in blocks, so this is where reading
+        # stopped rather than the exact line of the bad byte
+        raise ImportAborted(line_number + 1, "Manifest must be UTF-8 encoded.")
+
+
+def detect_format(file_name):
+    extension = os.path.splitext(file_name or '')[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+    return None
+
+
+class VehicleImporter:
+    def __init__(self, archive=None, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.archive = zipfile.ZipFile(archive) if archive is not None else None
+        self.members = {}
+        if self.archive is not None:
+            for info in self.archive.infolist():
+                if not info.is_dir():
+                    self.members[info.filename] = info
+                    self.members.setdefault(posixpath.basename(info.filename), info)
+        self.created = 0
+        self.duplicates = 0
+        self.errors = []
+        self.seen = set()
+
+    def run(self, stream, fmt):
+        """Import every row from ``stream`` (text) and return the report."""
+        try:
+            self._import(stream, fmt)
+        except ImportAborted as exc:
+            exc.report = self.report()
+            raise
+        return self.report()
+
+    def _import(self, stream, fmt):
+        self._load_existing_keys()
+        chunk = []
+        for line_number, row in _utf8_rows(READERS[fmt](stream)):
+            if isinstance(row, RowError):
+                self.errors.append({"row": line_number, "error": str(row)})
+                continue
+            try:
+                vehicle, image_names = self._clean(row)
+            except RowError as exc:
+                self.errors.append({"row": line_number, "error": str(exc)})
+                continue
+
+            key = _vehicle_key(vehicle.make, vehicle.model, vehicle.year, vehicle.condition, vehicle.max_price)
+            if key in self.seen:
+                self.duplicates += 1
+                self.errors.append({"row": line_number, "error": "A vehicle with the same details already exists."})
+                continue
+            self.seen.add(key)
+
+            chunk.append((line_number, vehicle, image_names))
+            if len(chunk) >= self.chunk_size:
+                self._write(chunk)
+                chunk = []
+        if chunk:
+            self._write(chunk)
+
+    def report(self):
+        return {
+            "created": self.created,
+            "duplicates": self.duplicates,
+            "failed": len(self.errors) - self.duplicates,
+            "errors": self.errors,
+        }
+
+    def _load_existing_keys(self):
+        existing = Vehicle.objects.values_list('make', 'model', 'year', 'condition', 'max_price')
+        for make, model, year, condition, max_price in existing.iterator(chunk_size=5000):
+            self.seen.add(_vehicle_key(make, model, year, condition, max_price))
+
+    def _clean(self, row):
+        for field in REQUIRED_FIELDS:
+            if row.get(field) in (None, ''):
+                raise RowError(f"'{field}' is required.")
+        try:
+            year = int(row['year'])
+        except (TypeError, ValueError):
+            raise RowError("Year must be an integer.")
+        try:
+            max_price = Decimal(str(row['max_price'])).quantize(Decimal('0.01'))
+        except (InvalidOperation, TypeError, ValueError):
+            raise RowError("Max price must be a number.")
+
+        image_names = row.get('images') or []
+        if isinstance(image_names, str):
+            image_names = [image_names]
+        if not image_names:
+            raise RowError("At least one image is required.")
+        for name in image_names:
+            if name not in self.members:
+                raise RowError(f"Image '{name}' is not in the archive.")
+
+        available = row.get('available', True)
+        if isinstance(available, str):
+            available = available.strip().lower() not in ('false', '0', 'no', '')
+        vehicle = Vehicle(
+            make=str(row['make']).strip(),
+            model=str(row['model']).strip(),
+            year=year,
+            condition=str(row['condition']).strip(),
+            max_price=max_price,
+            available=bool(available),
+        )
+        try:
+            vehicle.clean_fields()
+        except Exception as exc:
+            raise RowError(str(exc))
+        return vehicle, image_names
+
+    def _read_image(self, line_number, name):
+        try:
+            return self.archive.read(self.members[name])
+        except (zipfile.BadZipFile, zlib.error, EOFError) as exc:
+            raise ImportAborted(line_number, f"Image '{name}' could not be read from the archive: {exc}.")
+
+    def _write(self, chunk):
+        images = []
+        try:
+            with transaction.atomic():
+                vehicles = Vehicle.objects.bulk_create([vehicle for _, vehicle, _ in chunk])
+                for vehicle, (line_number, _, image_names) in zip(vehicles, chunk):
+                    for name in image_names:
+                        data = self._read_image(line_number, name)
+                        stored = default_storage.save(
+                            posixpath.join(IMAGE_UPLOAD_DIR, posixpath.basename(name)), ContentFile(data)
+                        )
+                        images.append(VehicleImage(vehicle=vehicle, image=stored))
+                VehicleImage.objects.bulk_create(images)
+
+                # bulk_create skips the post_save hooks, so do their work here
+                def after_commit():
+                    invalidate_vehicle_list()
+                    for image in images:
+                        schedule_variants(image)
+                transaction.on_commit(after_commit)
+        except Exception:
+            # The rows are rolled back; don't leave their files behind
+            for image in images:
+                default_storage.delete(image.image.name)
+            raise
+        self.created += len(vehicles)
+
+
+def import_vehicles(stream, fmt, archive=None, chunk_size=1000):
+    return VehicleImporter(archive=archive, chunk_size=chunk_size).run(stream, fmt)
+
+
+def text_stream(binary_file):
+    return io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
@@ -0,0 +1,318 @@
+"""
+Live auction updates.
+
+Accepted bids (and the close of the auction) are published to a broker
+channel per auction. The ASGI app in
+car_auction/asgi.py streams those messages to clients over Server-Sent Events
+(``GET /api/auction/auctions/<id>/live/``) or a WebSocket on the same path, so
+clients no longer need to poll the auction endpoints.
+
+The broker backend is pluggable through the ``AUCTION_LIVE_BACKEND`` setting.
+The default in-memory backend only fans out within one process, so the
+Dockerfile and render.yaml run a single uvicorn process; a shared backend
+(e.g. Redis pub/sub) implementing the BaseBackend methods is needed before
+running several workers. Streaming needs an ASGI server; plain WSGI never
+reaches it.
+
+These paths are answered here, outside the Django middleware, so the CORS
+rules of django-cors-headers are applied here too: SSE responses carry
+Access-Control-Allow-Origin for allowed origins, and WebSocket handshakes
+from other origins (browsers always send Origin) are refused.
+"""
+import asyncio
+import json
+import re
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from corsheaders.conf import conf as cors_conf
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+LIVE_PATH = re.compile(r'^/api/auction/auctions/(?P<auction_id>[0-9a-fA-F-]{32,36})/live/?$')
+HEARTBEAT_SECONDS = 15
+
+
+class BaseBackend(ABC):
+    """Interface every broker backend implements."""
+
+    @abstractmethod
+    def publish(self, channel, message):
+        """Deliver ``message`` (a JSON-serialisable dict) to every subscriber. Callable from any thread."""
+
+    @abstractmethod
+    def subscribe(self, channel):
+        """Return a Subscription bound to the running event loop."""
+
+    @abstractmethod
+    def unsubscribe(self, subscription):
+        """Stop delivering to ``subscription``."""
+
+    def has_subscribers(self, channel):
+        """Whether publishing is worth the effort. Shared backends can't tell, so they say yes."""
+        return True
+
+
+class Subscription:
+    def __init__(self, backend, channel, maxsize=100):
+        self.backend = backend
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message):
+        # Runs on the subscriber's loop. A client that can't keep up misses
+        # intermediate deltas; the next one carries the full current state anyway.
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.backend.unsubscribe(self)
+
+
+class InMemoryBackend(BaseBackend):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Event loop already closed
+                subscription.close()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def has_subscribers(self, channel):
+        return channel in self._subscribers
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, 'AUCTION_LIVE_BACKEND', 'auction.live.InMemoryBackend')
+                _broker = import_string(backend)()
+    return _broker
+
+
+def auction_channel(auction_id):
+    return f"auction:{auction_id}"
+
+
+def auction_state(auction_id):
+    """Current {highest_bid, highest_bidder, end_time, closed_at} for an auction, or None."""
+    from .models import Auction
+    auction = (
+        Auction.objects.filter(id=auction_id)
+        .values('id', 'highest_bid', 'highest_bidder_id', 'highest_bidder__username', 'end_time', 'closed_at')
+        .first()
+    )
+    if auction is None:
+        return None
+    bidder = None
+    if auction['highest_bidder_id'] is not None:
+        bidder = {"id": auction['highest_bidder_id'], "username": auction['highest_bidder__username']}
+    return {
+        "auction": auction['id'],
+        "highest_bid": auction['highest_bid'],
+        "highest_bidder": bidder,
+        "end_time": auction['end_time'],
+        "closed_at": auction['closed_at'],
+    }
+
+
+def publish_auction_update(auction_id):
+    broker = get_broker()
+    channel = auction_channel(auction_id)
+    if not broker.has_subscribers(channel):
+        return
+    state = auction_state(auction_id)
+    if state is not None:
+        broker.publish(channel, state)
+
+
+def publish_auction_closed(auction_id, settlement):
+    broker = get_broker()
+    channel = auction_channel(auction_id)
+    if not broker.has_subscribers(channel):
+        return
+    state = auction_state(auction_id)
+    if state is not None:
+        broker.publish(channel, dict(state, event='closed', winning_bid=settlement.winning_bid))
+
+
+def encode(message):
+    return json.dumps(message, cls=DjangoJSONEncoder)
+
+
+def _header(scope, name):
+    for key, value in scope.get('headers', ()):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def cors_allowed(origin):
+    """Whether ``origin`` passes the CORS_* settings that django-cors-headers applies to the rest of the API."""
+    return (
+        cors_conf.CORS_ALLOW_ALL_ORIGINS
+        or origin in cors_conf.CORS_ALLOWED_ORIGINS
+        or any(re.match(pattern, origin) for pattern in cors_conf.CORS_ALLOWED_ORIGIN_REGEXES)
+    )
+
+
+def _cors_headers(scope):
+    origin = _header(scope, b'origin')
+    if origin is None or not cors_allowed(origin):
+        return []
+    headers = [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'origin')]
+    if cors_conf.CORS_ALLOW_CREDENTIALS:
+        headers.append((b'access-control-allow-credentials', b'true'))
+    return headers
+
+
+def _websocket_origin_allowed(scope):
+    # Non-browser clients send no Origin; browsers send it on every handshake,
+    # same-origin pages included
+    origin = _header(scope, b'origin')
+    return origin is None or cors_allowed(origin) or urlsplit(origin).netloc == _header(scope, b'host')
+
+
+async def _send_sse(send, event, message):
+    body = f"event: {event}\ndata: {encode(message)}\n\n".encode()
+    await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+
+async def _wait_for(receive, message_type):
+    while True:
+        message = await receive()
+        if message['type'] == message_type:
+            return message
+
+
+async def _not_found(scope, send):
+    await send({
+        'type': 'http.response.start', 'status': 404,
+        'headers': [(b'content-type', b'application/json')] + _cors_headers(scope),
+    })
+    await send({'type': 'http.response.body', 'body': b'{"error": "Auction not found."}'})
+
+
+async def stream_events(scope, receive, send, auction_id):
+    """
+    Server-Sent Events: a ``snapshot`` event, then one ``bid`` event per
+    accepted bid and a ``closed`` event when the auction is settled.
+    """
+    state = await sync_to_async(auction_state)(auction_id)
+    if state is None:
+        await _not_found(scope, send)
+        return
+
+    subscription = get_broker().subscribe(auction_channel(auction_id))
+    disconnected = asyncio.ensure_future(_wait_for(receive, 'http.disconnect'))
+    try:
+        await send({
+            'type': 'http.response.start', 'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ] + _cors_headers(scope),
+        })
+        await _send_sse(send, 'snapshot', state)
+        while True:
+            update = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({update, disconnected}, timeout=HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                update.cancel()
+                break
+            if update in done:
+                message = update.result()
+                await _send_sse(send, message.get('event', 'bid'), message)
+            else:
+                update.cancel()
+                await send({'type': 'http.response.body', 'body': b': keep-alive\n\n', 'more_body': True})
+    finally:
+        disconnected.cancel()
+        subscription.close()
+
+
+async def stream_websocket(scope, receive, send, auction_id):
+    """WebSocket: same payloads as the SSE stream, sent as JSON text frames."""
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    if not _websocket_origin_allowed(scope):
+        await send({'type': 'websocket.close', 'code': 4403})
+        return
+    state = await sync_to_async(auction_state)(auction_id)
+    if state is None:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    subscription = get_broker().subscribe(auction_channel(auction_id))
+    disconnected = asyncio.ensure_future(_wait_for(receive, 'websocket.disconnect'))
+    try:
+        await send({'type': 'websocket.accept'})
+        await send({'type': 'websocket.send', 'text': encode(dict(state, event='snapshot'))})
+        while True:
+            update = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({update, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                update.cancel()
+                break
+            await send({'type': 'websocket.send', 'text': encode(dict({'event': 'bid'}, **update.result()))})
+    finally:
+        disconnected.cancel()
+        subscription.close()
+
+
+def live_application(django_application):
+    """Wrap the Django ASGI app, serving the live auction paths before falling through to Django."""
+
+    async def application(scope, receive, send):
+        match = LIVE_PATH.match(scope.get('path', '')) if scope['type'] in ('http', 'websocket') else None
+        if match is not None:
+            try:
+                auction_id = uuid.UUID(match.group('auction_id'))
+            except ValueError:
+                match = None
+        if match is None:
+            return await django_application(scope, receive, send)
+        if scope['type'] == 'websocket':
+            return await stream_websocket(scope, receive, send, auction_id)
+        if scope['method'] != 'GET':
+            return await django_application(scope, receive, send)
+        return await stream_events(scope, receive, send, auction_id)
+
+    return application
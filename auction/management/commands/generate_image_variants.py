@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from auction.images import generate_variants
+from auction.models import VehicleImage
+
+
+class Command(BaseCommand):
+    help = "Render the resized WebP variants for vehicle images that don't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Regenerate variants for every image.")
+
+    def handle(self, *args, **options):
+        images = VehicleImage.objects.all()
+        if not options['all']:
+            images = images.filter(variants={})
+
+        done = failed = 0
+        for image in images.iterator():
+            try:
+                generate_variants(image)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{image.id}: {exc}")
+            else:
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {done} image(s), {failed} failed."))
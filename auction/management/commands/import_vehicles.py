@@ -0,0 +1,36 @@
+import json
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auction.ingest import READERS, ImportAborted, detect_format, import_vehicles
+
+
+class Command(BaseCommand):
+    help = "Bulk import vehicles from a JSONL/CSV manifest and a zip of their images."
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', help="Path to the .jsonl or .csv manifest.")
+        parser.add_argument('--archive', required=True, help="Zip file holding the images named in the manifest.")
+        parser.add_argument('--format', choices=sorted(READERS), help="Manifest format (default: from the file extension).")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Vehicles per bulk_create transaction.")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['manifest'])
+        if fmt is None:
+            raise CommandError("Can't tell the manifest format from its name; pass --format.")
+
+        try:
+            with open(options['manifest'], encoding='utf-8-sig', newline='') as stream, \
+                    open(options['archive'], 'rb') as archive:
+                report = import_vehicles(stream, fmt, archive=archive, chunk_size=options['chunk_size'])
+        except zipfile.BadZipFile:
+            raise CommandError("The archive is not a valid zip file.")
+        except ImportAborted as exc:
+            raise CommandError(f"Stopped at row {exc.row}: {exc.error} ({exc.report['created']} vehicles imported before it)")
+
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            json.dumps({key: value for key, value in report.items() if key != 'errors'})
+        ))
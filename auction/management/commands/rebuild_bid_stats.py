@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from auction.cache import invalidate_auctions
+from auction.models import Auction
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute each auction's bid_count, unique_bidder_count, last_bid_at and "
+        "second_highest_bid from the Bid table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--auction', action='append', default=[], metavar='ID', help="Only this auction (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=500, help="Auctions per UPDATE transaction.")
+
+    def handle(self, *args, **options):
+        auctions = Auction.objects.order_by('id')
+        if options['auction']:
+            auctions = auctions.filter(id__in=options['auction'])
+        ids = list(auctions.values_list('id', flat=True))
+
+        # Short transactions, so bidding is only held up for one batch at a time
+        for start in range(0, len(ids), options['batch_size']):
+            batch = ids[start:start + options['batch_size']]
+            with transaction.atomic():
+                Auction.objects.filter(id__in=batch).rebuild_bid_stats()
+            invalidate_auctions(batch)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt bid statistics for {len(ids)} auction(s)."))
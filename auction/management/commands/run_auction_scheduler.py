@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from auction.closing import close_due_auctions
+from auction.scheduler import CloseScheduler
+
+
+class Command(BaseCommand):
+    help = "Close auctions as they reach their end_time: freeze, settle, mark the vehicle unavailable and notify."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=float, default=300, help="Seconds ahead to load auctions into the timer heap.")
+        parser.add_argument('--reload-interval', type=float, default=30, help="Seconds between refills of the heap.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Auctions closed per transaction.")
+        parser.add_argument('--once', action='store_true', help="Close everything already due and exit.")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            closed = close_due_auctions(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Closed {closed} auction(s)."))
+            return
+
+        scheduler = CloseScheduler(
+            horizon=timedelta(seconds=options['horizon']),
+            reload_interval=timedelta(seconds=options['reload_interval']),
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write("Auction scheduler running; Ctrl-C to stop.")
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            pass
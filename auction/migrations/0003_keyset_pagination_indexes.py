@@ -0,0 +1,21 @@
+# Generated by Django 4.2.20 on 2026-10-18 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['end_time', 'id'], name='auction_end_time_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['timestamp', 'id'], name='bid_timestamp_id_idx'),
+        ),
+    ]
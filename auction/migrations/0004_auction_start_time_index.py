@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 08:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['start_time'], name='auction_start_time_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.20 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0004_auction_start_time_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['auction', '-bid_amount'], name='bid_auction_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['auction', 'timestamp'], name='bid_auction_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['bidder', 'timestamp'], name='bid_bidder_time_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0005_bid_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
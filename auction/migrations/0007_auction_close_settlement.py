@@ -0,0 +1,44 @@
+# Generated by Django 4.2.20 on 2026-10-18 08:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auction', '0006_vehicleimage_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuctionSettlement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('winning_bid', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('settled_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(condition=models.Q(('closed_at__isnull', True)), fields=['end_time'], name='auction_open_end_time_idx'),
+        ),
+        migrations.AddField(
+            model_name='auctionsettlement',
+            name='auction',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='settlement', to='auction.auction'),
+        ),
+        migrations.AddField(
+            model_name='auctionsettlement',
+            name='winner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='won_auctions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.20 on 2026-10-18 08:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auction', '0007_auction_close_settlement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProxyBid',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('max_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('auction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proxy_bids', to='auction.auction')),
+                ('bidder', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proxy_bids', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['auction', '-max_amount', 'created_at'], name='proxy_bid_auction_max_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='proxybid',
+            constraint=models.UniqueConstraint(fields=('auction', 'bidder'), name='proxy_bid_auction_bidder_uniq'),
+        ),
+    ]
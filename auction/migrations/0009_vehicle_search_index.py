@@ -0,0 +1,89 @@
+from django.db import migrations
+
+# auction_vehicle has a UUID primary key and VACUUM may renumber its implicit
+# rowids, so the FTS rows are keyed by the integer primary key of
+# auction_vehicle_search_doc. That table also copies the filter and facet
+# columns, so a search reads matches by integer key and never joins back to
+# auction_vehicle. Triggers keep both in sync with every write, including
+# bulk_create and queryset update()/delete(). SQLite drops triggers with their table, so
+# auction.search.restore_triggers recreates them after every migrate.
+FORWARD = [
+    """
+    CREATE TABLE auction_vehicle_search_doc (
+        id integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+        vehicle_id char(32) NOT NULL UNIQUE,
+        make varchar(100) NOT NULL,
+        year integer NOT NULL,
+        condition varchar(50) NOT NULL,
+        max_price decimal NOT NULL
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE auction_vehicle_fts USING fts5(
+        make, model, condition, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER auction_vehicle_search_insert AFTER INSERT ON auction_vehicle BEGIN
+        INSERT INTO auction_vehicle_search_doc (vehicle_id, make, year, condition, max_price)
+            VALUES (new.id, new.make, new.year, new.condition, new.max_price);
+        INSERT INTO auction_vehicle_fts (rowid, make, model, condition)
+            VALUES (last_insert_rowid(), new.make, new.model, new.condition);
+    END
+    """,
+    """
+    CREATE TRIGGER auction_vehicle_search_update
+    AFTER UPDATE OF make, model, year, condition, max_price ON auction_vehicle BEGIN
+        UPDATE auction_vehicle_search_doc
+            SET make = new.make, year = new.year, condition = new.condition, max_price = new.max_price
+            WHERE vehicle_id = old.id;
+        UPDATE auction_vehicle_fts SET make = new.make, model = new.model, condition = new.condition
+            WHERE rowid = (SELECT id FROM auction_vehicle_search_doc WHERE vehicle_id = old.id);
+    END
+    """,
+    """
+    CREATE TRIGGER auction_vehicle_search_delete AFTER DELETE ON auction_vehicle BEGIN
+        DELETE FROM auction_vehicle_fts
+            WHERE rowid = (SELECT id FROM auction_vehicle_search_doc WHERE vehicle_id = old.id);
+        DELETE FROM auction_vehicle_search_doc WHERE vehicle_id = old.id;
+    END
+    """,
+    """
+    INSERT INTO auction_vehicle_search_doc (vehicle_id, make, year, condition, max_price)
+        SELECT id, make, year, condition, max_price FROM auction_vehicle
+    """,
+    """
+    INSERT INTO auction_vehicle_fts (rowid, make, model, condition)
+        SELECT doc.id, vehicle.make, vehicle.model, vehicle.condition
+        FROM auction_vehicle_search_doc doc JOIN auction_vehicle vehicle ON vehicle.id = doc.vehicle_id
+    """,
+]
+
+BACKWARD = [
+    "DROP TRIGGER IF EXISTS auction_vehicle_search_insert",
+    "DROP TRIGGER IF EXISTS auction_vehicle_search_update",
+    "DROP TRIGGER IF EXISTS auction_vehicle_search_delete",
+    "DROP TABLE IF EXISTS auction_vehicle_fts",
+    "DROP TABLE IF EXISTS auction_vehicle_search_doc",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # FTS5 is SQLite's; other backends would need their own index
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0008_proxybid'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD), _run(BACKWARD)),
+    ]
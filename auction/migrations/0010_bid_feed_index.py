@@ -0,0 +1,21 @@
+# Generated by Django 4.2.20 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0009_vehicle_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bid',
+            name='bid_auction_time_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['auction', 'timestamp', 'id'], name='bid_auction_time_id_idx'),
+        ),
+    ]
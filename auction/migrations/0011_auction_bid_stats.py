@@ -0,0 +1,55 @@
+# Generated by Django 4.2.20 on 2026-10-18 09:21
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_bid_stats(apps, schema_editor):
+    # Same as AuctionQuerySet.rebuild_bid_stats(), which historical models lack
+    Auction = apps.get_model('auction', 'Auction')
+    Bid = apps.get_model('auction', 'Bid')
+    bids = Bid.objects.filter(auction=OuterRef('pk')).order_by().values('auction')
+    Auction.objects.update(
+        bid_count=Coalesce(Subquery(bids.annotate(n=Count('id')).values('n')), 0),
+        unique_bidder_count=Coalesce(Subquery(bids.annotate(n=Count('bidder', distinct=True)).values('n')), 0),
+        last_bid_at=Subquery(bids.annotate(at=Max('timestamp')).values('at')),
+        second_highest_bid=Subquery(
+            Bid.objects.filter(auction=OuterRef('pk')).order_by('-bid_amount').values('bid_amount')[1:2]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0010_bid_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auction',
+            name='bid_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='last_bid_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='second_highest_bid',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='auction',
+            name='unique_bidder_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['auction', 'bidder'], name='bid_auction_bidder_idx'),
+        ),
+        migrations.RunPython(backfill_bid_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Case-insensitive indexes for the admin's prefix/exact searches
+# (auction.admin.LargeTableAdmin). Django runs istartswith/iexact on SQLite
+# as LIKE, which SQLite only answers from an index collated NOCASE; Django
+# cannot declare such an index on a plain column, so these are raw SQL and,
+# like the triggers of 0009, disappear if a later migration rebuilds the table.
+# 0016 replaces them with Meta.indexes.
+FORWARD = [
+    "CREATE INDEX IF NOT EXISTS auction_vehicle_make_nocase_idx ON auction_vehicle (make COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS auction_vehicle_model_nocase_idx ON auction_vehicle (model COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS users_user_email_nocase_idx ON users_user (email COLLATE NOCASE)",
+]
+
+BACKWARD = [
+    "DROP INDEX IF EXISTS auction_vehicle_make_nocase_idx",
+    "DROP INDEX IF EXISTS auction_vehicle_model_nocase_idx",
+    "DROP INDEX IF EXISTS users_user_email_nocase_idx",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # Other backends need their own flavour (e.g. an index on UPPER(column))
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0011_auction_bid_stats'),
+        ('users', '0002_outboundemail'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD), _run(BACKWARD)),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0012_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['bidder', 'auction', 'bid_amount'], name='bid_bidder_auction_idx'),
+        ),
+    ]
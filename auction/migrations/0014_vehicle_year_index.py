@@ -0,0 +1,17 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0013_bid_bidder_auction_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['-year', 'id'], name='vehicle_year_id_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0014_vehicle_year_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auction',
+            name='auction_start_time_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['start_time', 'id'], name='auction_start_time_id_idx'),
+        ),
+    ]
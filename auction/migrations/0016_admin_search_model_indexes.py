@@ -0,0 +1,46 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:25
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+# The raw-SQL indexes of 0012, replaced by the Meta.indexes of Vehicle and
+# User so that Django keeps them through table rebuilds.
+RAW_INDEXES = {
+    'auction_vehicle_make_nocase_idx': "ON auction_vehicle (make COLLATE NOCASE)",
+    'auction_vehicle_model_nocase_idx': "ON auction_vehicle (model COLLATE NOCASE)",
+    'users_user_email_nocase_idx': "ON users_user (email COLLATE NOCASE)",
+}
+
+
+def drop_raw_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name in RAW_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def create_raw_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for name, target in RAW_INDEXES.items():
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {name} {target}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0015_auction_start_time_id_index'),
+        ('users', '0003_user_email_nocase_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_raw_indexes, create_raw_indexes),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(django.db.models.functions.comparison.Collate('make', 'NOCASE'), name='vehicle_make_nocase_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(django.db.models.functions.comparison.Collate('model', 'NOCASE'), name='vehicle_model_nocase_idx'),
+        ),
+    ]
@@ -2,6 +2,10 @@ from django.db import models
 from users.models import User
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, When, Value, Q, F, Count, Exists, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Collate
+from django.utils.timezone import now
 import uuid
 
 User = get_user_model()
@@ -15,6 +19,15 @@ class Vehicle(models.Model):
     max_price = models.DecimalField(max_digits=12, decimal_places=2)
     available = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['-year', 'id'], name='vehicle_year_id_idx'),
+            # Admin prefix search: SQLite answers istartswith (LIKE) only from a NOCASE index
+            models.Index(Collate('make', 'NOCASE'), name='vehicle_make_nocase_idx'),
+            models.Index(Collate('model', 'NOCASE'), name='vehicle_model_nocase_idx'),
+        ]
+
     def __str__(self):
         return f"{self.make} {self.model} ({self.year})"
 
@@ -22,10 +35,114 @@ class VehicleImage(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     vehicle = models.ForeignKey(Vehicle, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='vehicle_images/')
+    # Storage names of the resized WebP variants, filled in by auction.images
+    variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Image for {self.vehicle}"
 
+class AuctionQuerySet(models.QuerySet):
+    """
+    Status helpers evaluated in the database. ``closed_at`` (set by the close
+    scheduler) is authoritative; start_time/end_time cover auctions it has
+    not reached yet.
+    """
+
+    def with_status(self, at=None):
+        at = at or now()
+        return self.annotate(status=Case(
+            When(closed_at__isnull=False, then=Value('completed')),
+            When(start_time__gt=at, then=Value('upcoming')),
+            When(end_time__lte=at, then=Value('completed')),
+            default=Value('active'),
+            output_field=models.CharField(),
+        ))
+
+    def upcoming(self, at=None):
+        return self.filter(start_time__gt=at or now(), closed_at__isnull=True)
+
+    def active(self, at=None):
+        at = at or now()
+        return self.filter(start_time__lte=at, end_time__gt=at, closed_at__isnull=True)
+
+    def completed(self, at=None):
+        return self.filter(Q(closed_at__isnull=False) | Q(end_time__lte=at or now()))
+
+    def due_for_close(self, at=None):
+        return self.filter(closed_at__isnull=True, end_time__lte=at or now())
+
+    def bid_on_by(self, user, at=None):
+        """
+        Auctions ``user`` has bid on, annotated with their best bid, number of
+        bids and last bid time, their ``rank`` among the auction's bidders
+        (1 + bidders with a higher bid) and their ``standing``: 'winning' or
+        'outbid' while the auction runs, 'won' or 'lost' once it has ended.
+
+        A single statement: the auctions come from bid_bidder_auction_idx and
+        every figure is an index probe on that auction's bids, so the cost
+        follows the user's own activity, not the size of the bid table.
+        """
+        at = at or now()
+        mine = Bid.objects.filter(auction=OuterRef('pk'), bidder=user).order_by().values('auction')
+        ended = Q(closed_at__isnull=False) | Q(end_time__lte=at)
+        queryset = self.filter(pk__in=Bid.objects.filter(bidder=user).values('auction')).annotate(
+            my_best_bid=Subquery(mine.annotate(best=Max('bid_amount')).values('best')),
+            my_bid_count=Subquery(mine.annotate(count=Count('id')).values('count')),
+            my_last_bid_at=Subquery(mine.annotate(last=Max('timestamp')).values('last')),
+            standing=Case(
+                When(ended & Q(highest_bidder=user), then=Value('won')),
+                When(ended, then=Value('lost')),
+                When(highest_bidder=user, then=Value('winning')),
+                default=Value('outbid'),
+                output_field=models.CharField(),
+            ),
+        )
+        above = (
+            Bid.objects.filter(auction=OuterRef('pk'), bid_amount__gt=OuterRef('my_best_bid'))
+            .order_by().values('auction').annotate(bidders=Count('bidder', distinct=True)).values('bidders')
+        )
+        return queryset.annotate(rank=Coalesce(Subquery(above), 0) + 1)
+
+    def record_bids(self, bids):
+        """
+        Fold newly inserted ``bids`` (all on the auction this queryset selects)
+        into its bid statistics with one UPDATE. Run it in the transaction
+        that inserted them. Accepted bids always beat the highest one, so the
+        runner-up of the batch, or else the best earlier bid, becomes
+        second_highest_bid.
+        """
+        if not bids:
+            return 0
+        auction = OuterRef('pk')
+        new_ids = [bid.id for bid in bids]
+        earlier = Bid.objects.filter(auction=auction).exclude(id__in=new_ids)
+        new_bidders = Value(0)
+        for bidder_id in {bid.bidder_id for bid in bids}:
+            new_bidders = new_bidders + Case(When(Exists(earlier.filter(bidder_id=bidder_id)), then=Value(0)), default=Value(1))
+        amounts = sorted(bid.bid_amount for bid in bids)
+        if len(amounts) > 1:
+            second_highest = Value(amounts[-2])
+        else:
+            second_highest = Subquery(earlier.order_by('-bid_amount').values('bid_amount')[:1])
+        return self.update(
+            bid_count=F('bid_count') + len(bids),
+            unique_bidder_count=F('unique_bidder_count') + new_bidders,
+            last_bid_at=max(bid.timestamp for bid in bids),
+            second_highest_bid=second_highest,
+        )
+
+    def rebuild_bid_stats(self):
+        """Recompute the bid statistics of these auctions from the Bid table."""
+        bids = Bid.objects.filter(auction=OuterRef('pk')).order_by().values('auction')
+        return self.update(
+            bid_count=Coalesce(Subquery(bids.annotate(n=Count('id')).values('n')), 0),
+            unique_bidder_count=Coalesce(Subquery(bids.annotate(n=Count('bidder', distinct=True)).values('n')), 0),
+            last_bid_at=Subquery(bids.annotate(at=Max('timestamp')).values('at')),
+            second_highest_bid=Subquery(
+                Bid.objects.filter(auction=OuterRef('pk')).order_by('-bid_amount').values('bid_amount')[1:2]
+            ),
+        )
+
 class Auction(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     vehicle = models.OneToOneField(Vehicle, on_delete=models.CASCADE)
@@ -34,10 +151,62 @@ class Auction(models.Model):
     end_time = models.DateTimeField()
     highest_bid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     highest_bidder = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # Set once, by auction.closing, when the auction is frozen and settled
+    closed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Bid statistics, maintained with every accepted bid (AuctionQuerySet.record_bids)
+    # and rebuilt from the Bid table by `manage.py rebuild_bid_stats`
+    bid_count = models.PositiveIntegerField(default=0, editable=False)
+    unique_bidder_count = models.PositiveIntegerField(default=0, editable=False)
+    last_bid_at = models.DateTimeField(null=True, blank=True, editable=False)
+    second_highest_bid = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, editable=False)
+
+    objects = AuctionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order, also serves the active/completed range filters
+            models.Index(fields=['end_time', 'id'], name='auction_end_time_id_idx'),
+            # Keyset order of ?ordering=starting_soon/newest
+            models.Index(fields=['start_time', 'id'], name='auction_start_time_id_idx'),
+            # Only auctions still waiting to be closed; keeps the scheduler's scan small
+            models.Index(fields=['end_time'], name='auction_open_end_time_idx', condition=Q(closed_at__isnull=True)),
+        ]
 
     def __str__(self):
         return f"{self.vehicle} - Auction"
 
+class AuctionSettlement(models.Model):
+    """Outcome of a closed auction. winner/winning_bid are empty when nobody bid."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    auction = models.OneToOneField(Auction, on_delete=models.CASCADE, related_name='settlement')
+    winner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='won_auctions')
+    winning_bid = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    settled_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Settlement of {self.auction_id}"
+
+class ProxyBid(models.Model):
+    """A bidder's standing maximum on an auction; auction.proxy bids on their behalf up to it."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name='proxy_bids')
+    bidder = models.ForeignKey(User, on_delete=models.CASCADE, related_name='proxy_bids')
+    max_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['auction', 'bidder'], name='proxy_bid_auction_bidder_uniq'),
+        ]
+        indexes = [
+            # Strongest proxies of one auction, earliest first on ties
+            models.Index(fields=['auction', '-max_amount', 'created_at'], name='proxy_bid_auction_max_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.bidder} up to {self.max_amount} on {self.auction}"
+
 class Bid(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name='bids')
@@ -45,6 +214,22 @@ class Bid(models.Model):
     bid_amount = models.DecimalField(max_digits=12, decimal_places=2)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order
+            models.Index(fields=['timestamp', 'id'], name='bid_timestamp_id_idx'),
+            # Bid ladder of one auction by amount or by time; the latter is
+            # also the keyset order of the per-auction bid feed
+            models.Index(fields=['auction', '-bid_amount'], name='bid_auction_amount_idx'),
+            models.Index(fields=['auction', 'timestamp', 'id'], name='bid_auction_time_id_idx'),
+            # A user's latest bids
+            models.Index(fields=['bidder', 'timestamp'], name='bid_bidder_time_idx'),
+            # The auctions a user has bid on and their best bid on each (AuctionQuerySet.bid_on_by)
+            models.Index(fields=['bidder', 'auction', 'bid_amount'], name='bid_bidder_auction_idx'),
+            # Whether a bidder has bid on an auction before (unique_bidder_count)
+            models.Index(fields=['auction', 'bidder'], name='bid_auction_bidder_idx'),
+        ]
+
     def clean(self):
         if self.bid_amount <= self.auction.highest_bid:
             raise ValidationError("Bid must be higher than the current highest bid.")
@@ -53,11 +238,15 @@ class Bid(models.Model):
     
     def save(self, *args, **kwargs):
         self.full_clean()
-        if self.bid_amount > self.auction.highest_bid:
-            self.auction.highest_bid = self.bid_amount
-            self.auction.highest_bidder = self.bidder
-            self.auction.save(update_fields=['highest_bid', 'highest_bidder'])
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            if self.bid_amount > self.auction.highest_bid:
+                self.auction.highest_bid = self.bid_amount
+                self.auction.highest_bidder = self.bidder
+                self.auction.save(update_fields=['highest_bid', 'highest_bidder'])
+            super().save(*args, **kwargs)
+            if adding:
+                Auction.objects.filter(id=self.auction_id).record_bids([self])
 
     def __str__(self):
         return f"{self.bidder} - {self.bid_amount} on {self.auction}"
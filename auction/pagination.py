@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta, timezone
+import json
+import uuid
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _seek(ordering, values):
+    """
+    Rows strictly after ``values`` in ``ordering`` (fields with optional
+    ``-``), e.g. ('-year', 'id') gives year <= v0 AND (year < v0 OR id > v1).
+    The leading inclusive range is what the index seeks on; the rest only
+    sorts out the rows tied on it.
+    """
+    field, value = ordering[0], values[0]
+    name = field.lstrip('-')
+    after = 'lt' if field.startswith('-') else 'gt'
+    strictly_after = Q(**{f"{name}__{after}": value})
+    if len(ordering) == 1:
+        return strictly_after
+    return Q(**{f"{name}__{after}e": value}) & (strictly_after | _seek(ordering[1:], values[1:]))
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination: each page filters on the last key seen instead
+    of using OFFSET, so deep pages cost the same as the first one. Clients can
+    pick ``?page_size=`` up to ``max_page_size``.
+
+    Unlike DRF's CursorPagination, which seeks on the first ordering field
+    and steps over ties with an OFFSET (capped at ``offset_cutoff``), the
+    cursor holds every ordering field and the seek compares all of them.
+    Orderings therefore end in a unique field (``id``), and any number of
+    rows may share the leading key.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        self.position = None if self.cursor is None else self.cursor.position
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(_seek(ordering, self._position_values(queryset.model, self.position)))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering) if self.page else self.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering) if self.page else self.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        names = [field.lstrip('-') for field in ordering]
+        if isinstance(instance, dict):
+            return json.dumps([str(instance[name]) for name in names])
+        return json.dumps([str(getattr(instance, name)) for name in names])
+
+    def _position_values(self, model, position):
+        """The cursor's ordering values, converted by their model fields; NotFound if they don't fit."""
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            converted = []
+            for field, value in zip(self.ordering, values):
+                try:
+                    converted.append(model._meta.get_field(field.lstrip('-')).to_python(value))
+                except FieldDoesNotExist:
+                    # An annotation; the database compares the text
+                    converted.append(value)
+            return converted
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class VehiclePagination(KeysetPagination):
+    # Newest model years first; the id only breaks ties
+    ordering = ('-year', 'id')
+
+
+class AuctionPagination(KeysetPagination):
+    # ?ordering= picks one of these; the default lists auctions ending soonest first
+    orderings = {
+        'ending_soon': ('end_time', 'id'),
+        'starting_soon': ('start_time', 'id'),
+        'newest': ('-start_time', '-id'),
+    }
+    ordering = orderings['ending_soon']
+
+    def get_ordering(self, request, queryset, view):
+        return self.orderings.get(request.query_params.get('ordering'), self.ordering)
+
+
+class MyAuctionPagination(KeysetPagination):
+    # Latest-ending first, so running auctions come before finished ones
+    ordering = ('-end_time', '-id')
+
+
+class BidPagination(KeysetPagination):
+    # Newest first
+    ordering = ('-timestamp', '-id')
+
+
+def encode_since(bid):
+    """Opaque ``since`` token for a bid: microseconds since the epoch and the bid id."""
+    micros = (bid.timestamp - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}.{bid.id.hex}"
+
+
+def decode_since(token):
+    """(timestamp, bid id) from an ``encode_since`` token; ValidationError if malformed."""
+    try:
+        micros, bid_id = token.split('.')
+        return EPOCH + timedelta(microseconds=int(micros)), uuid.UUID(hex=bid_id)
+    except (ValueError, OverflowError):
+        raise ValidationError({"since": "Invalid cursor."})
+
+
+class BidFeedPagination(BidPagination):
+    """
+    One auction's bids, newest first. The first page carries ``latest``, a
+    token for its newest bid; passing it back as ``?since=`` limits the feed
+    to bids placed after that one, so refreshing a bid ladder reads only the
+    new rows. (Bid timestamps are taken after the auction row is claimed,
+    i.e. in commit order, so no bid can appear behind a token later.)
+    """
+    since_query_param = 'since'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.since = request.query_params.get(self.since_query_param) or None
+        if self.since is not None:
+            timestamp, bid_id = decode_since(self.since)
+            queryset = queryset.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=bid_id))
+        page = super().paginate_queryset(queryset, request, view)
+        if self.cursor is not None:
+            self.latest = None
+        else:
+            self.latest = encode_since(page[0]) if page else self.since
+        return page
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['latest'] = self.latest
+        return response
@@ -0,0 +1,95 @@
+"""
+Proxy (maximum) bidding.
+
+A bidder registers a maximum once (ProxyBid). Whenever the visible highest
+bid changes, ``apply_proxies`` lets the strongest proxy answer with the
+lowest bid that beats everyone else: one increment over the runner-up's
+maximum, never more than its own maximum. A bid war between proxies is
+therefore settled in one step, writing at most two visible bids (the
+runner-up's maximum and the winner's price) instead of one request per
+increment.
+"""
+from decimal import Decimal
+
+from django.db.models import Q
+
+from .models import Auction, Bid, ProxyBid
+
+# (prices below this, increment); the last entry applies to everything above
+INCREMENTS = [
+    (Decimal('1000'), Decimal('25')),
+    (Decimal('5000'), Decimal('50')),
+    (Decimal('10000'), Decimal('100')),
+    (Decimal('50000'), Decimal('250')),
+    (None, Decimal('500')),
+]
+
+
+def bid_increment(amount):
+    for limit, increment in INCREMENTS:
+        if limit is None or amount < limit:
+            return increment
+
+
+def resolve(highest_bid, leader_id, starting_price, proxies):
+    """
+    Work out the visible bids the proxies produce.
+
+    ``proxies`` are (bidder_id, max_amount) pairs, strongest first and
+    earliest first on ties. The current leader competes with the visible
+    highest bid (or their own proxy, if higher) and keeps the lead on ties.
+    Returns [(bidder_id, amount), ...] in the order they should be written;
+    empty when nothing changes.
+    """
+    capacity = {}
+    if leader_id is not None:
+        capacity[leader_id] = highest_bid
+    for bidder_id, max_amount in proxies:
+        capacity[bidder_id] = max(capacity.get(bidder_id, max_amount), max_amount)
+    if not capacity:
+        return []
+
+    # sorted() is stable, so ties keep the leader-then-earliest order built above
+    ranked = sorted(capacity, key=lambda bidder_id: -capacity[bidder_id])
+    winner = ranked[0]
+    price = starting_price
+    if len(ranked) > 1:
+        runner_up_max = capacity[ranked[1]]
+        price = max(price, min(capacity[winner], runner_up_max + bid_increment(runner_up_max)))
+    if price > capacity[winner]:
+        return []
+
+    bids = []
+    if len(ranked) > 1 and highest_bid < capacity[ranked[1]] < price:
+        bids.append((ranked[1], capacity[ranked[1]]))
+    if winner != leader_id or price > highest_bid:
+        bids.append((winner, price))
+    return bids
+
+
+def apply_proxies(auction_id, highest_bid, leader_id, starting_price=Decimal('0')):
+    """
+    Let the auction's proxies answer its current highest bid. Must run in the
+    transaction that holds the auction row (i.e. right after it was updated).
+    Returns (highest_bid, leader_id, written bids).
+    """
+    strongest = (
+        ProxyBid.objects.filter(auction_id=auction_id)
+        .filter(Q(max_amount__gt=highest_bid) | Q(bidder_id=leader_id))
+        .order_by('-max_amount', 'created_at')
+        .values_list('bidder_id', 'max_amount')[:2]
+    )
+    resolved = resolve(highest_bid, leader_id, starting_price, list(strongest))
+    if not resolved:
+        return highest_bid, leader_id, []
+
+    winner, price = resolved[-1]
+    claimed = Auction.objects.filter(id=auction_id, highest_bid=highest_bid).update(
+        highest_bid=price, highest_bidder_id=winner,
+    )
+    if not claimed:
+        return highest_bid, leader_id, []
+    bids = Bid.objects.bulk_create([
+        Bid(auction_id=auction_id, bidder_id=bidder_id, bid_amount=amount) for bidder_id, amount in resolved
+    ])
+    return price, winner, bids
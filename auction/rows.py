@@ -0,0 +1,213 @@
+"""
+Flat read path for the auction and vehicle lists.
+
+``AuctionSerializer`` nests the vehicle, image and user serializers, and
+DRF's per-field machinery (attribute lookup, to_representation, SkipField
+checks, nested serializer setup) dominates the cost of a large page. The
+``list`` actions instead fetch ``values()`` tuples and fill precompiled row
+templates: a template is a tuple of (key, column index, formatter) built
+once per request, so a row is one dict comprehension.
+
+The output is the same JSON, byte for byte, as the serializers, which stay
+in use for detail views, writes and the API schema. Set
+FLAT_LIST_SERIALIZATION = False to list through the serializers again.
+"""
+import re
+from abc import ABC, abstractmethod
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+from rest_framework.response import Response
+
+from car_auction.metrics import timed_serialization
+
+from .models import VehicleImage
+
+CENT = Decimal('0.01')
+
+# Storage names made of path segments that need no URL quoting and are not '.' or '..'
+PLAIN_NAME = re.compile(r'(?:[\w\-][\w\-.]*/)*[\w\-][\w\-.]*\Z', re.ASCII)
+
+# (output key, values() column, formatter); keys in serializer field order
+VEHICLE_FIELDS = (
+    ('id', 'id', 'uuid'),
+    ('make', 'make', None),
+    ('model', 'model', None),
+    ('year', 'year', None),
+    ('condition', 'condition', None),
+    ('max_price', 'max_price', 'decimal'),
+    ('available', 'available', None),
+)
+USER_FIELDS = (
+    ('id', 'highest_bidder_id', 'uuid'),
+    ('username', 'highest_bidder__username', None),
+    ('email', 'highest_bidder__email', None),
+    ('mobile', 'highest_bidder__mobile', None),
+    ('first_name', 'highest_bidder__first_name', None),
+    ('last_name', 'highest_bidder__last_name', None),
+)
+AUCTION_FIELDS = (
+    ('starting_price', 'starting_price', 'decimal'),
+    ('start_time', 'start_time', 'datetime'),
+    ('end_time', 'end_time', 'datetime'),
+    ('highest_bid', 'highest_bid', 'decimal'),
+)
+AUCTION_TRAILING_FIELDS = (
+    ('status', 'status', None),
+    ('closed_at', 'closed_at', 'datetime'),
+    ('bid_count', 'bid_count', None),
+    ('unique_bidder_count', 'unique_bidder_count', None),
+    ('last_bid_at', 'last_bid_at', 'datetime'),
+    ('second_highest_bid', 'second_highest_bid', 'decimal'),
+)
+
+
+def _same(value):
+    return value
+
+
+def _decimal(value):
+    # DecimalField(max_digits=12, decimal_places=2) with COERCE_DECIMAL_TO_STRING
+    if value is None:
+        return None
+    return '{:f}'.format(value.quantize(CENT))
+
+
+def _datetime_formatter():
+    # DateTimeField's ISO 8601 output in the active time zone, 'Z' for UTC
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def format_datetime(value):
+        if not value:
+            return None
+        if tz is not None:
+            value = value.astimezone(tz)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return format_datetime
+
+
+def _url_builder(request):
+    # ImageField and VehicleImageSerializer.get_variants: absolute when there is a request
+    url = default_storage.url
+    absolute = url if request is None else (lambda name: request.build_absolute_uri(url(name)))
+    if not isinstance(default_storage, FileSystemStorage):
+        return absolute
+    # For plain names the file system storage URL is base_url + name, and
+    # quoting and absolutising leave it unchanged, so do that part once
+    prefix = absolute('')
+
+    def build(name):
+        return prefix + name if PLAIN_NAME.match(name) else absolute(name)
+    return build
+
+
+def _compile(fields, columns, formatters):
+    index = {column: position for position, column in enumerate(columns)}
+    return tuple((key, index[column], formatters[kind]) for key, column, kind in fields)
+
+
+class FlatRows(ABC):
+    """Builds serializer-shaped dicts from ``values_list()`` rows of ``columns``."""
+    columns = ()
+
+    def values(self, queryset):
+        # The joins come from the column names; named rows, so the cursor
+        # paginator can read the ordering columns off them
+        return queryset.select_related(None).prefetch_related(None).values_list(*self.columns, named=True)
+
+    def formatters(self):
+        return {None: _same, 'uuid': str, 'decimal': _decimal, 'datetime': _datetime_formatter()}
+
+    def images(self, vehicle_ids, request):
+        """vehicle id -> serialized images, in the order the ``images`` prefetch returns them."""
+        images = {vehicle_id: [] for vehicle_id in vehicle_ids}
+        if not images:
+            return images
+        url = _url_builder(request)
+        rows = VehicleImage.objects.filter(vehicle_id__in=list(images)).values_list('vehicle_id', 'id', 'image', 'variants')
+        for vehicle_id, image_id, name, variants in rows:
+            images[vehicle_id].append({
+                'id': str(image_id),
+                'image': url(name) if name else None,
+                'variants': {size: url(path) for size, path in variants.items()},
+            })
+        return images
+
+    @abstractmethod
+    def render(self, rows, request):
+        """The serialized list for ``rows``, as the serializer would return it."""
+
+
+class VehicleRows(FlatRows):
+    columns = tuple(column for _, column, _ in VEHICLE_FIELDS)
+
+    def render(self, rows, request):
+        template = _compile(VEHICLE_FIELDS, self.columns, self.formatters())
+        images = self.images([row[0] for row in rows], request)
+        results = []
+        for row in rows:
+            data = {key: fmt(row[position]) for key, position, fmt in template}
+            data['images'] = images[row[0]]
+            results.append(data)
+        return results
+
+
+class AuctionRows(FlatRows):
+    vehicle_columns = tuple('vehicle_id' if column == 'id' else f'vehicle__{column}' for _, column, _ in VEHICLE_FIELDS)
+    columns = (
+        ('id',)
+        + tuple(column for _, column, _ in AUCTION_FIELDS + AUCTION_TRAILING_FIELDS + USER_FIELDS)
+        + vehicle_columns
+    )
+
+    def render(self, rows, request):
+        formatters = self.formatters()
+        auction = _compile(AUCTION_FIELDS, self.columns, formatters)
+        trailing = _compile(AUCTION_TRAILING_FIELDS, self.columns, formatters)
+        user = _compile(USER_FIELDS, self.columns, formatters)
+        vehicle = _compile(
+            tuple((key, column, kind) for (key, _, kind), column in zip(VEHICLE_FIELDS, self.vehicle_columns)),
+            self.columns, formatters,
+        )
+        bidder_id, vehicle_id = user[0][1], vehicle[0][1]
+        images = self.images([row[vehicle_id] for row in rows], request)
+
+        results = []
+        for row in rows:
+            data = {'id': str(row[0])}
+            details = {key: fmt(row[position]) for key, position, fmt in vehicle}
+            details['images'] = images[row[vehicle_id]]
+            data['vehicle_details'] = details
+            for key, position, fmt in auction:
+                data[key] = fmt(row[position])
+            if row[bidder_id] is None:
+                data['highest_bidder'] = None
+            else:
+                bidder = {key: fmt(row[position]) for key, position, fmt in user}
+                bidder['full_name'] = f"{bidder['first_name']} {bidder['last_name']}".strip()
+                data['highest_bidder'] = bidder
+            for key, position, fmt in trailing:
+                data[key] = fmt(row[position])
+            results.append(data)
+        return results
+
+
+class FlatListMixin:
+    """Viewset mixin serving ``list`` from ``flat_rows`` (a FlatRows) instead of the serializer."""
+    flat_rows = None
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'FLAT_LIST_SERIALIZATION', True):
+            return super().list(request, *args, **kwargs)
+        queryset = self.flat_rows.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        with timed_serialization():
+            data = self.flat_rows.render(list(queryset) if page is None else page, request)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
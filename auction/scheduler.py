@@ -0,0 +1,85 @@
+"""
+Auction close scheduler.
+
+Keeps a heap of (end_time, auction_id) for the open auctions ending within
+``horizon``, loaded from the partial index on open auctions' end_time, sleeps
+until the earliest one and closes everything due at that moment in batches
+(auction.closing). The heap is refilled every ``reload_interval`` so auctions
+created or rescheduled in the meantime are picked up; entries whose end_time
+has since changed are skipped when popped, and closing re-checks end_time in
+the database anyway.
+
+Run it with ``manage.py run_auction_scheduler``.
+"""
+import heapq
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.utils.timezone import now
+
+from .closing import close_auctions
+from .models import Auction
+
+logger = logging.getLogger(__name__)
+
+
+class CloseScheduler:
+    def __init__(self, horizon=timedelta(minutes=5), reload_interval=timedelta(seconds=30), batch_size=500):
+        self.horizon = horizon
+        self.reload_interval = reload_interval
+        self.batch_size = batch_size
+        self.heap = []
+        self.scheduled = {}   # auction id -> end_time of its live heap entry
+        self.next_reload = None
+
+    def reload(self, current_time):
+        due_by = current_time + self.horizon
+        rows = Auction.objects.filter(closed_at__isnull=True, end_time__lte=due_by).values_list('id', 'end_time')
+        for auction_id, end_time in rows.iterator(chunk_size=2000):
+            if self.scheduled.get(auction_id) != end_time:
+                self.scheduled[auction_id] = end_time
+                heapq.heappush(self.heap, (end_time, auction_id))
+        self.next_reload = current_time + self.reload_interval
+
+    def pop_due(self, current_time):
+        due = []
+        while self.heap and self.heap[0][0] <= current_time:
+            end_time, auction_id = heapq.heappop(self.heap)
+            if self.scheduled.get(auction_id) == end_time:
+                del self.scheduled[auction_id]
+                due.append(auction_id)
+        return due
+
+    def run_once(self, current_time=None):
+        """Reload if it is time to, then close whatever is due. Returns how many auctions were closed."""
+        current_time = current_time or now()
+        if self.next_reload is None or current_time >= self.next_reload:
+            self.reload(current_time)
+        due = self.pop_due(current_time)
+        closed = 0
+        for start in range(0, len(due), self.batch_size):
+            closed += len(close_auctions(due[start:start + self.batch_size], current_time))
+        return closed
+
+    def seconds_until_next(self, current_time):
+        wake_at = self.next_reload
+        if self.heap and self.heap[0][0] < wake_at:
+            wake_at = self.heap[0][0]
+        return max((wake_at - current_time).total_seconds(), 0)
+
+    def run(self, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                closed = self.run_once()
+            except Exception:
+                logger.exception("Auction close pass failed")
+                self.next_reload = None
+                stop.wait(1)
+                continue
+            if closed:
+                logger.info("Closed %s auction(s)", closed)
+            stop.wait(self.seconds_until_next(now()))
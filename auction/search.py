@@ -0,0 +1,210 @@
+"""
+Full-text vehicle search over the SQLite FTS5 index built by migration 0009.
+
+``auction_vehicle_fts`` indexes make/model/condition and
+``auction_vehicle_search_doc`` carries each vehicle's filter and facet
+columns under the same integer key; triggers on auction_vehicle keep both in
+sync. A search never scans the vehicle table: the MATCH walks the index and
+only the matches are read, by integer key, for the year/price filters.
+Facet counts (make, year bucket, condition) for the whole result set come
+from a single GROUP BY over those matches, folded into the three facets in
+Python. Cost therefore follows the number of matches, not the inventory
+size. The ``available`` filter reads the matched vehicles by primary key,
+since availability changes when auctions close and isn't copied to the doc.
+
+SQLite drops triggers along with their table, and Django rebuilds
+auction_vehicle for many schema changes, so ``restore_triggers`` runs after
+every migrate (see auction.apps) and recreates them, reindexing the vehicles
+if any were missing.
+
+The index only exists on SQLite (see the migration). Other backends get the
+same filters and facets from the ORM, with every word matched by
+``icontains`` and results in the vehicle list's order instead of by rank.
+"""
+import re
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Count, Q
+
+from .models import Vehicle
+
+YEAR_BUCKET = 5
+
+_MATCHES = """
+    FROM auction_vehicle_fts
+    JOIN auction_vehicle_search_doc doc ON doc.id = auction_vehicle_fts.rowid{join}
+    WHERE auction_vehicle_fts MATCH %s{filters}
+"""
+_VEHICLE_JOIN = "\n    JOIN auction_vehicle vehicle ON vehicle.id = doc.vehicle_id"
+
+# The triggers of migration 0009
+TRIGGERS = {
+    'auction_vehicle_search_insert': """
+        CREATE TRIGGER auction_vehicle_search_insert AFTER INSERT ON auction_vehicle BEGIN
+            INSERT INTO auction_vehicle_search_doc (vehicle_id, make, year, condition, max_price)
+                VALUES (new.id, new.make, new.year, new.condition, new.max_price);
+            INSERT INTO auction_vehicle_fts (rowid, make, model, condition)
+                VALUES (last_insert_rowid(), new.make, new.model, new.condition);
+        END
+    """,
+    'auction_vehicle_search_update': """
+        CREATE TRIGGER auction_vehicle_search_update
+        AFTER UPDATE OF make, model, year, condition, max_price ON auction_vehicle BEGIN
+            UPDATE auction_vehicle_search_doc
+                SET make = new.make, year = new.year, condition = new.condition, max_price = new.max_price
+                WHERE vehicle_id = old.id;
+            UPDATE auction_vehicle_fts SET make = new.make, model = new.model, condition = new.condition
+                WHERE rowid = (SELECT id FROM auction_vehicle_search_doc WHERE vehicle_id = old.id);
+        END
+    """,
+    'auction_vehicle_search_delete': """
+        CREATE TRIGGER auction_vehicle_search_delete AFTER DELETE ON auction_vehicle BEGIN
+            DELETE FROM auction_vehicle_fts
+                WHERE rowid = (SELECT id FROM auction_vehicle_search_doc WHERE vehicle_id = old.id);
+            DELETE FROM auction_vehicle_search_doc WHERE vehicle_id = old.id;
+        END
+    """,
+}
+
+_REINDEX = [
+    "DELETE FROM auction_vehicle_fts",
+    "DELETE FROM auction_vehicle_search_doc",
+    """
+    INSERT INTO auction_vehicle_search_doc (vehicle_id, make, year, condition, max_price)
+        SELECT id, make, year, condition, max_price FROM auction_vehicle
+    """,
+    """
+    INSERT INTO auction_vehicle_fts (rowid, make, model, condition)
+        SELECT doc.id, vehicle.make, vehicle.model, vehicle.condition
+        FROM auction_vehicle_search_doc doc JOIN auction_vehicle vehicle ON vehicle.id = doc.vehicle_id
+    """,
+]
+
+
+def restore_triggers(using):
+    """
+    Recreate whichever index triggers are missing on ``using`` and, if any
+    were, rebuild the index from auction_vehicle, since writes made without
+    them never reached it. Returns the names of the recreated triggers.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return []
+    with connection.cursor() as cursor:
+        if 'auction_vehicle_search_doc' not in connection.introspection.table_names(cursor):
+            return []
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'auction_vehicle'")
+        present = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in TRIGGERS if name not in present]
+        if missing:
+            with transaction.atomic(using=using):
+                for name in missing:
+                    cursor.execute(TRIGGERS[name])
+                for statement in _REINDEX:
+                    cursor.execute(statement)
+    return missing
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix
+    (``toy cam`` finds Toyota Camry). Returns None when there are no words.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _filters(year_min, year_max, price_min, price_max, make, condition, available):
+    clauses, params = [], []
+    for clause, value in (
+        ('doc.year >= %s', year_min),
+        ('doc.year <= %s', year_max),
+        ('doc.max_price >= %s', price_min),
+        ('doc.max_price <= %s', price_max),
+        ('doc.make = %s COLLATE NOCASE', make),
+        ('doc.condition = %s COLLATE NOCASE', condition),
+        ('vehicle.available = %s', available),
+    ):
+        if value is not None:
+            clauses.append(f" AND {clause}")
+            params.append(str(value) if isinstance(value, Decimal) else value)
+    return ''.join(clauses), params
+
+
+def _fts_search(connection, expression, limit, offset, filters):
+    """(ids, (make, year bucket, condition, count) groups) from the FTS5 index."""
+    clauses, params = _filters(**filters)
+    join = _VEHICLE_JOIN if filters['available'] is not None else ''
+    matches = _MATCHES.format(join=join, filters=clauses)
+    params = [expression] + params
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT doc.vehicle_id {matches} ORDER BY auction_vehicle_fts.rank LIMIT %s OFFSET %s",
+            params + [limit, offset],
+        )
+        ids = [Vehicle._meta.pk.to_python(row[0]) for row in cursor.fetchall()]
+        cursor.execute(
+            f"SELECT doc.make, (doc.year / {YEAR_BUCKET}) * {YEAR_BUCKET}, doc.condition, COUNT(*) "
+            f"{matches} GROUP BY 1, 2, 3",
+            params,
+        )
+        return ids, cursor.fetchall()
+
+
+def _orm_search(using, text, limit, offset, filters):
+    """The same as _fts_search through the ORM, for backends without the index."""
+    matches = Vehicle.objects.using(using)
+    for word in re.findall(r'\w+', text):
+        matches = matches.filter(Q(make__icontains=word) | Q(model__icontains=word) | Q(condition__icontains=word))
+    for lookup, value in (
+        ('year__gte', filters['year_min']),
+        ('year__lte', filters['year_max']),
+        ('max_price__gte', filters['price_min']),
+        ('max_price__lte', filters['price_max']),
+        ('make__iexact', filters['make']),
+        ('condition__iexact', filters['condition']),
+        ('available', filters['available']),
+    ):
+        if value is not None:
+            matches = matches.filter(**{lookup: value})
+    ids = list(matches.order_by('-year', 'id').values_list('id', flat=True)[offset:offset + limit])
+    groups = matches.order_by().values_list('make', 'year', 'condition').annotate(count=Count('id'))
+    return ids, [(make, year // YEAR_BUCKET * YEAR_BUCKET, condition, count) for make, year, condition, count in groups]
+
+
+def _facet(counts):
+    return [{"value": value, "count": count} for value, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))]
+
+
+def search_vehicles(text, limit=20, offset=0, year_min=None, year_max=None,
+                    price_min=None, price_max=None, make=None, condition=None, available=None):
+    """
+    Vehicles matching ``text`` and the filters, best match first. Returns
+    (vehicle ids for the requested slice, total count, facets).
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return [], 0, {"make": [], "year": [], "condition": []}
+    filters = {
+        'year_min': year_min, 'year_max': year_max, 'price_min': price_min, 'price_max': price_max,
+        'make': make, 'condition': condition, 'available': available,
+    }
+
+    using = router.db_for_read(Vehicle)
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        ids, groups = _fts_search(connection, expression, limit, offset, filters)
+    else:
+        ids, groups = _orm_search(using, text, limit, offset, filters)
+
+    makes, years, conditions = {}, {}, {}
+    for make_value, bucket, condition_value, count in groups:
+        makes[make_value] = makes.get(make_value, 0) + count
+        label = f"{bucket}-{bucket + YEAR_BUCKET - 1}"
+        years[label] = years.get(label, 0) + count
+        conditions[condition_value] = conditions.get(condition_value, 0) + count
+    facets = {"make": _facet(makes), "year": _facet(years), "condition": _facet(conditions)}
+    return ids, sum(makes.values()), facets
@@ -0,0 +1,171 @@
+import logging
+import queue
+import threading
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.db import connection, transaction, OperationalError
+from django.utils.timezone import now
+from rest_framework import status
+
+from .bidding import BidRejected, to_amount
+from .models import Auction, Bid
+from .proxy import apply_proxies
+
+logger = logging.getLogger(__name__)
+
+
+class BidSequencer:
+    """
+    In-process, single-writer-per-auction bid queue with group commit.
+
+    Every auction that receives bids gets its own queue and one writer thread.
+    The writer drains whatever has queued up, resolves the batch in memory in
+    arrival order, then commits all accepted Bid rows and one Auction update in
+    a single transaction. Callers block on a Future and still get their own
+    accept/reject answer. Writers exit after ``idle_timeout`` seconds without
+    traffic, so only hot auctions hold a thread.
+    """
+
+    def __init__(self, max_batch=256, idle_timeout=5.0, max_retries=5):
+        self.max_batch = max_batch
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._queues = {}
+
+    def enqueue(self, auction_id, bidder, bid_amount):
+        """Queue a bid and return a Future resolving to the Bid or raising BidRejected."""
+        amount = to_amount(bid_amount)
+        try:
+            auction_id = uuid.UUID(str(auction_id))
+        except ValueError:
+            raise BidRejected("Auction not found.", status.HTTP_404_NOT_FOUND)
+
+        future = Future()
+        with self._lock:
+            pending = self._queues.get(auction_id)
+            if pending is None:
+                pending = self._queues[auction_id] = queue.SimpleQueue()
+                threading.Thread(
+                    target=self._writer, args=(auction_id, pending),
+                    name=f"bid-writer-{auction_id}", daemon=True,
+                ).start()
+            pending.put((bidder, amount, future))
+        return future
+
+    def submit(self, auction_id, bidder, bid_amount, timeout=None):
+        if timeout is None:
+            timeout = getattr(settings, 'BID_SEQUENCER_TIMEOUT', 10)
+        future = self.enqueue(auction_id, bidder, bid_amount)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            raise BidRejected("The auction is busy, please try again.", status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def _writer(self, auction_id, pending):
+        state = None
+        try:
+            while True:
+                try:
+                    batch = [pending.get(timeout=self.idle_timeout)]
+                except queue.Empty:
+                    # Producers enqueue under the same lock, so nothing can slip in
+                    # between this check and the queue being dropped.
+                    with self._lock:
+                        if pending.empty():
+                            del self._queues[auction_id]
+                            return
+                    continue
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(pending.get_nowait())
+                    except queue.Empty:
+                        break
+                state = self._commit(auction_id, batch, state)
+        finally:
+            connection.close()
+
+    def _commit(self, auction_id, batch, state):
+        try:
+            outcomes, state = self._apply(auction_id, batch, state)
+        except OperationalError:
+            logger.exception("Bid batch for auction %s failed", auction_id)
+            outcomes = [BidRejected("The auction is busy, please try again.", status.HTTP_503_SERVICE_UNAVAILABLE)] * len(batch)
+            state = None
+        except Exception as exc:
+            logger.exception("Bid batch for auction %s failed", auction_id)
+            outcomes = [exc] * len(batch)
+            state = None
+
+        for (_, _, future), outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+        return state
+
+    def _apply(self, auction_id, batch, state):
+        for _ in range(self.max_retries):
+            fresh = state is None
+            if fresh:
+                state = Auction.objects.filter(id=auction_id).values(
+                    'highest_bid', 'start_time', 'end_time', 'closed_at', 'starting_price',
+                ).first()
+                if state is None:
+                    return [BidRejected("Auction not found.", status.HTTP_404_NOT_FOUND)] * len(batch), None
+
+            current_time = now()
+            ended = state['closed_at'] is not None or state['end_time'] <= current_time
+            not_started = state['start_time'] > current_time
+            if (ended or not_started) and not fresh:
+                # The schedule can be moved (and a close undone) outside this
+                # writer, so only the stored row may turn the batch away.
+                state = None
+                continue
+            highest = state['highest_bid']
+            winner = None
+            accepted = []
+            outcomes = []
+            for bidder, amount, _ in batch:
+                if ended:
+                    outcomes.append(BidRejected("This auction has ended."))
+                elif not_started:
+                    outcomes.append(BidRejected("This auction has not started yet."))
+                elif amount < state['starting_price']:
+                    outcomes.append(BidRejected("Your bid must be higher than the starting price."))
+                elif amount <= highest:
+                    outcomes.append(BidRejected("Your bid must be higher than the current highest bid."))
+                else:
+                    bid = Bid(auction_id=auction_id, bidder=bidder, bid_amount=amount)
+                    accepted.append(bid)
+                    outcomes.append(bid)
+                    highest, winner = amount, bidder
+
+            if not accepted:
+                # highest_bid only ever grows, so a stale cached value never
+                # rejects a bid that would have beaten the stored one.
+                return outcomes, state
+
+            with transaction.atomic():
+                # Writing first takes SQLite's write lock up front instead of
+                # upgrading a read lock, which would fail immediately under contention.
+                claimed = Auction.objects.filter(
+                    id=auction_id, highest_bid=state['highest_bid'], start_time__lte=current_time,
+                    end_time__gt=current_time, closed_at__isnull=True,
+                ).update(highest_bid=highest, highest_bidder=winner)
+                if claimed:
+                    Bid.objects.bulk_create(accepted)
+                    highest, _, proxy_bids = apply_proxies(auction_id, highest, winner.pk)
+                    Auction.objects.filter(id=auction_id).record_bids(accepted + proxy_bids)
+            if claimed:
+                return outcomes, dict(state, highest_bid=highest)
+            # Someone outside this writer (admin, another process) changed the
+            # auction; reload and resolve the batch again.
+            state = None
+
+        return [BidRejected("The auction is busy, please try again.", status.HTTP_503_SERVICE_UNAVAILABLE)] * len(batch), None
+
+
+sequencer = BidSequencer()
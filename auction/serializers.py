@@ -2,23 +2,36 @@ from rest_framework import serializers
 from .models import Vehicle, VehicleImage, Auction, Bid
 from users.serializers import UserSerializer  
 from django.utils.timezone import now  
+from django.core.files.storage import default_storage
+from car_auction.metrics import TimedSerializerMixin, TimedListSerializer
 
 class VehicleImageSerializer(serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True)
+    variants = serializers.SerializerMethodField(read_only=True)
     class Meta:
         model = VehicleImage
-        fields = ['id', 'image']
-        read_only_fields = ['id']  
+        fields = ['id', 'image', 'variants']
+        read_only_fields = ['id', 'variants']
 
-class VehicleSerializer(serializers.ModelSerializer):
+    def get_variants(self, obj):
+        # {"thumbnail": url, "card": url, "full": url} once generated, {} until then
+        request = self.context.get('request')
+        urls = {}
+        for name, path in obj.variants.items():
+            url = default_storage.url(path)
+            urls[name] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+class VehicleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True)
     images = VehicleImageSerializer(many=True, read_only=True)
     class Meta:
         model = Vehicle
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'make', 'model', 'year', 'condition', 'max_price', 'available', 'images']
         read_only_fields = ['id']  # Vehicle ID is read-only
 
-class AuctionSerializer(serializers.ModelSerializer):
+class AuctionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True)
     # Accept vehicle UUID on write, show nested vehicle on read
     vehicle = serializers.PrimaryKeyRelatedField(queryset=Vehicle.objects.all(), write_only=True)
@@ -28,19 +41,35 @@ class AuctionSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Auction
-        fields = ['id', 'vehicle', 'vehicle_details', 'starting_price', 'start_time', 'end_time', 'highest_bid', 'highest_bidder', 'status']
-        read_only_fields = ['id', 'highest_bid', 'highest_bidder', 'status']  # Auction ID, bid info, and status are read-only
+        list_serializer_class = TimedListSerializer
+        fields = [
+            'id', 'vehicle', 'vehicle_details', 'starting_price', 'start_time', 'end_time', 'highest_bid', 'highest_bidder',
+            'status', 'closed_at', 'bid_count', 'unique_bidder_count', 'last_bid_at', 'second_highest_bid',
+        ]
+        read_only_fields = [
+            'id', 'highest_bid', 'highest_bidder', 'status', 'closed_at',
+            'bid_count', 'unique_bidder_count', 'last_bid_at', 'second_highest_bid',
+        ]  # Auction ID, bid info, and status are read-only
 
     def get_status(self, obj):
-        if obj.end_time < now():
+        # Annotated by AuctionQuerySet.with_status() on the viewset queryset
+        status = getattr(obj, 'status', None)
+        if status is not None:
+            return status
+        if obj.closed_at is not None:
+            return "completed"
+        current_time = now()
+        if obj.start_time > current_time:
+            return "upcoming"
+        if obj.end_time <= current_time:
             return "completed"
-        else:
-            return "active"
+        return "active"
 
-class BidSerializer(serializers.ModelSerializer):
+class BidSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True)
     class Meta:
         model = Bid
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'auction', 'bid_amount']
         read_only_fields = ['id']  # Bid ID is read-only
 
@@ -49,9 +78,9 @@ class BidSerializer(serializers.ModelSerializer):
         auction = data.get('auction')
         bid_amount = data.get('bid_amount')
         if auction and bid_amount is not None:
-            if float(bid_amount) <= float(auction.highest_bid):
+            if bid_amount <= auction.highest_bid:
                 raise serializers.ValidationError({"bid_amount": "Bid must be higher than the current highest bid."})
-            if float(bid_amount) < float(auction.starting_price):
+            if bid_amount < auction.starting_price:
                 raise serializers.ValidationError({"bid_amount": "Bid must be at least the starting price."})
         return data
 
@@ -59,3 +88,51 @@ class BidSerializer(serializers.ModelSerializer):
         if value <= 0:
             raise serializers.ValidationError("Bid amount must be positive.")
         return value
+
+class AuctionBidSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """A bid as listed in its auction's bid feed."""
+    id = serializers.UUIDField(read_only=True)
+    class Meta:
+        model = Bid
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'bidder', 'bid_amount', 'timestamp']
+        read_only_fields = fields
+
+class VehicleSearchSerializer(serializers.Serializer):
+    """Query parameters of the vehicle search endpoint."""
+    q = serializers.CharField(max_length=200)
+    year_min = serializers.IntegerField(required=False)
+    year_max = serializers.IntegerField(required=False)
+    price_min = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    price_max = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+    make = serializers.CharField(max_length=100, required=False)
+    condition = serializers.CharField(max_length=50, required=False)
+    available = serializers.BooleanField(required=False, allow_null=True, default=None)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    offset = serializers.IntegerField(min_value=0, max_value=10000, default=0)
+
+class VehicleSummarySerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(read_only=True)
+    class Meta:
+        model = Vehicle
+        fields = ['id', 'make', 'model', 'year']
+        read_only_fields = fields
+
+class MyAuctionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """An auction on the bidder dashboard, as annotated by AuctionQuerySet.bid_on_by()."""
+    id = serializers.UUIDField(read_only=True)
+    vehicle = VehicleSummarySerializer(read_only=True)
+    my_best_bid = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    my_bid_count = serializers.IntegerField(read_only=True)
+    my_last_bid_at = serializers.DateTimeField(read_only=True)
+    rank = serializers.IntegerField(read_only=True)
+    status = serializers.CharField(source='standing', read_only=True)
+
+    class Meta:
+        model = Auction
+        list_serializer_class = TimedListSerializer
+        fields = [
+            'id', 'vehicle', 'end_time', 'closed_at', 'highest_bid', 'bid_count', 'unique_bidder_count',
+            'my_best_bid', 'my_bid_count', 'my_last_bid_at', 'rank', 'status',
+        ]
+        read_only_fields = fields
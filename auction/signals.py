@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_vehicle, invalidate_auction
+from .images import schedule_variants
+from .search import restore_triggers
+from .models import Vehicle, VehicleImage, Auction
+
+
+@receiver([post_save, post_delete], sender=Vehicle)
+def vehicle_changed(sender, instance, **kwargs):
+    invalidate_vehicle(instance.id)
+
+
+@receiver([post_save, post_delete], sender=VehicleImage)
+def vehicle_image_changed(sender, instance, **kwargs):
+    invalidate_vehicle(instance.vehicle_id)
+
+
+@receiver([post_save, post_delete], sender=Auction)
+def auction_changed(sender, instance, **kwargs):
+    invalidate_auction(instance.id)
+
+
+@receiver(post_save, sender=VehicleImage)
+def vehicle_image_uploaded(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: schedule_variants(instance))
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    """Connected to post_migrate in auction.apps: a table rebuild drops the search triggers."""
+    restore_triggers(using)
@@ -1,9 +1,44 @@
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Vehicle
+from django.contrib.auth import get_user_model
+from django.utils.http import http_date
+from django.utils.timezone import now
+from datetime import timedelta
+from decimal import Decimal
+from .models import Vehicle, VehicleImage, Auction, AuctionSettlement, Bid, ProxyBid
+from .bidding import BidRejected, place_bid, set_max_bid, submit_bid
+from .live import live_application
+from .sequencer import BidSequencer
+from .pagination import BidFeedPagination, BidPagination
+from .cache import _generation_key, cache_stats, reset_cache_stats
+from .closing import close_auctions, close_due_auctions
+from .scheduler import CloseScheduler
+from .throttling import BidRateLimiter, bid_limiter
+from .proxy import resolve
+from .search import TRIGGERS, restore_triggers
+from car_auction.db_router import PrimaryReplicaRouter, replica_reads, use_replica
+from car_auction.metrics import registry
+from PIL import Image as PILImage
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
 import uuid
+import zipfile
+from unittest import mock
+
+User = get_user_model()
 
 class VehicleModelTestCase(TestCase):
     def setUp(self):
@@ -30,3 +65,1214 @@ class VehicleAPITestCase(TestCase):
         url = reverse('vehicle-detail', kwargs={'id': str(self.vehicle.id)})
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class PlaceBidAPITestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='bidder', email='bidder@example.com', password='testpass123', mobile='5550000001'
+        )
+        self.client.force_authenticate(self.user)
+        vehicle = Vehicle.objects.create(
+            make='Ford', model='Focus', year=2019, condition='Used', max_price=12000.00
+        )
+        self.auction = Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1),
+            end_time=now() + timedelta(hours=1)
+        )
+        self.url = reverse('place-bid')
+
+    def test_accepted_bid_claims_auction(self):
+        response = self.client.post(self.url, {'auction': str(self.auction.id), 'bid_amount': '1500.00'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.highest_bid, Decimal('1500.00'))
+        self.assertEqual(self.auction.highest_bidder, self.user)
+        self.assertEqual(Bid.objects.filter(auction=self.auction).count(), 1)
+
+    def test_bid_not_above_highest_is_rejected(self):
+        Auction.objects.filter(id=self.auction.id).update(highest_bid=2000)
+        response = self.client.post(self.url, {'auction': str(self.auction.id), 'bid_amount': '2000.00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Bid.objects.exists())
+
+    def test_bid_on_ended_auction_is_rejected(self):
+        Auction.objects.filter(id=self.auction.id).update(end_time=now() - timedelta(minutes=1))
+        response = self.client.post(self.url, {'auction': str(self.auction.id), 'bid_amount': '5000'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "This auction has ended.")
+
+    def test_bid_before_start_is_rejected(self):
+        Auction.objects.filter(id=self.auction.id).update(start_time=now() + timedelta(minutes=5))
+        response = self.client.post(self.url, {'auction': str(self.auction.id), 'bid_amount': '5000'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], "This auction has not started yet.")
+        with self.assertRaisesMessage(BidRejected, "This auction has not started yet."):
+            set_max_bid(self.auction.id, self.user, '5000')
+        self.auction.refresh_from_db()
+        self.assertIsNone(self.auction.highest_bidder)
+        self.assertFalse(Bid.objects.exists())
+        self.assertFalse(ProxyBid.objects.exists())
+
+    def test_unknown_auction(self):
+        response = self.client.post(self.url, {'auction': str(uuid.uuid4()), 'bid_amount': '5000'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class BidSequencerTestCase(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='seq', email='seq@example.com', password='testpass123', mobile='5550000002'
+        )
+        vehicle = Vehicle.objects.create(
+            make='Kia', model='Rio', year=2018, condition='Used', max_price=9000.00
+        )
+        self.auction = Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1),
+            end_time=now() + timedelta(hours=1)
+        )
+        self.sequencer = BidSequencer(idle_timeout=0.1)
+
+    def test_each_caller_gets_its_own_outcome(self):
+        futures = [
+            self.sequencer.enqueue(self.auction.id, self.user, amount)
+            for amount in ('1500', '1400', '1600', '900')
+        ]
+        self.assertIsInstance(futures[0].result(timeout=5), Bid)
+        self.assertRaises(BidRejected, futures[1].result, timeout=5)
+        self.assertIsInstance(futures[2].result(timeout=5), Bid)
+        self.assertRaises(BidRejected, futures[3].result, timeout=5)
+
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.highest_bid, Decimal('1600.00'))
+        self.assertEqual(Bid.objects.filter(auction=self.auction).count(), 2)
+        self.assertEqual(
+            (self.auction.bid_count, self.auction.unique_bidder_count, self.auction.second_highest_bid),
+            (2, 1, Decimal('1500.00')),
+        )
+
+    def test_schedule_changes_reach_a_running_writer(self):
+        sequencer = BidSequencer(idle_timeout=2)
+        self.assertIsInstance(sequencer.submit(self.auction.id, self.user, '1500', timeout=5), Bid)
+
+        Auction.objects.filter(id=self.auction.id).update(end_time=now() - timedelta(minutes=1))
+        with self.assertRaisesMessage(BidRejected, "This auction has ended."):
+            sequencer.submit(self.auction.id, self.user, '1600', timeout=5)
+        # Extended again: the writer's cached end_time must not reject the bid
+        Auction.objects.filter(id=self.auction.id).update(end_time=now() + timedelta(hours=1))
+        self.assertIsInstance(sequencer.submit(self.auction.id, self.user, '1700', timeout=5), Bid)
+
+        Auction.objects.filter(id=self.auction.id).update(start_time=now() + timedelta(minutes=5))
+        with self.assertRaisesMessage(BidRejected, "This auction has not started yet."):
+            sequencer.submit(self.auction.id, self.user, '1800', timeout=5)
+        Auction.objects.filter(id=self.auction.id).update(start_time=now() - timedelta(minutes=5))
+        self.assertIsInstance(sequencer.submit(self.auction.id, self.user, '1900', timeout=5), Bid)
+
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.highest_bid, Decimal('1900.00'))
+        self.assertEqual(Bid.objects.filter(auction=self.auction).count(), 3)
+
+    def test_unknown_auction(self):
+        with self.assertRaises(BidRejected) as ctx:
+            self.sequencer.submit(uuid.uuid4(), self.user, '1500', timeout=5)
+        self.assertEqual(ctx.exception.status_code, status.HTTP_404_NOT_FOUND)
+
+class LiveAuctionStreamTestCase(TestCase):
+    def setUp(self):
+        vehicle = Vehicle.objects.create(
+            make='Mazda', model='3', year=2020, condition='Used', max_price=14000.00
+        )
+        self.auction = Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1),
+            end_time=now() + timedelta(hours=1)
+        )
+        self.user = User.objects.create_user(
+            username='watcher', email='watcher@example.com', password='testpass123', mobile='5550000003'
+        )
+
+    async def test_sse_stream_pushes_accepted_bids(self):
+        app = live_application(django_application=None)
+        received = asyncio.Queue()
+        incoming = asyncio.Queue()
+        scope = {'type': 'http', 'method': 'GET', 'path': f'/api/auction/auctions/{self.auction.id}/live/'}
+        task = asyncio.ensure_future(app(scope, incoming.get, received.put))
+
+        start = await asyncio.wait_for(received.get(), 5)
+        self.assertEqual(start['status'], 200)
+        snapshot = (await asyncio.wait_for(received.get(), 5))['body'].decode()
+        self.assertTrue(snapshot.startswith('event: snapshot\n'))
+
+        def bid():
+            with self.captureOnCommitCallbacks(execute=True):
+                submit_bid(self.auction.id, self.user, '1500')
+        await sync_to_async(bid)()
+
+        event = (await asyncio.wait_for(received.get(), 5))['body'].decode()
+        self.assertTrue(event.startswith('event: bid\n'))
+        payload = json.loads(event.split('data: ', 1)[1])
+        self.assertEqual(payload['highest_bid'], '1500.00')
+        self.assertEqual(payload['highest_bidder']['username'], 'watcher')
+
+        await incoming.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 5)
+
+    async def test_unknown_auction_is_404(self):
+        app = live_application(django_application=None)
+        received = asyncio.Queue()
+        scope = {'type': 'http', 'method': 'GET', 'path': f'/api/auction/auctions/{uuid.uuid4()}/live/'}
+        await app(scope, asyncio.Queue().get, received.put)
+        self.assertEqual((await received.get())['status'], 404)
+
+    @override_settings(CORS_ALLOWED_ORIGINS=['https://app.example.com'])
+    async def test_sse_answers_allowed_origins(self):
+        app = live_application(django_application=None)
+        path = f'/api/auction/auctions/{self.auction.id}/live/'
+        for origin, allowed in (('https://app.example.com', [b'https://app.example.com']), ('https://evil.example.com', [])):
+            received, incoming = asyncio.Queue(), asyncio.Queue()
+            scope = {'type': 'http', 'method': 'GET', 'path': path, 'headers': [(b'origin', origin.encode())]}
+            task = asyncio.ensure_future(app(scope, incoming.get, received.put))
+            start = await asyncio.wait_for(received.get(), 5)
+            headers = [value for name, value in start['headers'] if name == b'access-control-allow-origin']
+            self.assertEqual(headers, allowed)
+            await incoming.put({'type': 'http.disconnect'})
+            await asyncio.wait_for(task, 5)
+
+    @override_settings(CORS_ALLOWED_ORIGINS=['https://app.example.com'])
+    async def test_websocket_refuses_foreign_origins(self):
+        app = live_application(django_application=None)
+        path = f'/api/auction/auctions/{self.auction.id}/live/'
+        received, incoming = asyncio.Queue(), asyncio.Queue()
+        await incoming.put({'type': 'websocket.connect'})
+        scope = {'type': 'websocket', 'path': path, 'headers': [(b'host', b'api.example.com'), (b'origin', b'https://evil.example.com')]}
+        await asyncio.wait_for(app(scope, incoming.get, received.put), 5)
+        self.assertEqual(await received.get(), {'type': 'websocket.close', 'code': 4403})
+
+        # Same-origin pages are let in without being listed
+        received, incoming = asyncio.Queue(), asyncio.Queue()
+        await incoming.put({'type': 'websocket.connect'})
+        scope['headers'] = [(b'host', b'api.example.com'), (b'origin', b'https://api.example.com')]
+        task = asyncio.ensure_future(app(scope, incoming.get, received.put))
+        self.assertEqual((await asyncio.wait_for(received.get(), 5))['type'], 'websocket.accept')
+        await incoming.put({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(task, 5)
+
+class StaticFilesTestCase(TestCase):
+    def test_admin_and_docs_assets_are_served(self):
+        # The ASGI server has no static view of its own; WhiteNoise serves STATIC_ROOT
+        for path in ('/static/admin/css/base.css', '/static/drf-yasg/style.css'):
+            self.assertEqual(self.client.get(path).status_code, status.HTTP_200_OK, path)
+
+class QueryBudgetTestCase(TestCase):
+    """List/retrieve endpoints must run a fixed number of queries however many rows they return."""
+    AUCTIONS = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        bidders = [
+            User(username=f'budget{i}', email=f'budget{i}@example.com', mobile=f'55510{i:05d}')
+            for i in range(10)
+        ]
+        User.objects.bulk_create(bidders)
+        vehicles = Vehicle.objects.bulk_create([
+            Vehicle(make='Make', model=f'Model {i}', year=2000 + i % 25, condition='Used', max_price=10000)
+            for i in range(cls.AUCTIONS)
+        ])
+        VehicleImage.objects.bulk_create([
+            VehicleImage(vehicle=vehicle, image=f'vehicle_images/{vehicle.id}_{n}.jpg')
+            for vehicle in vehicles for n in range(2)
+        ])
+        start = now() - timedelta(days=1)
+        auctions = Auction.objects.bulk_create([
+            Auction(
+                vehicle=vehicle, starting_price=1000, start_time=start,
+                end_time=start + timedelta(days=2, minutes=i), highest_bid=1000 + i,
+                highest_bidder=bidders[i % len(bidders)],
+            )
+            for i, vehicle in enumerate(vehicles)
+        ])
+        Bid.objects.bulk_create([
+            Bid(auction=auction, bidder=bidders[i % len(bidders)], bid_amount=1000 + i)
+            for i, auction in enumerate(auctions)
+        ])
+        cls.vehicle = vehicles[0]
+        cls.auction = auctions[0]
+        cls.bid = Bid.objects.first()
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def assertBudget(self, budget, url):
+        with self.assertNumQueries(budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_auction_list(self):
+        self.assertBudget(2, reverse('auction-list'))
+
+    def test_auction_detail(self):
+        self.assertBudget(2, reverse('auction-detail', kwargs={'id': str(self.auction.id)}))
+
+    def test_vehicle_list(self):
+        self.assertBudget(2, reverse('vehicle-list'))
+
+    def test_vehicle_detail(self):
+        self.assertBudget(2, reverse('vehicle-detail', kwargs={'id': str(self.vehicle.id)}))
+
+    def test_bid_list(self):
+        self.assertBudget(1, reverse('bid-list'))
+
+    def test_bid_detail(self):
+        self.assertBudget(1, reverse('bid-detail', kwargs={'id': str(self.bid.id)}))
+
+    def test_auction_pages_follow_cursor(self):
+        response = self.client.get(reverse('auction-list'), {'page_size': 50})
+        self.assertEqual(len(response.json()['results']), 50)
+        first_page = [row['id'] for row in response.json()['results']]
+        with self.assertNumQueries(2):
+            response = self.client.get(response.json()['next'])
+        self.assertEqual(len(response.json()['results']), 50)
+        self.assertFalse(set(first_page) & {row['id'] for row in response.json()['results']})
+
+    def test_vehicle_pages_newest_year_first(self):
+        response = self.client.get(reverse('vehicle-list'), {'page_size': 100})
+        rows = response.json()['results']
+        rows += self.client.get(response.json()['next']).json()['results']
+        keys = [(-row['year'], row['id']) for row in rows]
+        self.assertEqual(len(set(keys)), 200)
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(rows[0]['year'], 2024)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse('bid-list'), {'page_size': 10000})
+        self.assertEqual(len(response.json()['results']), BidPagination.max_page_size)
+
+    def test_admin_changelists(self):
+        admin_user = User.objects.create_superuser('budgetadmin', 'budgetadmin@example.com', 'pass', mobile='5559999999')
+        self.client.force_login(admin_user)
+        for model in ('auction', 'bid', 'vehicle', 'auctionsettlement', 'proxybid'):
+            url = reverse(f'admin:auction_{model}_changelist')
+            # session, user, count, page and the list_filter choices; vehicles add their images
+            with self.assertNumQueries(7 if model == 'vehicle' else 5):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(ADMIN_EXACT_COUNT_LIMIT=100)
+    def test_admin_counts_are_bounded(self):
+        admin_user = User.objects.create_superuser('budgetadmin', 'budgetadmin@example.com', 'pass', mobile='5559999999')
+        self.client.force_login(admin_user)
+        Bid.objects.filter(pk=Bid.objects.order_by('timestamp').first().pk).delete()
+        response = self.client.get(reverse('admin:auction_bid_changelist'))
+        # Largest rowid rather than COUNT(*): the deleted bid is still counted
+        self.assertEqual(response.context['cl'].result_count, self.AUCTIONS)
+        response = self.client.get(reverse('admin:auction_bid_changelist'), {'q': 'make'})
+        self.assertEqual(response.context['cl'].result_count, 101)
+
+    def test_admin_search(self):
+        admin_user = User.objects.create_superuser('budgetadmin', 'budgetadmin@example.com', 'pass', mobile='5559999999')
+        self.client.force_login(admin_user)
+        url = reverse('admin:auction_bid_changelist')
+        response = self.client.get(url, {'q': '"model 1999"'})
+        self.assertEqual([bid.auction.vehicle.model for bid in response.context['cl'].result_list], ['Model 1999'])
+        response = self.client.get(url, {'q': 'BUDGET3@'})
+        self.assertEqual(response.context['cl'].result_count, self.AUCTIONS // 10)
+        # Prefix-anchored: the middle of a model name does not match
+        response = self.client.get(reverse('admin:auction_vehicle_changelist'), {'q': 'odel'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+        response = self.client.get(reverse('admin:auction_vehicle_changelist'), {'q': '2010'})
+        self.assertEqual(response.context['cl'].result_count, self.AUCTIONS // 25)
+        self.assertEqual({vehicle.year for vehicle in response.context['cl'].result_list}, {2010})
+
+    def test_admin_prefix_search_uses_nocase_indexes(self):
+        for queryset, index in (
+            (Vehicle.objects.filter(make__istartswith='mak'), 'vehicle_make_nocase_idx'),
+            (Vehicle.objects.filter(model__istartswith='mod'), 'vehicle_model_nocase_idx'),
+            (User.objects.filter(email__istartswith='budget3@'), 'user_email_nocase_idx'),
+        ):
+            self.assertIn(index, queryset.explain())
+
+class KeysetPaginationTestCase(TestCase):
+    """Pages must walk every row once, however many share the leading ordering key."""
+    TIED = 1250  # past DRF's offset_cutoff of 1000
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, url, params, direction='next'):
+        response = self.client.get(url, params).json()
+        rows = response['results']
+        pages = 1
+        while response[direction]:
+            response = self.client.get(response[direction]).json()
+            rows += response['results']
+            pages += 1
+            self.assertLess(pages, 100)
+        return rows
+
+    def test_tied_vehicles_page_to_the_end_and_back(self):
+        Vehicle.objects.bulk_create([
+            Vehicle(make='Tied', model=f'Model {i}', year=2015, condition='Used', max_price=10000)
+            for i in range(self.TIED)
+        ])
+        Vehicle.objects.create(make='Older', model='One', year=2001, condition='Used', max_price=10000)
+        url = reverse('vehicle-list')
+        rows = self.walk(url, {'page_size': 100})
+        ids = [row['id'] for row in rows]
+        self.assertEqual(len(ids), self.TIED + 1)
+        self.assertEqual(len(set(ids)), self.TIED + 1)
+        self.assertEqual(ids[:self.TIED], sorted(ids[:self.TIED]))
+        self.assertEqual(rows[-1]['model'], 'One')
+
+        # And back again from the last page
+        last = self.client.get(url, {'page_size': 100}).json()
+        while last['next']:
+            last = self.client.get(last['next']).json()
+        backwards = last['results']
+        while last['previous']:
+            last = self.client.get(last['previous']).json()
+            backwards = last['results'] + backwards
+        self.assertEqual([row['id'] for row in backwards], ids)
+
+    def test_mass_close_auctions_page_in_every_ordering(self):
+        # Thousands of auctions scheduled to close at the same instant
+        vehicles = Vehicle.objects.bulk_create([
+            Vehicle(make='Fleet', model=f'Unit {i}', year=2018, condition='Used', max_price=8000)
+            for i in range(self.TIED)
+        ])
+        start, end = now() - timedelta(hours=1), now() + timedelta(hours=1)
+        Auction.objects.bulk_create([
+            Auction(vehicle=vehicle, starting_price=1000, start_time=start, end_time=end)
+            for vehicle in vehicles
+        ])
+        for ordering in ('ending_soon', 'starting_soon', 'newest'):
+            ids = [row['id'] for row in self.walk(reverse('auction-list'), {'page_size': 100, 'ordering': ordering})]
+            self.assertEqual(len(set(ids)), self.TIED, ordering)
+            self.assertEqual(ids, sorted(ids, reverse=ordering == 'newest'), ordering)
+
+    def test_bidder_dashboard_pages_tied_auctions(self):
+        bidder = User.objects.create_user(
+            username='fleetbuyer', email='fleetbuyer@example.com', password='testpass123', mobile='5550000077'
+        )
+        vehicles = Vehicle.objects.bulk_create([
+            Vehicle(make='Fleet', model=f'Lot {i}', year=2018, condition='Used', max_price=8000)
+            for i in range(self.TIED)
+        ])
+        end = now() + timedelta(hours=1)
+        auctions = Auction.objects.bulk_create([
+            Auction(vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1), end_time=end)
+            for vehicle in vehicles
+        ])
+        Bid.objects.bulk_create([Bid(auction=auction, bidder=bidder, bid_amount=1100) for auction in auctions])
+        self.client.force_authenticate(bidder)
+        ids = [row['id'] for row in self.walk(reverse('my-auctions'), {'page_size': 100})]
+        self.assertEqual(len(set(ids)), self.TIED)
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_malformed_cursor_is_404(self):
+        response = self.client.get(reverse('vehicle-list'), {'cursor': 'cD1bIm5vdC1hLXllYXIiLCAieCJd'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class AuctionStatusFilterTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        current_time = now()
+        windows = {
+            'completed': (current_time - timedelta(days=2), current_time - timedelta(days=1)),
+            'active': (current_time - timedelta(hours=1), current_time + timedelta(hours=1)),
+            'upcoming': (current_time + timedelta(days=1), current_time + timedelta(days=2)),
+        }
+        self.auctions = {}
+        for name, (start, end) in windows.items():
+            vehicle = Vehicle.objects.create(
+                make='Audi', model=name, year=2020, condition='Used', max_price=30000.00
+            )
+            self.auctions[name] = Auction.objects.create(
+                vehicle=vehicle, starting_price=1000, start_time=start, end_time=end
+            )
+
+    def test_filter_by_status(self):
+        for name, auction in self.auctions.items():
+            response = self.client.get(reverse('auction-list'), {'status': name})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([row['id'] for row in response.json()['results']], [str(auction.id)])
+            self.assertEqual(response.json()['results'][0]['status'], name)
+
+    def test_unknown_status_is_rejected(self):
+        response = self.client.get(reverse('auction-list'), {'status': 'sold'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ending_soon_ordering(self):
+        response = self.client.get(reverse('auction-list'), {'ordering': 'ending_soon'})
+        ids = [row['id'] for row in response.json()['results']]
+        self.assertEqual(ids, [str(self.auctions[name].id) for name in ('completed', 'active', 'upcoming')])
+        response = self.client.get(reverse('auction-list'), {'ordering': 'newest'})
+        self.assertEqual(response.json()['results'][0]['id'], str(self.auctions['upcoming'].id))
+
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='cachebidder', email='cache@example.com', password='testpass123', mobile='5550000004'
+        )
+        self.vehicle = Vehicle.objects.create(
+            make='Volvo', model='XC60', year=2021, condition='Used', max_price=30000.00
+        )
+        self.auction = Auction.objects.create(
+            vehicle=self.vehicle, starting_price=1000, start_time=now() - timedelta(hours=1),
+            end_time=now() + timedelta(hours=1)
+        )
+        self.url = reverse('auction-detail', kwargs={'id': str(self.auction.id)})
+
+    def test_second_read_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(cache_stats()['auction'], {'hit': 1, 'miss': 1, 'not_modified': 0})
+
+    def test_conditional_get_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_if_modified_since_waits_for_the_second_to_end(self):
+        # Changed within the current second: a date would not tell this
+        # generation apart from the next one
+        generation = _generation_key('auction', self.auction.id)
+        cache.set(generation, time.time(), timeout=None)
+        response = self.client.get(self.url)
+        self.assertNotIn('Last-Modified', response)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        cache.set(generation, time.time() - 10.5, timeout=None)
+        last_modified = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['Last-Modified'], last_modified)
+
+    def test_accepted_bid_evicts_auction(self):
+        self.client.get(self.url)
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('place-bid'), {'auction': str(self.auction.id), 'bid_amount': '1500'})
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).json()['highest_bid'], '1500.00')
+
+    def test_image_change_evicts_vehicle(self):
+        url = reverse('vehicle-detail', kwargs={'id': str(self.vehicle.id)})
+        self.assertEqual(self.client.get(url).json()['images'], [])
+        VehicleImage.objects.create(vehicle=self.vehicle, image='vehicle_images/new.jpg')
+        self.assertEqual(len(self.client.get(url).json()['images']), 1)
+
+@override_settings(IMAGE_VARIANT_WORKERS=0)
+class ImageVariantTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='uploader', email='uploader@example.com', password='testpass123', mobile='5550000005'
+        )
+        self.client.force_authenticate(self.user)
+
+    def upload(self, size=(2400, 1800)):
+        buffer = io.BytesIO()
+        PILImage.new('RGB', size, 'red').save(buffer, 'JPEG')
+        return SimpleUploadedFile('car.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_generates_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('vehicle-list'), {
+                'make': 'Subaru', 'model': 'Outback', 'year': 2022, 'condition': 'New',
+                'max_price': 32000, 'images': [self.upload()],
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        image = VehicleImage.objects.get(vehicle_id=response.data['id'])
+        self.assertEqual(set(image.variants), {'thumbnail', 'card', 'full'})
+        with PILImage.open(os.path.join(self.media_root, image.variants['thumbnail'])) as thumbnail:
+            self.assertEqual(thumbnail.format, 'WEBP')
+            self.assertEqual(thumbnail.size, (320, 240))
+
+        detail = self.client.get(reverse('vehicle-detail', kwargs={'id': response.data['id']})).json()
+        self.assertTrue(detail['images'][0]['variants']['card'].endswith('_card.webp'))
+
+@override_settings(IMAGE_VARIANT_WORKERS=0)
+class BulkVehicleImportTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='dealer', email='dealer@example.com', password='testpass123', mobile='5550000006'
+        )
+        self.client.force_authenticate(self.user)
+        Vehicle.objects.create(make='Toyota', model='Camry', year=2020, condition='New', max_price=20000)
+
+    def archive(self, *names):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for name in names:
+                image = io.BytesIO()
+                PILImage.new('RGB', (64, 48), 'blue').save(image, 'JPEG')
+                archive.writestr(name, image.getvalue())
+        return SimpleUploadedFile('images.zip', buffer.getvalue(), content_type='application/zip')
+
+    def test_jsonl_import_reports_per_row_errors(self):
+        rows = [
+            {"make": "Honda", "model": "Civic", "year": 2021, "condition": "Used", "max_price": "15000", "images": ["civic.jpg"]},
+            {"make": "honda", "model": "CIVIC", "year": 2021, "condition": "used", "max_price": "15000.00", "images": ["civic.jpg"]},
+            {"make": "toyota", "model": "camry", "year": 2020, "condition": "new", "max_price": 20000, "images": ["civic.jpg"]},
+            {"make": "Ford", "model": "Focus", "year": "soon", "condition": "Used", "max_price": 9000, "images": ["civic.jpg"]},
+            {"make": "Kia", "model": "Rio", "year": 2019, "condition": "Used", "max_price": 7000, "images": ["missing.jpg"]},
+        ]
+        manifest = "\n".join(json.dumps(row) for row in rows) + "\nnot json\n"
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('vehicle-bulk'), {
+                'manifest': SimpleUploadedFile('vehicles.jsonl', manifest.encode()),
+                'archive': self.archive('civic.jpg'),
+            }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['duplicates'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4, 5, 6])
+        civic = Vehicle.objects.get(model='Civic')
+        self.assertEqual(civic.images.count(), 1)
+        self.assertEqual(set(civic.images.get().variants), {'thumbnail', 'card', 'full'})
+
+    def test_csv_import_in_chunks(self):
+        manifest = "make,model,year,condition,max_price,images\n" + "".join(
+            f"Make{i},Model{i},2020,Used,{1000 + i},a.jpg;b.jpg\n" for i in range(25)
+        )
+        path = os.path.join(self.media_root, 'vehicles.csv')
+        with open(path, 'w') as handle:
+            handle.write(manifest)
+        archive_path = os.path.join(self.media_root, 'images.zip')
+        with open(archive_path, 'wb') as handle:
+            handle.write(self.archive('a.jpg', 'b.jpg').read())
+
+        call_command('import_vehicles', path, archive=archive_path, chunk_size=10, stdout=io.StringIO())
+        self.assertEqual(Vehicle.objects.filter(make__startswith='Make').count(), 25)
+        self.assertEqual(VehicleImage.objects.count(), 50)
+
+    def bulk(self, manifest, archive):
+        return self.client.post(reverse('vehicle-bulk'), {
+            'manifest': SimpleUploadedFile('vehicles.csv', manifest.encode()), 'archive': archive,
+        }, format='multipart')
+
+    def test_corrupt_archive_member_rolls_back_its_chunk(self):
+        buffer = io.BytesIO(self.archive('good.jpg').read())
+        with zipfile.ZipFile(buffer, 'a') as archive:
+            archive.writestr('bad.jpg', b'x' * 100)
+        data = buffer.getvalue().replace(b'x' * 100, b'y' * 100)
+        manifest = "make,model,year,condition,max_price,images\nFord,Focus,2019,Used,9000,good.jpg\nKia,Rio,2019,Used,7000,bad.jpg\n"
+
+        response = self.bulk(manifest, SimpleUploadedFile('images.zip', data))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual((response.data['row'], response.data['created']), (3, 0))
+        self.assertIn("'bad.jpg'", response.data['error'])
+        self.assertFalse(Vehicle.objects.filter(make__in=['Ford', 'Kia']).exists())
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'vehicle_images')), [])
+
+    def test_unreadable_csv_reports_the_row(self):
+        manifest = "make,model,year,condition,max_price,images\nFord,Focus,2019,Used,9000,a.jpg\nKia," + "x" * 200000 + "\n"
+        response = self.bulk(manifest, self.archive('a.jpg'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['row'], 3)
+        self.assertTrue(response.data['error'].startswith('Invalid CSV'))
+
+class AuctionCloseSchedulerTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bidder = User.objects.create_user(
+            username='closer', email='closer@example.com', password='testpass123', mobile='5550000040'
+        )
+        self.current_time = now()
+        self.ended = self.make_auction('Ended', self.current_time - timedelta(seconds=1))
+        self.running = self.make_auction('Running', self.current_time + timedelta(minutes=1))
+        Auction.objects.filter(id=self.ended.id).update(highest_bid=1500, highest_bidder=self.bidder)
+
+    def make_auction(self, model, end_time):
+        vehicle = Vehicle.objects.create(make='Mazda', model=model, year=2020, condition='Used', max_price=20000)
+        return Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=self.current_time - timedelta(hours=1), end_time=end_time
+        )
+
+    def test_scheduler_closes_due_auctions_once(self):
+        scheduler = CloseScheduler()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(scheduler.run_once(self.current_time), 1)
+        settlement = AuctionSettlement.objects.get()
+        self.assertEqual(settlement.auction_id, self.ended.id)
+        self.assertEqual(settlement.winner, self.bidder)
+        self.assertEqual(settlement.winning_bid, Decimal('1500.00'))
+        self.ended.refresh_from_db()
+        self.ended.vehicle.refresh_from_db()
+        self.assertIsNotNone(self.ended.closed_at)
+        self.assertFalse(self.ended.vehicle.available)
+
+        # The running auction is already on the heap and is closed once it ends
+        self.assertEqual(scheduler.seconds_until_next(self.current_time), 30)
+        later = self.running.end_time + timedelta(milliseconds=1)
+        self.assertEqual(scheduler.run_once(later), 1)
+        self.assertEqual(close_auctions([self.ended.id, self.running.id], later), [])
+        self.assertEqual(AuctionSettlement.objects.count(), 2)
+
+    def test_rescheduled_auction_is_not_closed_early(self):
+        scheduler = CloseScheduler(reload_interval=timedelta(0))
+        scheduler.run_once(self.current_time)
+        Auction.objects.filter(id=self.running.id).update(end_time=self.current_time + timedelta(minutes=2))
+        self.assertEqual(scheduler.run_once(self.current_time + timedelta(minutes=1, seconds=1)), 0)
+        self.assertEqual(scheduler.run_once(self.current_time + timedelta(minutes=2, seconds=1)), 1)
+
+    def test_closed_auction_reads_stored_state_and_rejects_bids(self):
+        close_due_auctions(self.current_time)
+        Auction.objects.filter(id=self.ended.id).update(end_time=self.current_time + timedelta(hours=1))
+        response = APIClient().get(reverse('auction-detail', args=[self.ended.id]))
+        self.assertEqual(response.json()['status'], 'completed')
+        with self.assertRaisesMessage(BidRejected, "This auction has ended."):
+            submit_bid(self.ended.id, self.bidder, '5000')
+
+class ProxyBiddingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(username=name, email=f'{name}@example.com', password='testpass123', mobile=f'55500001{n}')
+            for n, name in enumerate(['alice', 'bob', 'carol'])
+        ]
+        vehicle = Vehicle.objects.create(make='Honda', model='Civic', year=2020, condition='Used', max_price=20000)
+        self.auction = Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1), end_time=now() + timedelta(hours=1)
+        )
+        self.url = reverse('auction-proxy', args=[self.auction.id])
+
+    def set_max(self, user, amount):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(self.url, {'max_amount': amount})
+
+    def ladder(self):
+        return list(Bid.objects.filter(auction=self.auction).order_by('timestamp').values_list('bidder__username', 'bid_amount'))
+
+    def test_resolve_uses_runner_up_plus_increment(self):
+        self.assertEqual(resolve(Decimal('0'), None, Decimal('1000'), [(1, Decimal('3000'))]), [(1, Decimal('1000'))])
+        self.assertEqual(
+            resolve(Decimal('1000'), 1, Decimal('1000'), [(2, Decimal('5000')), (1, Decimal('3000'))]),
+            [(1, Decimal('3000')), (2, Decimal('3050'))],
+        )
+        # Ties go to the current leader, and the price never passes the winner's maximum
+        self.assertEqual(resolve(Decimal('1000'), 1, Decimal('1000'), [(1, Decimal('2000')), (2, Decimal('2000'))]),
+                         [(1, Decimal('2000'))])
+
+    def test_bid_war_collapses_into_one_request(self):
+        response = self.set_max(self.alice, '3000')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'highest_bid': '1000.00', 'leading': True})
+
+        response = self.set_max(self.bob, '5000')
+        self.assertEqual(response.data, {'highest_bid': '3050.00', 'leading': True})
+        self.assertEqual(self.ladder(), [
+            ('alice', Decimal('1000.00')), ('alice', Decimal('3000.00')), ('bob', Decimal('3050.00')),
+        ])
+
+    def test_manual_bid_is_answered_by_proxy(self):
+        self.set_max(self.alice, '3000')
+        submit_bid(self.auction.id, self.carol, '1500')
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.highest_bidder, self.alice)
+        self.assertEqual(self.auction.highest_bid, Decimal('1550.00'))
+
+        submit_bid(self.auction.id, self.carol, '3500')
+        self.auction.refresh_from_db()
+        self.assertEqual(self.auction.highest_bidder, self.carol)
+        self.assertEqual(self.auction.highest_bid, Decimal('3500.00'))
+
+    def test_maximum_must_beat_current_bid(self):
+        submit_bid(self.auction.id, self.carol, '2000')
+        response = self.set_max(self.alice, '2000')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ProxyBid.objects.exists())
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.client = APIClient()
+        vehicle = Vehicle.objects.create(make='Kia', model='Rio', year=2021, condition='New', max_price=15000)
+        Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1), end_time=now() + timedelta(hours=1)
+        )
+
+    def test_server_timing_and_prometheus_output(self):
+        response = self.client.get(reverse('auction-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="2 queries", ser;dur=[\d.]+$')
+
+        self.client.force_login(User.objects.create_user(
+            username='ops', email='ops@example.com', password='testpass123', mobile='5550000081', is_staff=True,
+        ))
+        metrics = self.client.get(reverse('metrics'))
+        self.assertEqual(metrics.status_code, status.HTTP_200_OK)
+        body = metrics.content.decode()
+        labels = 'view="AuctionViewSet.list",method="GET"'
+        self.assertIn(f'http_request_db_queries_count{{{labels}}} 1', body)
+        self.assertIn(f'http_request_db_queries_sum{{{labels}}} 2', body)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1', body)
+        self.assertIn(f'http_responses_total{{{labels},status="200"}} 1', body)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_are_private_unless_opted_in(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(
+            self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ').status_code, status.HTTP_403_FORBIDDEN,
+        )
+        self.client.force_login(User.objects.create_user(
+            username='bidder', email='bidder@example.com', password='testpass123', mobile='5550000082',
+        ))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        with override_settings(METRICS_PUBLIC=True):
+            self.client.logout()
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_200_OK)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.user = User.objects.create_user(
+            username='replica', email='replica@example.com', password='testpass123', mobile='5550000071'
+        )
+        vehicle = Vehicle.objects.create(make='Mazda', model='3', year=2020, condition='Used', max_price=14000)
+        self.auction = Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1), end_time=now() + timedelta(hours=1)
+        )
+
+    def _request(self, user=None):
+        request = RequestFactory().get('/')
+        request.user = user if user is not None else type('Anonymous', (), {'is_authenticated': False})()
+        return request
+
+    def test_reads_use_replica_only_when_asked(self):
+        self.assertEqual(self.router.db_for_read(Auction), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Auction), 'replica1')
+            self.assertEqual(self.router.db_for_write(Auction), 'default')
+        self.assertEqual(self.router.db_for_read(Auction), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        self.assertFalse(use_replica(self._request()))
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Auction), 'default')
+
+    def test_recent_changes_read_from_primary(self):
+        self.assertTrue(use_replica(self._request(), changed_at=time.time() - 60))
+        self.assertFalse(use_replica(self._request(), changed_at=time.time()))
+
+    def test_writer_sticks_to_primary(self):
+        self.assertTrue(use_replica(self._request(self.user)))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post(reverse('place-bid'), {'auction': str(self.auction.id), 'bid_amount': '1500'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(use_replica(self._request(self.user)))
+        # Other readers are unaffected
+        self.assertTrue(use_replica(self._request()))
+
+class FlatListRowsTestCase(TestCase):
+    """The flat list path must render exactly what the serializers render."""
+
+    @classmethod
+    def setUpTestData(cls):
+        bidder = User.objects.create_user(
+            username='flat', email='flat@example.com', password='testpass123', mobile='5550000081',
+            first_name='Flat', last_name='Rows',
+        )
+        start = now() - timedelta(days=1)
+        for i in range(7):
+            vehicle = Vehicle.objects.create(
+                make='Audi', model=f'A{i}', year=2015 + i, condition='Used', max_price=Decimal('18000.5') + i,
+                available=i % 2 == 0,
+            )
+            VehicleImage.objects.create(vehicle=vehicle, image=f'vehicle_images/{i}.jpg')
+            if i % 3 == 0:
+                VehicleImage.objects.create(
+                    vehicle=vehicle, image=f'vehicle_images/{i} b.jpg',
+                    variants={'thumbnail': f'vehicle_images/{i}b_thumbnail.webp', 'card': f'vehicle_images/{i}b_card.webp'},
+                )
+            Auction.objects.create(
+                vehicle=vehicle, starting_price=1000 + i, start_time=start + timedelta(hours=i * 6),
+                end_time=start + timedelta(days=2, minutes=i, microseconds=i * 1001),
+                highest_bid=Decimal('1500.1') if i % 2 else 0, highest_bidder=bidder if i % 2 else None,
+                closed_at=now() if i == 3 else None,
+            )
+        Vehicle.objects.create(make='Seat', model='Ibiza', year=2012, condition='Used', max_price=4000)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def assertSameJson(self, url, params=None):
+        responses = []
+        for flat in (False, True):
+            cache.clear()
+            with self.settings(FLAT_LIST_SERIALIZATION=flat):
+                response = self.client.get(url, params or {}, HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            responses.append(response.content)
+        self.assertEqual(responses[0], responses[1])
+        return json.loads(responses[1])
+
+    def test_auction_list(self):
+        page = self.assertSameJson(reverse('auction-list'), {'page_size': 3})
+        self.assertEqual(len(page['results']), 3)
+        self.assertSameJson(page['next'])
+        self.assertSameJson(reverse('auction-list'), {'ordering': 'newest', 'status': 'active'})
+        self.assertSameJson(reverse('auction-list'), {'status': 'completed'})
+
+    def test_vehicle_list(self):
+        page = self.assertSameJson(reverse('vehicle-list'), {'page_size': 5})
+        self.assertSameJson(page['next'])
+
+class VehicleSearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('vehicle-search')
+        Vehicle.objects.bulk_create([
+            Vehicle(make='Toyota', model='Camry', year=2018, condition='Used', max_price=15000),
+            Vehicle(make='Toyota', model='Corolla', year=2021, condition='New', max_price=22000),
+            Vehicle(make='Toyota', model='Camry Hybrid', year=2022, condition='New', max_price=31000),
+            Vehicle(make='Honda', model='Civic', year=2019, condition='Used', max_price=14000),
+        ])
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_prefix_match_ranked_with_facets(self):
+        result = self.search(q='toy cam')
+        self.assertEqual(result['count'], 2)
+        self.assertEqual({row['model'] for row in result['results']}, {'Camry', 'Camry Hybrid'})
+        self.assertEqual(result['facets']['make'], [{'value': 'Toyota', 'count': 2}])
+        self.assertEqual(result['facets']['year'], [{'value': '2015-2019', 'count': 1}, {'value': '2020-2024', 'count': 1}])
+        self.assertEqual(result['facets']['condition'], [{'value': 'New', 'count': 1}, {'value': 'Used', 'count': 1}])
+
+    def test_filters_and_paging(self):
+        result = self.search(q='toyota', year_min=2020, price_max='25000')
+        self.assertEqual([row['model'] for row in result['results']], ['Corolla'])
+        self.assertEqual(self.search(q='toyota', condition='new')['count'], 2)
+        page = self.search(q='toyota', limit=1, offset=1)
+        self.assertEqual((page['count'], len(page['results'])), (3, 1))
+
+    def test_index_follows_writes(self):
+        civic = Vehicle.objects.get(model='Civic')
+        civic.model = 'Accord'
+        civic.save()
+        Vehicle.objects.filter(make='Toyota', model='Corolla').delete()
+        cache.clear()
+        self.assertEqual(self.search(q='civic')['count'], 0)
+        self.assertEqual(self.search(q='accord')['results'][0]['id'], str(civic.id))
+        self.assertEqual(self.search(q='corolla')['count'], 0)
+
+    def test_requires_words(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.search(q='"*')['count'], 0)
+
+    def test_available_filter_matches_the_list(self):
+        Vehicle.objects.filter(model='Corolla').update(available=False)
+        found = self.search(q='toyota', available='false')
+        self.assertEqual([row['model'] for row in found['results']], ['Corolla'])
+        self.assertEqual(self.search(q='toyota', available='true')['count'], 2)
+        self.assertEqual(self.search(q='toyota')['count'], 3)
+        listed = self.client.get(reverse('vehicle-list'), {'available': 'false'}).json()
+        self.assertEqual([row['model'] for row in listed['results']], ['Corolla'])
+
+    def test_other_backends_search_through_the_orm(self):
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            result = self.search(q='toy cam', available='true')
+        self.assertEqual([row['model'] for row in result['results']], ['Camry Hybrid', 'Camry'])
+        self.assertEqual(result['facets']['year'], [{'value': '2015-2019', 'count': 1}, {'value': '2020-2024', 'count': 1}])
+
+    def test_migrate_restores_dropped_triggers(self):
+        self.assertEqual(restore_triggers('default'), [])
+        # What a table rebuild does to them
+        with connection.cursor() as cursor:
+            for name in TRIGGERS:
+                cursor.execute(f"DROP TRIGGER {name}")
+        Vehicle.objects.create(make='Mazda', model='Miata', year=2020, condition='Used', max_price=20000)
+        Vehicle.objects.filter(model='Civic').delete()
+
+        emit_post_migrate_signal(0, False, 'default')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'auction_vehicle'")
+            self.assertEqual({row[0] for row in cursor.fetchall()}, set(TRIGGERS))
+        self.assertEqual(self.search(q='miata')['count'], 1)
+        self.assertEqual(self.search(q='civic')['count'], 0)
+        Vehicle.objects.create(make='Mazda', model='CX-5', year=2021, condition='New', max_price=28000)
+        cache.clear()
+        self.assertEqual(self.search(q='mazda')['count'], 2)
+
+class AuctionBidFeedTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.bidders = [
+            User.objects.create_user(username=f'feed{i}', email=f'feed{i}@example.com', password='testpass123', mobile=f'555000009{i}')
+            for i in range(2)
+        ]
+        vehicle = Vehicle.objects.create(make='Fiat', model='Panda', year=2017, condition='Used', max_price=6000)
+        self.auction = Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1), end_time=now() + timedelta(hours=1)
+        )
+        self.url = reverse('auction-bids', kwargs={'id': str(self.auction.id)})
+        for n in range(5):
+            place_bid(self.auction.id, self.bidders[n % 2], 1000 + 100 * n)
+
+    def test_newest_first_with_pages(self):
+        page = self.client.get(self.url, {'page_size': 3}).json()
+        self.assertEqual([bid['bid_amount'] for bid in page['results']], ['1400.00', '1300.00', '1200.00'])
+        self.assertEqual(page['results'][0]['bidder'], str(self.bidders[0].id))
+        rest = self.client.get(page['next']).json()
+        self.assertEqual([bid['bid_amount'] for bid in rest['results']], ['1100.00', '1000.00'])
+        self.assertIsNone(rest['latest'])
+
+    def test_since_returns_only_new_bids(self):
+        latest = self.client.get(self.url).json()['latest']
+        unchanged = self.client.get(self.url, {'since': latest}).json()
+        self.assertEqual((unchanged['results'], unchanged['latest']), ([], latest))
+
+        place_bid(self.auction.id, self.bidders[1], 1500)
+        place_bid(self.auction.id, self.bidders[0], 1600)
+        cache.clear()
+        with self.assertNumQueries(1):
+            delta = self.client.get(self.url, {'since': latest}).json()
+        self.assertEqual([bid['bid_amount'] for bid in delta['results']], ['1600.00', '1500.00'])
+        self.assertEqual(self.client.get(self.url, {'since': delta['latest']}).json()['results'], [])
+
+    def test_served_from_auction_time_index(self):
+        latest = Bid.objects.filter(auction=self.auction).latest('timestamp')
+        plan = (
+            Bid.objects.filter(auction=self.auction, timestamp__gte=latest.timestamp)
+            .order_by(*BidFeedPagination.ordering)[:BidFeedPagination.page_size + 1]
+            .explain()
+        )
+        self.assertIn('bid_auction_time_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'garbage'}).status_code, status.HTTP_400_BAD_REQUEST)
+        missing = reverse('auction-bids', kwargs={'id': str(uuid.uuid4())})
+        self.assertEqual(self.client.get(missing).status_code, status.HTTP_404_NOT_FOUND)
+
+class AuctionBidStatsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'stats{i}', email=f'stats{i}@example.com', password='testpass123', mobile=f'555000010{i}')
+            for i in range(3)
+        ]
+        vehicle = Vehicle.objects.create(make='Opel', model='Astra', year=2016, condition='Used', max_price=7000)
+        self.auction = Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1), end_time=now() + timedelta(hours=1)
+        )
+
+    def stats(self):
+        return Auction.objects.values('bid_count', 'unique_bidder_count', 'last_bid_at', 'second_highest_bid').get(id=self.auction.id)
+
+    def expected(self):
+        bids = Bid.objects.filter(auction=self.auction)
+        amounts = sorted(bids.values_list('bid_amount', flat=True), reverse=True)
+        return {
+            'bid_count': len(amounts),
+            'unique_bidder_count': bids.values('bidder').distinct().count(),
+            'last_bid_at': bids.latest('timestamp').timestamp if amounts else None,
+            'second_highest_bid': amounts[1] if len(amounts) > 1 else None,
+        }
+
+    def test_maintained_by_every_bid_path(self):
+        place_bid(self.auction.id, self.users[0], 1000)
+        self.assertEqual(self.stats(), self.expected())
+        self.assertIsNone(self.stats()['second_highest_bid'])
+        place_bid(self.auction.id, self.users[1], 1100)
+        place_bid(self.auction.id, self.users[0], 1200)
+        self.assertEqual(self.stats(), dict(self.expected(), bid_count=3, unique_bidder_count=2, second_highest_bid=Decimal('1100')))
+
+        # A proxy war writes the runner-up's maximum and the winner's price at once
+        set_max_bid(self.auction.id, self.users[2], 2000)
+        set_max_bid(self.auction.id, self.users[1], 1500)
+        self.assertEqual(self.stats(), self.expected())
+
+        self.auction.refresh_from_db()
+        Bid(auction=self.auction, bidder=self.users[0], bid_amount=5000).save()
+        self.assertEqual(self.stats(), dict(self.expected(), unique_bidder_count=3))
+
+    def test_served_by_auction_serializer(self):
+        place_bid(self.auction.id, self.users[0], 1000)
+        place_bid(self.auction.id, self.users[1], 1250)
+        data = APIClient().get(reverse('auction-detail', kwargs={'id': str(self.auction.id)})).json()
+        self.assertEqual((data['bid_count'], data['unique_bidder_count'], data['second_highest_bid']), (2, 2, '1000.00'))
+        self.assertIsNotNone(data['last_bid_at'])
+
+    def test_rebuild_command(self):
+        place_bid(self.auction.id, self.users[0], 1000)
+        place_bid(self.auction.id, self.users[1], 1100)
+        Auction.objects.filter(id=self.auction.id).update(bid_count=99, unique_bidder_count=0, last_bid_at=None, second_highest_bid=None)
+        idle = Auction.objects.create(
+            vehicle=Vehicle.objects.create(make='Opel', model='Corsa', year=2015, condition='Used', max_price=5000),
+            starting_price=500, start_time=now(), end_time=now() + timedelta(hours=1),
+        )
+        call_command('rebuild_bid_stats', stdout=io.StringIO())
+        self.assertEqual(self.stats(), self.expected())
+        self.assertEqual(Auction.objects.filter(id=idle.id).values_list('bid_count', 'unique_bidder_count').get(), (0, 0))
+
+class MyAuctionsTestCase(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'mine{i}', email=f'mine{i}@example.com', password='testpass123', mobile=f'555000020{i}')
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+        self.url = reverse('my-auctions')
+
+    def auction(self, model, ends_in=timedelta(hours=1)):
+        vehicle = Vehicle.objects.create(make='Seat', model=model, year=2019, condition='Used', max_price=9000)
+        return Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=2), end_time=now() + ends_in,
+        )
+
+    def test_dashboard(self):
+        me, rival, other = self.users
+        winning, outbid, won, lost = (self.auction(model) for model in ('Ibiza', 'Leon', 'Arona', 'Ateca'))
+        self.auction('Tarraco')  # Not bid on
+        place_bid(winning.id, rival, 1000)
+        place_bid(winning.id, me, 1100)
+        place_bid(winning.id, me, 1200)
+        place_bid(outbid.id, me, 1000)
+        place_bid(outbid.id, rival, 1100)
+        place_bid(outbid.id, other, 1200)
+        place_bid(won.id, me, 1000)
+        place_bid(lost.id, me, 1000)
+        place_bid(lost.id, rival, 1500)
+        Auction.objects.filter(id__in=[won.id, lost.id]).update(end_time=now() - timedelta(minutes=1))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = {row['id']: row for row in response.json()['results']}
+        self.assertEqual(len(rows), 4)
+        summary = {
+            str(auction.id): (row['status'], row['rank'], row['my_best_bid'], row['my_bid_count'], row['highest_bid'])
+            for auction in (winning, outbid, won, lost) for row in [rows[str(auction.id)]]
+        }
+        self.assertEqual(summary, {
+            str(winning.id): ('winning', 1, '1200.00', 2, '1200.00'),
+            str(outbid.id): ('outbid', 3, '1000.00', 1, '1200.00'),
+            str(won.id): ('won', 1, '1000.00', 1, '1000.00'),
+            str(lost.id): ('lost', 2, '1000.00', 1, '1500.00'),
+        })
+        self.assertEqual(rows[str(winning.id)]['vehicle']['model'], 'Ibiza')
+
+        response = self.client.get(self.url, {'status': 'lost'})
+        self.assertEqual([row['id'] for row in response.json()['results']], [str(lost.id)])
+        self.assertEqual(self.client.get(self.url, {'status': 'leading'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pages_follow_cursor(self):
+        auctions = [self.auction(f'Model {i}', ends_in=timedelta(hours=i + 1)) for i in range(5)]
+        for auction in auctions:
+            place_bid(auction.id, self.users[0], 1000)
+        response = self.client.get(self.url, {'page_size': 3}).json()
+        ids = [row['id'] for row in response['results']]
+        ids += [row['id'] for row in self.client.get(response['next']).json()['results']]
+        self.assertEqual(ids, [str(auction.id) for auction in reversed(auctions)])
+
+    def test_requires_authentication(self):
+        self.assertEqual(APIClient().get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+class BidRateLimitTestCase(TestCase):
+    def setUp(self):
+        bid_limiter.clear()
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='eager', email='eager@example.com', password='testpass123', mobile='5550000301'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        vehicle = Vehicle.objects.create(make='Dacia', model='Logan', year=2017, condition='Used', max_price=6000)
+        self.auction = Auction.objects.create(
+            vehicle=vehicle, starting_price=1000, start_time=now() - timedelta(hours=1), end_time=now() + timedelta(hours=1)
+        )
+
+    @override_settings(BID_RATE_LIMIT={'RATE': 2, 'BURST': 3})
+    def test_token_bucket(self):
+        clock = [100.0]
+        limiter = BidRateLimiter(clock=lambda: clock[0])
+        self.assertEqual([limiter.check('u', 'a') for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(limiter.check('u', 'a'), 0.5)
+        # Other auctions and other users have their own buckets
+        self.assertEqual((limiter.check('u', 'b'), limiter.check('v', 'a')), (0, 0))
+        clock[0] += 0.5
+        self.assertEqual(limiter.check('u', 'a'), 0)
+        self.assertAlmostEqual(limiter.check('u', 'a'), 0.5)
+        clock[0] += 60
+        self.assertEqual([limiter.check('u', 'a') for _ in range(3)], [0, 0, 0])
+        self.assertGreater(limiter.check('u', 'a'), 0)
+
+    @override_settings(BID_RATE_LIMIT={'RATE': 1, 'BURST': 1, 'MAX_ENTRIES': 10})
+    def test_idle_buckets_are_swept(self):
+        clock = [0.0]
+        limiter = BidRateLimiter(clock=lambda: clock[0])
+        for n in range(10):
+            limiter.check('u', n)
+        clock[0] += 5
+        limiter.check('u', 'fresh')
+        self.assertEqual(list(limiter._buckets), [('u', 'fresh')])
+
+    @override_settings(BID_RATE_LIMIT={'RATE': 0.01, 'BURST': 2})
+    def test_place_bid_is_throttled_before_the_database(self):
+        url = reverse('place-bid')
+        for amount in ('1100', '1200'):
+            self.assertEqual(self.client.post(url, {'auction': str(self.auction.id), 'bid_amount': amount}).status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(0):
+            # A different spelling of the same auction id shares the bucket
+            response = self.client.post(url, {'auction': self.auction.id.hex.upper(), 'bid_amount': '1300'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '100')
+        self.assertEqual(Bid.objects.count(), 2)
+
+        # The bid viewset shares the limit; reading bids is not limited
+        response = self.client.post(reverse('bid-list'), {'auction': str(self.auction.id), 'bid_amount': '1300'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.client.get(reverse('bid-list')).status_code, status.HTTP_200_OK)
+
+    @override_settings(BID_RATE_LIMIT={'RATE': 0.01, 'BURST': 2, 'SHARED_CACHE': 'default'})
+    def test_shared_tier_spans_processes(self):
+        first, second = BidRateLimiter(), BidRateLimiter()
+        self.assertEqual((first.check('u', 'a'), second.check('u', 'a')), (0, 0))
+        # Each process still has a token left, but the shared window is used up
+        self.assertGreater(first.check('u', 'a'), 0)
+
+    @override_settings(BID_RATE_LIMIT={'RATE': 0})
+    def test_disabled(self):
+        self.assertEqual([bid_limiter.check('u', 'a') for _ in range(100)], [0] * 100)
@@ -0,0 +1,126 @@
+"""
+Per-(user, auction) bid rate limit.
+
+Each bidder gets a token bucket per auction: BURST bids straight away, then
+RATE more per second. The buckets are (tokens, timestamp) tuples in a plain
+dict and are updated without a lock; a check is one dict read and one dict
+write, each atomic under the GIL. Two threads checking the same key at the
+same instant can both spend the last token, so a client can overshoot by at
+most the number of worker threads. That is close enough for telling a
+script apart from a person. Once the dict outgrows MAX_ENTRIES, buckets
+that have been idle long enough to refill completely are dropped. Such a
+bucket is indistinguishable from a new one.
+
+With SHARED_CACHE set, bids that pass the local bucket are also counted in
+that Django cache alias (BURST per window of BURST / RATE seconds, using
+add/incr), so the limit holds across processes. Runaway clients are still
+turned away locally, without a cache round trip.
+"""
+import math
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    # Bids per second, per user and auction, once the burst is spent; 0 turns the limit off
+    'RATE': 1.0,
+    'BURST': 5,
+    'MAX_ENTRIES': 100000,
+    # Optional Django cache alias shared between processes, e.g. 'default'
+    'SHARED_CACHE': None,
+}
+
+
+def _config():
+    return dict(DEFAULTS, **getattr(settings, 'BID_RATE_LIMIT', {}))
+
+
+class BidRateLimiter:
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._buckets = {}   # (user id, auction id) -> (tokens, monotonic time)
+        self._sweep_at = None
+
+    def check(self, user_id, auction_id):
+        """
+        Spend one of the tokens of (user_id, auction_id). Returns 0 when the bid
+        may go ahead, otherwise the number of seconds until it may.
+        """
+        config = _config()
+        rate, burst = config['RATE'], config['BURST']
+        if not rate:
+            return 0.0
+        key = (user_id, auction_id)
+        current = self._clock()
+        tokens, stamp = self._buckets.get(key, (burst, current))
+        tokens = min(burst, tokens + (current - stamp) * rate)
+        if tokens < 1:
+            return (1 - tokens) / rate
+        self._buckets[key] = (tokens - 1, current)
+
+        if len(self._buckets) > (self._sweep_at or config['MAX_ENTRIES']):
+            self._sweep(current, burst / rate, config['MAX_ENTRIES'])
+        if config['SHARED_CACHE']:
+            return self._check_shared(caches[config['SHARED_CACHE']], key, rate, burst)
+        return 0.0
+
+    def clear(self):
+        self._buckets.clear()
+        self._sweep_at = None
+
+    def _sweep(self, current, refill, max_entries):
+        # list() copies the items in one step, so other threads may keep
+        # writing while we look for idle buckets
+        for key, (_, stamp) in list(self._buckets.items()):
+            if current - stamp >= refill:
+                self._buckets.pop(key, None)
+        # Everything may still be busy; wait for the dict to double before
+        # scanning again instead of scanning on every check
+        self._sweep_at = max(max_entries, 2 * len(self._buckets))
+
+    @staticmethod
+    def _check_shared(shared, key, rate, burst):
+        window = burst / rate
+        wall = time.time()
+        index = int(wall // window)
+        shared_key = f"bid-rate:{key[0]}:{key[1]}:{index}"
+        timeout = math.ceil(window) + 1
+        shared.add(shared_key, 0, timeout=timeout)
+        try:
+            count = shared.incr(shared_key)
+        except ValueError:
+            # Expired between add() and incr()
+            shared.add(shared_key, 1, timeout=timeout)
+            count = 1
+        if count > burst:
+            return (index + 1) * window - wall
+        return 0.0
+
+
+bid_limiter = BidRateLimiter()
+
+
+class BidRateThrottle(BaseThrottle):
+    """
+    Throttle for the bid placement endpoints, keyed by the user and the
+    ``auction`` in the request body. Requests it cannot key (anonymous, no
+    auction) are left to authentication and validation.
+    """
+
+    def allow_request(self, request, view):
+        auction_id = request.data.get('auction') if hasattr(request.data, 'get') else None
+        if not request.user.is_authenticated or not auction_id:
+            return True
+        try:
+            # Every spelling of one UUID shares a bucket
+            auction_id = uuid.UUID(str(auction_id))
+        except ValueError:
+            pass
+        self.delay = bid_limiter.check(request.user.pk, auction_id)
+        return not self.delay
+
+    def wait(self):
+        return self.delay
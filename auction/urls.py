@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VehicleViewSet, AuctionViewSet, BidViewSet, PlaceBidView
+from .views import VehicleViewSet, AuctionViewSet, BidViewSet, PlaceBidView, MyAuctionsView, response_cache_stats
 
 router = DefaultRouter()
 router.register(r'vehicles', VehicleViewSet)
@@ -9,6 +9,8 @@ router.register(r'bids', BidViewSet)
 
 urlpatterns = [
     path('bids/place/', PlaceBidView.as_view(), name="place-bid"),
+    path('me/', MyAuctionsView.as_view(), name="my-auctions"),
+    path('cache-stats/', response_cache_stats, name="response-cache-stats"),
     path('', include(router.urls)),
 ]
 
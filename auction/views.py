@@ -1,15 +1,28 @@
 from rest_framework import viewsets, permissions, status, generics
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes, action
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 from .models import Vehicle, Auction, Bid, VehicleImage
-from .serializers import VehicleSerializer, AuctionSerializer, BidSerializer, VehicleImageSerializer
-from django.utils.timezone import now
+from .serializers import (
+    VehicleSerializer, AuctionSerializer, BidSerializer, VehicleImageSerializer, VehicleSearchSerializer,
+    AuctionBidSerializer, MyAuctionSerializer,
+)
+from .bidding import submit_bid, set_max_bid, BidRejected
+from .pagination import VehiclePagination, AuctionPagination, BidPagination, BidFeedPagination, MyAuctionPagination
+from .filters import AuctionStatusFilter, MyAuctionStatusFilter, VehicleAvailableFilter
+from .cache import CachedReadMixin, cache_stats, serve
+from .rows import FlatListMixin, VehicleRows, AuctionRows
+from .ingest import READERS, ImportAborted, detect_format, import_vehicles, text_stream
+from .search import search_vehicles
+from .throttling import BidRateThrottle
+from users.authentication import CachedTokenAuthentication
+import uuid
+import zipfile
 
 # Home page (public)
 @api_view(['GET'])
@@ -18,21 +31,40 @@ def home(request):
     from django.shortcuts import render
     return render(request, 'index.html')
 
+# Response cache counters (staff only)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    return Response(cache_stats())
+
 # Vehicle ViewSet
-class VehicleViewSet(viewsets.ModelViewSet):
-    queryset = Vehicle.objects.all()
+class VehicleViewSet(CachedReadMixin, FlatListMixin, viewsets.ModelViewSet):
+    cache_scope = 'vehicle'
+    queryset = Vehicle.objects.prefetch_related('images')
     serializer_class = VehicleSerializer
-    authentication_classes = [TokenAuthentication]
+    flat_rows = VehicleRows()
+    pagination_class = VehiclePagination
+    filter_backends = [VehicleAvailableFilter]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]  # Only authenticated users can create/update/delete
     parser_classes = [MultiPartParser, FormParser]
     lookup_field = 'id'  # Use UUID for lookup
 
     def get_permissions(self):
-        # Allow anyone to list/retrieve, restrict create/update/delete
-        if self.action in ['list', 'retrieve']:
+        # Allow anyone to list/retrieve/search, restrict create/update/delete
+        if self.action in ['list', 'retrieve', 'search']:
             return [AllowAny()]
         return [IsAuthenticated()]
 
+    @swagger_auto_schema(
+        operation_description="List vehicles, newest model year first.",
+        manual_parameters=[
+            openapi.Parameter('available', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @swagger_auto_schema(
         operation_description="Create a new vehicle with images.",
         request_body=VehicleSerializer,
@@ -100,21 +132,145 @@ class VehicleViewSet(viewsets.ModelViewSet):
         if 'images' in request.FILES:
             for image in request.FILES.getlist('images'):
                 VehicleImage.objects.create(vehicle=vehicle, image=image)
+            # Drop the prefetched images so the response includes the new ones
+            vehicle._prefetched_objects_cache = {}
         return Response(self.get_serializer(vehicle).data)
 
+    @swagger_auto_schema(
+        operation_description=(
+            "Full-text search over make, model and condition (every word matches as a prefix), "
+            "best match first, with make / 5-year bucket / condition facet counts for all matches."
+        ),
+        query_serializer=VehicleSearchSerializer,
+        responses={200: 'Matching vehicles with count and facets', 400: 'Validation error'},
+    )
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request, *args, **kwargs):
+        return serve(request, self.cache_scope, None, lambda: self._search(request))
+
+    def _search(self, request):
+        params = VehicleSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        ids, count, facets = search_vehicles(params.validated_data.pop('q'), **params.validated_data)
+        rows = {row.id: row for row in self.flat_rows.values(Vehicle.objects.filter(id__in=ids))}
+        results = self.flat_rows.render([rows[vehicle_id] for vehicle_id in ids if vehicle_id in rows], request)
+        return Response({"count": count, "results": results, "facets": facets})
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Bulk import vehicles from a JSONL or CSV manifest plus a zip of their images. "
+            "Returns counts and per-row errors; bad rows are skipped. An unreadable manifest or "
+            "archive stops the import with a 400 naming the row it got to."
+        ),
+        manual_parameters=[
+            openapi.Parameter('manifest', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True,
+                              description="JSONL (.jsonl) or CSV (.csv) manifest"),
+            openapi.Parameter('archive', openapi.IN_FORM, type=openapi.TYPE_FILE, required=True,
+                              description="Zip of the images named in the manifest"),
+        ],
+        responses={200: 'Import report', 400: 'Validation error'},
+    )
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        manifest = request.FILES.get('manifest')
+        archive = request.FILES.get('archive')
+        if manifest is None or archive is None:
+            return Response({"error": "'manifest' and 'archive' files are required."}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get('format') or detect_format(manifest.name)
+        if fmt not in READERS:
+            return Response({"error": "Manifest must be .jsonl or .csv (or pass format=jsonl|csv)."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            report = import_vehicles(text_stream(manifest.file), fmt, archive=archive)
+        except zipfile.BadZipFile:
+            return Response({"error": "Archive is not a valid zip file."}, status=status.HTTP_400_BAD_REQUEST)
+        except ImportAborted as exc:
+            # Rows before the unreadable part were imported; say how far it got
+            return Response({"error": exc.error, "row": exc.row, **exc.report}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
 # Auction ViewSet
-class AuctionViewSet(viewsets.ModelViewSet):
-    queryset = Auction.objects.all()
+class AuctionViewSet(CachedReadMixin, FlatListMixin, viewsets.ModelViewSet):
+    cache_scope = 'auction'
+    # Joined/prefetched so list and retrieve cost a fixed number of queries
+    queryset = Auction.objects.select_related('vehicle', 'highest_bidder').prefetch_related('vehicle__images')
     serializer_class = AuctionSerializer
-    authentication_classes = [TokenAuthentication]
+    flat_rows = AuctionRows()
+    pagination_class = AuctionPagination
+    filter_backends = [AuctionStatusFilter]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     lookup_field = 'id'  # Use UUID for lookup
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'bids']:
             return [AllowAny()]
         return [IsAuthenticated()]
 
+    def get_queryset(self):
+        return super().get_queryset().with_status()
+
+    @swagger_auto_schema(
+        operation_description="List auctions, ending soonest first.",
+        manual_parameters=[
+            openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=list(AuctionStatusFilter.statuses)),
+            openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=list(AuctionPagination.orderings)),
+        ]
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Bids on this auction, newest first. The first page includes `latest`; pass it back "
+            "as `since` to get only the bids placed after it."
+        ),
+        manual_parameters=[
+            openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="`latest` from an earlier response"),
+        ],
+        responses={200: AuctionBidSerializer(many=True), 400: 'Invalid since cursor', 404: 'Auction not found'},
+    )
+    @action(detail=True, methods=['get'], url_path='bids',
+            serializer_class=AuctionBidSerializer, pagination_class=BidFeedPagination)
+    def bids(self, request, *args, **kwargs):
+        try:
+            auction_id = uuid.UUID(str(kwargs['id']))
+        except ValueError:
+            raise NotFound()
+        return serve(request, self.cache_scope, auction_id, lambda: self._bids(auction_id))
+
+    def _bids(self, auction_id):
+        page = self.paginate_queryset(Bid.objects.filter(auction_id=auction_id))
+        # Only an empty page needs to tell an unknown auction from a quiet one
+        if not page and not Auction.objects.filter(id=auction_id).exists():
+            raise NotFound()
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Set your maximum bid. The system bids for you, one increment above "
+            "the competition, until your maximum is reached."
+        ),
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT, required=['max_amount'],
+            properties={'max_amount': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DECIMAL)},
+        ),
+        responses={200: 'Resulting highest bid', 400: 'Validation error', 404: 'Auction not found'},
+    )
+    @action(detail=True, methods=['post'], url_path='proxy')
+    def proxy(self, request, *args, **kwargs):
+        try:
+            result = set_max_bid(kwargs['id'], request.user, request.data.get('max_amount'))
+        except BidRejected as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
+        return Response({
+            "highest_bid": str(result['highest_bid']),
+            "leading": result['highest_bidder_id'] == request.user.pk,
+        }, status=status.HTTP_200_OK)
+
     @swagger_auto_schema(
         operation_description="Create a new auction.",
         request_body=AuctionSerializer,
@@ -137,7 +293,8 @@ class AuctionViewSet(viewsets.ModelViewSet):
 class BidViewSet(viewsets.ModelViewSet):
     queryset = Bid.objects.all()
     serializer_class = BidSerializer
-    authentication_classes = [TokenAuthentication]
+    pagination_class = BidPagination
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     lookup_field = 'id'  # Use UUID for lookup
 
@@ -146,6 +303,11 @@ class BidViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAuthenticated()]
 
+    def get_throttles(self):
+        if self.action == 'create':
+            return [BidRateThrottle()] + super().get_throttles()
+        return super().get_throttles()
+
     @swagger_auto_schema(
         operation_description="Create a new bid.",
         request_body=BidSerializer,
@@ -165,20 +327,59 @@ class BidViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(bidder=self.request.user)
+        # Same compare-and-set path as PlaceBidView so both endpoints are race-free
+        try:
+            serializer.instance = submit_bid(
+                serializer.validated_data['auction'].id,
+                self.request.user,
+                serializer.validated_data['bid_amount'],
+            )
+        except BidRejected as exc:
+            raise ValidationError({"bid_amount": exc.message})
+
+# Bidder dashboard: the auctions the current user has bid on
+class MyAuctionsView(generics.ListAPIView):
+    serializer_class = MyAuctionSerializer
+    pagination_class = MyAuctionPagination
+    filter_backends = [MyAuctionStatusFilter]
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        # Per-user and always fresh, so neither the response cache nor the replicas
+        return Auction.objects.bid_on_by(self.request.user).select_related('vehicle')
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Auctions you have bid on, latest-ending first, with your best bid, the current "
+            "highest bid, your rank among the bidders and your status."
+        ),
+        manual_parameters=[
+            openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=list(MyAuctionStatusFilter.statuses)),
+        ],
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 # Place Bid API (DRF generic view)
 class PlaceBidView(generics.CreateAPIView):
     queryset = Bid.objects.all()
     serializer_class = BidSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     lookup_field = 'id'  # Use UUID for lookup
 
+    def get_throttles(self):
+        return [BidRateThrottle()] + super().get_throttles()
+
     @swagger_auto_schema(
         operation_description="Place a bid on an auction.",
         request_body=BidSerializer,
-        responses={201: openapi.Response('Bid placed successfully', BidSerializer), 400: 'Validation error'},
+        responses={
+            201: openapi.Response('Bid placed successfully', BidSerializer), 400: 'Validation error',
+            429: 'Too many bids on this auction; see Retry-After',
+        },
         manual_parameters=[]
     )
     def create(self, request, *args, **kwargs):
@@ -187,21 +388,8 @@ class PlaceBidView(generics.CreateAPIView):
         user = request.user
 
         try:
-            auction = Auction.objects.get(id=auction_id)
-        except Auction.DoesNotExist:
-            return Response({"error": "Auction not found."}, status=status.HTTP_404_NOT_FOUND)
-
-        if auction.end_time < now():
-            return Response({"error": "This auction has ended."}, status=status.HTTP_400_BAD_REQUEST)
-        if float(bid_amount) <= float(auction.highest_bid):
-            return Response({"error": "Your bid must be higher than the current highest bid."}, status=status.HTTP_400_BAD_REQUEST)
-        if float(bid_amount) < float(auction.starting_price):
-            return Response({"error": "Your bid must be higher than the starting price."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Removed max_price check for best auction practice
-        bid = Bid.objects.create(auction=auction, bidder=user, bid_amount=bid_amount)
-        auction.highest_bid = bid_amount
-        auction.highest_bidder = user
-        auction.save(update_fields=['highest_bid', 'highest_bidder'])
+            submit_bid(auction_id, user, bid_amount)
+        except BidRejected as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
 
         return Response({"success": "Bid placed successfully!"}, status=status.HTTP_201_CREATED)
@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'car_auction.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up: serves the live auction streams
+# (/api/auction/auctions/<id>/live/) and hands everything else to Django.
+from auction.live import live_application  # noqa: E402
+
+application = live_application(django_application)
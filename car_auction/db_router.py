@@ -0,0 +1,113 @@
+"""
+Primary/replica database routing.
+
+Writes always go to ``default``. Reads go there too unless the code doing
+them runs inside ``replica_reads()``, which the public auction and vehicle
+``list``/``retrieve`` handlers use (see auction.cache.serve); those reads
+are spread over DATABASE_REPLICAS.
+
+Read-your-writes: ReadYourWritesMiddleware marks a user in the cache after
+any successful write request they make, and for
+DATABASE_READ_YOUR_WRITES_SECONDS afterwards ``use_replica`` keeps their
+reads on the primary. The same window applies to data that changed
+recently, so a lagging replica is never read (and cached) right after a
+write. The mark lives in the default cache, so use a shared cache backend
+when running several workers.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _window():
+    return getattr(settings, 'DATABASE_READ_YOUR_WRITES_SECONDS', 5)
+
+
+def _sticky_key(user_id):
+    return f"db-primary-sticky:{user_id}"
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_replica(request, changed_at=None):
+    """
+    Whether a read for ``request`` may be served by a replica. ``changed_at``
+    is the time.time() of the last change to the data being read, if known.
+    """
+    if not _replicas():
+        return False
+    if changed_at is not None and time.time() - changed_at < _window():
+        return False
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and cache.get(_sticky_key(user.pk)):
+        return False
+    return True
+
+
+def mark_write(user):
+    cache.set(_sticky_key(user.pk), True, timeout=_window())
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = _replicas()
+        if replicas and _replica_reads.get():
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so saving an instance that was read from a replica still writes to the primary
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+class ReadYourWritesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self._after(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self._after(request, response)
+        return response
+
+    def _after(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and _replicas():
+            # DRF copies the user it authenticated onto the Django request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                mark_write(user)
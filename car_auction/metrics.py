@@ -0,0 +1,252 @@
+"""
+Per-request metrics.
+
+MetricsMiddleware records, for each view (``AuctionViewSet.list``,
+``PlaceBidView.post``, ...), the request latency, SQL query count and time,
+time spent producing serializer ``.data`` and response size. They are
+aggregated into per-process histograms served in the Prometheus text format
+at ``/api/metrics`` and summarised on each response in a ``Server-Timing``
+header.
+
+Queries are counted through a database execute wrapper (no DEBUG needed)
+that reports to the request found in a context variable, so queries run
+from async views' sync_to_async threads are counted too. Recording is a few
+perf_counter() calls and dict updates under a lock per request.
+"""
+import hmac
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+HISTOGRAMS = {
+    # name: (help, buckets, RequestStats attribute)
+    'http_request_duration_seconds': ("Request latency.", LATENCY_BUCKETS, 'duration'),
+    'http_request_db_queries': ("SQL queries per request.", QUERY_BUCKETS, 'queries'),
+    'http_request_db_duration_seconds': ("Time spent in SQL per request.", LATENCY_BUCKETS, 'db_time'),
+    'http_request_serializer_duration_seconds': ("Time spent producing serializer data per request.", LATENCY_BUCKETS, 'serializer_time'),
+    'http_response_size_bytes': ("Response body size.", SIZE_BUCKETS, 'size'),
+}
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestStats:
+    __slots__ = ('view', 'queries', 'db_time', 'serializer_time', 'duration', 'size')
+
+    def __init__(self):
+        self.view = 'unmatched'   # 404s and anything else that never reached a view
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.duration = 0.0
+        self.size = 0
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}   # (name, view, method) -> Histogram
+        self._responses = {}    # (view, method, status) -> count
+
+    def record(self, stats, method, status):
+        with self._lock:
+            for name, (_, buckets, attribute) in HISTOGRAMS.items():
+                key = (name, stats.view, method)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(buckets)
+                histogram.observe(getattr(stats, attribute))
+            key = (stats.view, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._responses.clear()
+
+    def render(self):
+        """The registry in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            histograms = {key: (list(h.counts), h.total, h.count) for key, h in self._histograms.items()}
+            responses = dict(self._responses)
+
+        lines = []
+        for name, (help_text, buckets, _) in HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (metric, view, method), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                labels = f'view="{view}",method="{method}"'
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'{name}_sum{{{labels}}} {total}')
+                lines.append(f'{name}_count{{{labels}}} {count}')
+        lines += ["# HELP http_responses_total Responses by view and status.", "# TYPE http_responses_total counter"]
+        for (view, method, status), count in sorted(responses.items()):
+            lines.append(f'http_responses_total{{view="{view}",method="{method}",status="{status}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += perf_counter() - started
+
+
+def _install_query_wrapper(sender=None, connection=None, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def view_name(view_func, method):
+    """``ViewSet.action`` for DRF viewsets, ``View.method`` for class views, else the function name."""
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    method = method.lower()
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return f"{cls.__name__}.{actions.get(method, method)}"
+    return f"{cls.__name__}.{method}"
+
+
+class TimedSerializerMixin:
+    """Counts time spent producing ``.data`` towards the current request's serializer time."""
+
+    @property
+    def data(self):
+        stats = _current.get()
+        if stats is None:
+            return super().data
+        started = perf_counter()
+        try:
+            return super().data
+        finally:
+            stats.serializer_time += perf_counter() - started
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+@contextmanager
+def timed_serialization():
+    """Counts the block towards the current request's serializer time, for response data built by hand."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_time += perf_counter() - started
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', True)
+        connection_created.connect(_install_query_wrapper, dispatch_uid='car_auction.metrics')
+        for connection in connections.all(initialized_only=True):
+            _install_query_wrapper(connection=connection)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats, token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, started)
+
+    def _start(self):
+        stats = RequestStats()
+        return stats, _current.set(stats), perf_counter()
+
+    def _finish(self, request, response, stats, started):
+        stats.duration = perf_counter() - started
+        # Set by URL resolution just before the view runs; process_view would
+        # cost a thread hop per request under ASGI
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            stats.view = view_name(match.func, request.method)
+        if not response.streaming:
+            stats.size = len(response.content)
+        registry.record(stats, request.method, response.status_code)
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'app;dur={stats.duration * 1000:.1f}, '
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+                f'ser;dur={stats.serializer_time * 1000:.1f}'
+            )
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, for ``Authorization: Bearer <METRICS_TOKEN>``
+    and logged-in staff. METRICS_PUBLIC opens it to everyone.
+    """
+    if not (getattr(settings, 'METRICS_PUBLIC', False) or request.user.is_staff or _has_metrics_token(request)):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _has_metrics_token(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    return bool(token) and hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f"Bearer {token}")
@@ -48,7 +48,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'car_auction.metrics.MetricsMiddleware',
+    'car_auction.db_router.ReadYourWritesMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves STATIC_ROOT (admin and API docs assets) under the ASGI server
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,6 +94,22 @@ DATABASES = {
     }
 }
 
+# Read replicas for the public auction/vehicle reads (car_auction.db_router):
+# comma-separated SQLite files kept in sync with the primary. Tests mirror
+# them onto the default database.
+DATABASE_REPLICAS = []
+for _index, _path in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_PATHS', '').split(','))):
+    DATABASES[f'replica{_index + 1}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': _path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{_index + 1}')
+DATABASE_ROUTERS = ['car_auction.db_router.PrimaryReplicaRouter']
+# How long a user's reads stay on the primary after they write, and how long
+# recently changed data is read from the primary only
+DATABASE_READ_YOUR_WRITES_SECONDS = float(os.environ.get('DATABASE_READ_YOUR_WRITES_SECONDS', 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -161,7 +182,7 @@ INSTALLED_APPS += [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -176,6 +197,40 @@ REST_FRAMEWORK = {
     },
 }
 
+# Per-process token -> user cache used by CachedTokenAuthentication.
+# SHARED_CACHE names a CACHES alias to also share entries between processes.
+TOKEN_AUTH_CACHE = {
+    'MAX_ENTRIES': int(os.environ.get('TOKEN_AUTH_CACHE_MAX_ENTRIES', 10000)),
+    'TTL': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 60)),
+    'SHARED_CACHE': os.environ.get('TOKEN_AUTH_CACHE_SHARED') or None,
+}
+
+# Per-(user, auction) bid rate limit on bid placement (auction/throttling.py):
+# BURST bids, then RATE per second. RATE 0 turns it off. SHARED_CACHE names a
+# CACHES alias to also enforce it across processes.
+BID_RATE_LIMIT = {
+    'RATE': float(os.environ.get('BID_RATE_LIMIT_RATE', 1)),
+    'BURST': int(os.environ.get('BID_RATE_LIMIT_BURST', 5)),
+    'MAX_ENTRIES': int(os.environ.get('BID_RATE_LIMIT_MAX_ENTRIES', 100000)),
+    'SHARED_CACHE': os.environ.get('BID_RATE_LIMIT_SHARED') or None,
+}
+
+# Password hashing pool used by login/register: worker threads, and how many
+# hash jobs may queue before new sign-ins get a 503
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 256))
+
+# Serve the auction/vehicle lists from flat values() rows (auction.rows)
+# instead of the nested serializers; the JSON is the same either way
+FLAT_LIST_SERIALIZATION = os.environ.get('FLAT_LIST_SERIALIZATION', 'True') == 'True'
+
+# Per-request metrics (car_auction.metrics): Server-Timing header on every
+# response. /api/metrics answers staff users and the METRICS_TOKEN bearer
+# token; METRICS_PUBLIC=True drops that check
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', 'True') == 'True'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'False') == 'True'
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Token': {
@@ -187,6 +242,36 @@ SWAGGER_SETTINGS = {
     },
 }
 
+# Bid placement: queue bids per auction and group-commit them from a single
+# writer thread. Opt-in; each process runs its own sequencer.
+BID_SEQUENCER_ENABLED = os.environ.get('BID_SEQUENCER_ENABLED', 'False') == 'True'
+BID_SEQUENCER_TIMEOUT = float(os.environ.get('BID_SEQUENCER_TIMEOUT', 10))
+
+# Live auction updates (SSE/WebSocket via car_auction/asgi.py). The in-memory
+# backend needs a single server process, which is how Dockerfile/render.yaml
+# run uvicorn; swap in a shared backend before adding worker processes.
+AUCTION_LIVE_BACKEND = os.environ.get('AUCTION_LIVE_BACKEND', 'auction.live.InMemoryBackend')
+
+# Public vehicle/auction list and detail responses are cached (auction/cache.py)
+# in the default cache. That is a per-process LocMemCache unless CACHES is
+# configured; use a shared backend when running several workers.
+PUBLIC_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_CACHE_TIMEOUT', 30))
+
+# Processes rendering WebP variants of uploaded vehicle images (auction/images.py).
+# 0 renders them inline on commit instead.
+IMAGE_VARIANT_WORKERS = int(os.environ.get('IMAGE_VARIANT_WORKERS', 2))
+
+# Outbound email queue (users/mail.py). Run `manage.py send_queued_emails` as a
+# worker; EMAIL_QUEUE_IN_PROCESS also drains it from the web process.
+EMAIL_QUEUE_IN_PROCESS = os.environ.get('EMAIL_QUEUE_IN_PROCESS', 'True') == 'True'
+EMAIL_QUEUE_BATCH_SIZE = int(os.environ.get('EMAIL_QUEUE_BATCH_SIZE', 50))
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get('EMAIL_QUEUE_MAX_ATTEMPTS', 5))
+EMAIL_QUEUE_RETRY_SECONDS = int(os.environ.get('EMAIL_QUEUE_RETRY_SECONDS', 30))
+
+# Admin changelists (auction/admin.py) count exactly up to this many rows and
+# estimate, or stop counting, beyond it
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get('ADMIN_EXACT_COUNT_LIMIT', 10000))
+
 logging.basicConfig(level=logging.INFO)
 
 # Note: For future JWT and role-based permissions, update DEFAULT_AUTHENTICATION_CLASSES and add custom permissions as needed.
\ No newline at end of file
@@ -17,6 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from auction import views as auction_views
+from car_auction.metrics import metrics_view
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_yasg.views import get_schema_view
@@ -43,6 +44,7 @@ urlpatterns = [
     # Grouping API under /api/
     path('api/users/', include('users.urls')),
     path('api/auction/', include('auction.urls')),
+    path('api/metrics', metrics_view, name='metrics'),
 
     # drf-yasg documentation
     path('api/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
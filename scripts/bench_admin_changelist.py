@@ -0,0 +1,102 @@
+"""
+Admin changelist latency and query count over a large bid table: the
+unfiltered first page, a date-filtered page and searches by vehicle and by
+bidder email. Render time of the HTML page is included.
+
+    python scripts/bench_admin_changelist.py --bids 200000 --auctions 2000 --repeat 10
+"""
+import argparse
+import json
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from benchutils import setup_django, create_users, percentile, Timer
+
+MAKES = ['Toyota', 'Honda', 'Ford', 'Volkswagen', 'BMW', 'Kia', 'Lotus']
+
+
+def populate(args):
+    from django.utils.timezone import now
+    from auction.models import Auction, Bid, Vehicle
+
+    rng = random.Random(11)
+    bidders = create_users(500, prefix='admin')
+    vehicles = Vehicle.objects.bulk_create([
+        Vehicle(make=MAKES[i % len(MAKES)], model=f"Model {i}", year=2000 + i % 25,
+                condition='Used', max_price=Decimal('50000'))
+        for i in range(args.auctions)
+    ])
+    start = now() - timedelta(days=30)
+    auctions = Auction.objects.bulk_create([
+        Auction(vehicle=vehicle, starting_price=Decimal('1000'), start_time=start, end_time=start + timedelta(days=60))
+        for vehicle in vehicles
+    ])
+    for offset in range(0, args.bids, 10000):
+        bids = [
+            Bid(auction=rng.choice(auctions), bidder=rng.choice(bidders), bid_amount=Decimal(1000 + n))
+            for n in range(offset, min(args.bids, offset + 10000))
+        ]
+        Bid.objects.bulk_create(bids)
+    # auto_now_add stamps every bid with the insert time; spread them out
+    Bid.objects.update(timestamp=start)
+
+
+def measure(client, url, params, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    times = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries, Timer() as timer:
+            response = client.get(url, params)
+        assert response.status_code == 200, response.status_code
+        times.append(timer.elapsed * 1000)
+    times.sort()
+    return {
+        "p50_ms": round(percentile(times, 50), 2),
+        "p95_ms": round(percentile(times, 95), 2),
+        "queries": len(queries),
+        "count": response.context['cl'].result_count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bids', type=int, default=200000)
+    parser.add_argument('--auctions', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    # Lets the test client hand back the template context (result_count)
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ['*']
+    populate(args)
+    admin_user = get_user_model().objects.create_superuser(
+        'benchadmin', 'benchadmin@example.com', 'pass', mobile='5559999999',
+    )
+    client = Client()
+    client.force_login(admin_user)
+    url = reverse('admin:auction_bid_changelist')
+
+    cases = {
+        "unfiltered": {},
+        "date_filtered": {'timestamp__gte': '2000-01-01 00:00:00+00:00'},
+        "search_vehicle": {'q': 'lotus'},
+        "search_email": {'q': 'admin42@'},
+    }
+    results = {"bids": args.bids}
+    for name, params in cases.items():
+        results[name] = measure(client, url, params, args.repeat)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
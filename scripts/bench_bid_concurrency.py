@@ -0,0 +1,149 @@
+"""
+Concurrent-bidder benchmark for a single hot auction.
+
+Runs N threads that keep outbidding each other on one auction for a fixed
+duration and reports accepted bids/sec and lost updates. A lost update is an
+accepted bid that was not higher than a bid accepted before it, or a final
+auction.highest_bid that does not match the best accepted bid.
+
+    python scripts/bench_bid_concurrency.py --threads 16 --seconds 10
+    python scripts/bench_bid_concurrency.py --mode legacy      # the old read/check/write path
+    python scripts/bench_bid_concurrency.py --mode sequencer   # per-auction group commit
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from decimal import Decimal
+
+from benchutils import setup_django, create_users, create_auction
+
+
+def legacy_place_bid(auction_id, user, bid_amount):
+    # The pre-CAS PlaceBidView logic, kept here only as a comparison baseline.
+    from django.utils.timezone import now
+    from auction.models import Auction, Bid
+    auction = Auction.objects.get(id=auction_id)
+    if auction.end_time < now():
+        return False
+    if float(bid_amount) <= float(auction.highest_bid):
+        return False
+    if float(bid_amount) < float(auction.starting_price):
+        return False
+    Bid.objects.bulk_create([Bid(auction=auction, bidder=user, bid_amount=bid_amount)])
+    auction.highest_bid = bid_amount
+    auction.highest_bidder = user
+    auction.save(update_fields=['highest_bid', 'highest_bidder'])
+    return True
+
+
+def cas_place_bid(auction_id, user, bid_amount):
+    from auction.bidding import place_bid, BidRejected
+    try:
+        place_bid(auction_id, user, bid_amount)
+    except BidRejected:
+        return False
+    return True
+
+
+def sequenced_place_bid(auction_id, user, bid_amount):
+    from auction.bidding import BidRejected
+    from auction.sequencer import sequencer
+    try:
+        sequencer.submit(auction_id, user, bid_amount)
+    except BidRejected:
+        return False
+    return True
+
+
+PLACE_BID = {
+    'cas': cas_place_bid,
+    'legacy': legacy_place_bid,
+    'sequencer': sequenced_place_bid,
+}
+
+
+def run(mode, threads, seconds):
+    from django.db import connection, connections, OperationalError
+    from auction.models import Auction
+
+    users = create_users(threads)
+    auction = create_auction(starting_price=1000)
+    place = PLACE_BID[mode]
+
+    counters = {'accepted': 0, 'rejected': 0, 'locked': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def bidder(user):
+        local = {'accepted': 0, 'rejected': 0, 'locked': 0}
+        rng = random.Random()
+        try:
+            while time.perf_counter() < deadline:
+                current = Auction.objects.values_list('highest_bid', flat=True).get(id=auction.id)
+                amount = max(current, auction.starting_price) + rng.randint(1, 50)
+                try:
+                    ok = place(auction.id, user, amount)
+                except OperationalError:
+                    local['locked'] += 1
+                    continue
+                local['accepted' if ok else 'rejected'] += 1
+        finally:
+            connections.close_all()
+            with lock:
+                for key, value in local.items():
+                    counters[key] += value
+
+    workers = [threading.Thread(target=bidder, args=(user,)) for user in users]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    # rowid follows insertion (commit) order in SQLite
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT bid_amount FROM auction_bid WHERE auction_id = %s ORDER BY rowid",
+            [auction.id.hex],
+        )
+        amounts = [Decimal(str(row[0])) for row in cursor.fetchall()]
+
+    lost = 0
+    best = Decimal('-1')
+    for amount in amounts:
+        if amount <= best:
+            lost += 1
+        best = max(best, amount)
+    auction.refresh_from_db()
+    if amounts and auction.highest_bid != best:
+        lost += 1
+
+    return {
+        'mode': mode,
+        'threads': threads,
+        'seconds': round(elapsed, 3),
+        'accepted': counters['accepted'],
+        'rejected': counters['rejected'],
+        'database_locked': counters['locked'],
+        'accepted_per_sec': round(counters['accepted'] / elapsed, 1),
+        'lost_updates': lost,
+        'final_highest_bid': str(auction.highest_bid),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=sorted(PLACE_BID), default='cas')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        print(json.dumps(run(args.mode, args.threads, args.seconds), indent=2))
+    finally:
+        os.remove(db_path)
@@ -0,0 +1,77 @@
+"""
+Cost of keeping a bid ladder current through /api/auction/auctions/<id>/bids/:
+downloading the whole history page by page versus a ``?since=`` refresh
+that only returns the bids placed since the last one seen.
+
+    python scripts/bench_bid_feed.py --bids 5000 --new 3 --repeat 20
+"""
+import argparse
+import json
+
+from benchutils import setup_django, create_users, create_auction, Timer
+
+
+def fetch(client, url, params=None):
+    """Follow ``next`` links to the end; returns (rows, requests, latest token from the first page)."""
+    response = client.get(url, params or {}, HTTP_ACCEPT='application/json').json()
+    rows, requests, latest = len(response['results']), 1, response['latest']
+    while response['next']:
+        response = client.get(response['next'], HTTP_ACCEPT='application/json').json()
+        rows += len(response['results'])
+        requests += 1
+    return rows, requests, latest
+
+
+def measure(run, repeat):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries, Timer() as timer:
+        for _ in range(repeat):
+            cache.clear()   # measure the database path, not the response cache
+            rows, requests, _ = run()
+    return {
+        "ms_per_refresh": round(timer.elapsed / repeat * 1000, 2),
+        "rows": rows,
+        "requests": requests,
+        "queries": len(queries) // repeat,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bids', type=int, default=5000)
+    parser.add_argument('--new', type=int, default=3, help="Bids placed between the two refreshes.")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+    from django.urls import reverse
+    from rest_framework.throttling import SimpleRateThrottle
+    from auction.bidding import place_bid
+
+    # The anonymous rate limit would cut the full download short
+    SimpleRateThrottle.THROTTLE_RATES = {'anon': None, 'user': None}
+
+    bidders = create_users(20)
+    auction = create_auction(starting_price=1)
+    for n in range(args.bids):
+        place_bid(auction.id, bidders[n % len(bidders)], 1 + n)
+    client = Client()
+    url = reverse('auction-bids', kwargs={'id': str(auction.id)})
+    _, _, latest = fetch(client, url)
+    for n in range(args.new):
+        place_bid(auction.id, bidders[n % len(bidders)], 1 + args.bids + n)
+
+    results = {
+        "bids": args.bids + args.new,
+        "full_history": measure(lambda: fetch(client, url, {'page_size': 100}), args.repeat),
+        "since_refresh": measure(lambda: fetch(client, url, {'since': latest}), args.repeat),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Before/after latency of the bid and auction access patterns for the
+composite indexes added in auction/migrations/0005_bid_access_path_indexes.py.
+
+Seeds a fully migrated scratch database (1M bids by default) with every Bid
+index that can serve these queries dropped, times each query, recreates the
+indexes and times them again.
+Only the indexes are touched, so the script follows later schema changes.
+
+    python scripts/bench_bid_indexes.py --bids 1000000 --auctions 1000 --users 1000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from benchutils import setup_django, Timer
+
+# The Bid indexes 0005 added, under their current names (0010 widened
+# bid_auction_time_idx into bid_auction_time_id_idx), and the later ones that
+# also lead with auction or bidder. Leaving any of those in place would let the
+# baseline read through it.
+INDEXES = (
+    'bid_auction_amount_idx', 'bid_auction_time_id_idx', 'bid_bidder_time_idx',
+    'bid_auction_bidder_idx', 'bid_bidder_auction_idx',
+)
+
+
+def seed(auctions, users, bids):
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.utils.timezone import now
+    from auction.models import Vehicle, Auction
+
+    User = get_user_model()
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    User.objects.bulk_create([
+        User(id=user_id, username=f"idx{i}", email=f"idx{i}@example.com", mobile=f"7{i:09d}")
+        for i, user_id in enumerate(user_ids)
+    ], batch_size=1000)
+
+    start = now() - timedelta(days=30)
+    vehicles = Vehicle.objects.bulk_create([
+        Vehicle(make='Bench', model=f"Model {i}", year=2020, condition='Used', max_price=Decimal('50000'))
+        for i in range(auctions)
+    ], batch_size=1000)
+    auction_rows = Auction.objects.bulk_create([
+        Auction(vehicle=vehicle, starting_price=Decimal('1000'), start_time=start,
+                end_time=start + timedelta(days=random.randint(1, 60)))
+        for vehicle in vehicles
+    ], batch_size=1000)
+    auction_ids = [auction.id for auction in auction_rows]
+
+    # Raw executemany: bulk_create is too slow for a million rows
+    ops = connection.ops
+    sql = "INSERT INTO auction_bid (id, bid_amount, timestamp, auction_id, bidder_id) VALUES (%s, %s, %s, %s, %s)"
+    chunk = 50000
+    with transaction.atomic(), connection.cursor() as cursor:
+        for offset in range(0, bids, chunk):
+            rows = []
+            for i in range(offset, min(bids, offset + chunk)):
+                rows.append((
+                    uuid.uuid4().hex,
+                    str(Decimal(1000 + random.randint(0, 100000))),
+                    ops.adapt_datetimefield_value(start + timedelta(seconds=i)),
+                    random.choice(auction_ids).hex,
+                    random.choice(user_ids).hex,
+                ))
+            cursor.executemany(sql, rows)
+    return auction_ids, user_ids
+
+
+def patterns(auction_ids, user_ids):
+    from django.utils.timezone import now
+    from auction.models import Auction, Bid
+    return {
+        'auction_bids_by_amount': lambda: list(
+            Bid.objects.filter(auction_id=random.choice(auction_ids)).order_by('-bid_amount')[:20]),
+        'auction_bids_by_time': lambda: list(
+            Bid.objects.filter(auction_id=random.choice(auction_ids)).order_by('timestamp')[:20]),
+        'latest_bids_by_user': lambda: list(
+            Bid.objects.filter(bidder_id=random.choice(user_ids)).order_by('-timestamp')[:20]),
+        'auctions_by_end_time': lambda: list(
+            Auction.objects.filter(end_time__gt=now()).order_by('end_time')[:20]),
+    }
+
+
+def measure(queries, repeat):
+    results = {}
+    for name, query in queries.items():
+        query()  # warm up
+        timings = []
+        for _ in range(repeat):
+            with Timer() as timer:
+                query()
+            timings.append(timer.elapsed * 1000)
+        results[name] = {
+            'median_ms': round(statistics.median(timings), 3),
+            'max_ms': round(max(timings), 3),
+        }
+    return results
+
+
+def set_indexes(present):
+    """Drop or recreate INDEXES as the Bid model defines them."""
+    from django.db import connection
+    from auction.models import Bid
+    indexes = {index.name: index for index in Bid._meta.indexes}
+    with connection.schema_editor() as editor:
+        for name in INDEXES:
+            if present:
+                editor.add_index(Bid, indexes[name])
+            else:
+                editor.remove_index(Bid, indexes[name])
+
+
+def analyze():
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bids', type=int, default=1000000)
+    parser.add_argument('--auctions', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+    try:
+        set_indexes(False)
+        with Timer() as seeding:
+            auction_ids, user_ids = seed(args.auctions, args.users, args.bids)
+        analyze()
+        queries = patterns(auction_ids, user_ids)
+
+        before = measure(queries, args.repeat)
+        with Timer() as indexing:
+            set_indexes(True)
+            analyze()
+        after = measure(queries, args.repeat)
+
+        print(json.dumps({
+            'bids': args.bids,
+            'seed_seconds': round(seeding.elapsed, 1),
+            'index_build_seconds': round(indexing.elapsed, 1),
+            'patterns': {
+                name: {'before': before[name], 'after': after[name]} for name in queries
+            },
+        }, indent=2))
+    finally:
+        os.remove(db_path)
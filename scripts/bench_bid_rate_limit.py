@@ -0,0 +1,106 @@
+"""
+Per-check cost of the bid rate limiter (auction.throttling) next to DRF's
+UserRateThrottle, which the bid endpoints already run on every request
+(LocMemCache, so neither figure includes a network round trip).
+
+'hot' keeps checking one (user, auction) bucket, 'spread' cycles through
+--keys of them, 'shared' adds the SHARED_CACHE tier and 'threads' runs
+'spread' from --threads threads at once.
+
+    python scripts/bench_bid_rate_limit.py --checks 200000 --keys 10000 --threads 4
+"""
+import argparse
+import json
+import threading
+import uuid
+
+from benchutils import setup_django, Timer
+
+
+def per_check(run, checks):
+    with Timer() as timer:
+        run(checks)
+    return round(timer.elapsed / checks * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=200000)
+    parser.add_argument('--keys', type=int, default=10000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.cache import cache
+    from rest_framework.test import APIRequestFactory
+    from rest_framework.throttling import UserRateThrottle
+    from rest_framework.views import APIView
+    from auction.throttling import BidRateLimiter
+
+    # Generous enough that every check goes down the "allowed" path
+    settings.BID_RATE_LIMIT = {'RATE': 1e9, 'BURST': 10 ** 9}
+    keys = [(uuid.uuid4(), uuid.uuid4()) for _ in range(args.keys)]
+    hot = keys[0]
+
+    def hot_run(checks, limiter=None):
+        limiter = limiter or BidRateLimiter()
+        check = limiter.check
+        for _ in range(checks):
+            check(*hot)
+
+    def spread_run(checks, limiter=None):
+        limiter = limiter or BidRateLimiter()
+        check = limiter.check
+        for n in range(checks):
+            check(*keys[n % len(keys)])
+
+    def shared_run(checks):
+        settings.BID_RATE_LIMIT = dict(settings.BID_RATE_LIMIT, SHARED_CACHE='default')
+        try:
+            spread_run(checks)
+        finally:
+            settings.BID_RATE_LIMIT = {'RATE': 1e9, 'BURST': 10 ** 9}
+            cache.clear()
+
+    def threaded_run(checks):
+        limiter = BidRateLimiter()
+        workers = [
+            threading.Thread(target=spread_run, args=(checks // args.threads, limiter))
+            for _ in range(args.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    request = APIRequestFactory().post('/api/auction/bids/place/')
+    request.user = type('BenchUser', (), {'is_authenticated': True, 'pk': hot[0]})()
+    UserRateThrottle.THROTTLE_RATES = {'user': f'{10 ** 9}/day'}
+
+    def drf_run(checks):
+        # Its cost grows with the request history it stores per user; keep that
+        # to the last 10 requests, i.e. a light user
+        throttle, view = UserRateThrottle(), APIView()
+        key = throttle.get_cache_key(request, view)
+        for n in range(checks):
+            if n % 10 == 0:
+                cache.delete(key)
+            throttle.allow_request(request, view)
+
+    results = {
+        "us_per_check": {
+            "hot": per_check(hot_run, args.checks),
+            "spread": per_check(spread_run, args.checks),
+            "shared": per_check(shared_run, args.checks // 10),
+            "threads": per_check(threaded_run, args.checks),
+            "drf_user_rate_throttle": per_check(drf_run, args.checks // 10),
+        },
+        "keys": args.keys,
+        "threads": args.threads,
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
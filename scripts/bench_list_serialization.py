@@ -0,0 +1,96 @@
+"""
+Per-row cost of building the auction and vehicle list pages, DRF serializers
+versus the flat values() path in auction.rows. Times the serialization on
+its own (rows already fetched) and together with the queries that feed it.
+The flat path loads images while rendering, so its serialize figure
+includes that query; compare the totals for the full picture.
+
+    python scripts/bench_list_serialization.py --rows 100 --repeat 50
+"""
+import argparse
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from benchutils import setup_django, create_users, Timer
+
+
+def measure(fetch, render, rows, repeat):
+    fetched = fetch()
+    with Timer() as serialize:
+        for _ in range(repeat):
+            render(fetched)
+    with Timer() as total:
+        for _ in range(repeat):
+            render(fetch())
+    return {
+        "serialize_us_per_row": round(serialize.elapsed / (repeat * rows) * 1e6, 2),
+        "total_us_per_row": round(total.elapsed / (repeat * rows) * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100, help="Rows per page.")
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.utils.timezone import now
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from auction.models import Vehicle, VehicleImage, Auction
+    from auction.rows import VehicleRows, AuctionRows
+    from auction.serializers import VehicleSerializer, AuctionSerializer
+
+    bidders = create_users(10)
+    start = now() - timedelta(hours=1)
+    vehicles = Vehicle.objects.bulk_create([
+        Vehicle(make='Bench', model=f'Car {i}', year=2010 + i % 15, condition='Used', max_price=Decimal('25000'))
+        for i in range(args.rows)
+    ])
+    VehicleImage.objects.bulk_create([
+        VehicleImage(
+            vehicle=vehicle, image=f'vehicle_images/{vehicle.id}_{n}.jpg',
+            variants={size: f'vehicle_images/{vehicle.id}_{n}_{size}.webp' for size in ('thumbnail', 'card', 'full')},
+        )
+        for vehicle in vehicles for n in range(3)
+    ])
+    Auction.objects.bulk_create([
+        Auction(
+            vehicle=vehicle, starting_price=1000, start_time=start, end_time=start + timedelta(days=1, minutes=i),
+            highest_bid=1000 + i, highest_bidder=bidders[i % len(bidders)],
+        )
+        for i, vehicle in enumerate(vehicles)
+    ])
+
+    request = Request(APIRequestFactory().get('/api/auction/auctions/'))
+    renderer = JSONRenderer()
+    auctions = Auction.objects.select_related('vehicle', 'highest_bidder').prefetch_related('vehicle__images').with_status().order_by('end_time', 'id')
+    vehicle_list = Vehicle.objects.prefetch_related('images').order_by('id')
+    flat_auctions, flat_vehicles = AuctionRows(), VehicleRows()
+
+    def serializer(serializer_class):
+        return lambda page: renderer.render(serializer_class(page, many=True, context={'request': request}).data)
+
+    def flat(rows):
+        return lambda page: renderer.render(rows.render(page, request))
+
+    cases = {
+        "auction_list": {
+            "serializer": measure(lambda: list(auctions), serializer(AuctionSerializer), args.rows, args.repeat),
+            "flat": measure(lambda: list(flat_auctions.values(auctions)), flat(flat_auctions), args.rows, args.repeat),
+        },
+        "vehicle_list": {
+            "serializer": measure(lambda: list(vehicle_list), serializer(VehicleSerializer), args.rows, args.repeat),
+            "flat": measure(lambda: list(flat_vehicles.values(vehicle_list)), flat(flat_vehicles), args.rows, args.repeat),
+        },
+    }
+    for case in cases.values():
+        case["serialize_speedup"] = round(case["serializer"]["serialize_us_per_row"] / case["flat"]["serialize_us_per_row"], 1)
+    print(json.dumps({"rows": args.rows, "repeat": args.repeat, **cases}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
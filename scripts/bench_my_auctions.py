@@ -0,0 +1,97 @@
+"""
+Latency of the bidder dashboard (/api/auction/me/) for one user with a fixed
+amount of activity while the rest of the platform's bid volume grows.
+
+    python scripts/bench_my_auctions.py --sizes 100000,500000,1000000 --mine 50
+"""
+import argparse
+import json
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from benchutils import setup_django, create_users, percentile, Timer
+
+AUCTIONS = 5000
+
+
+def populate(auctions, bidders, me, mine, rng):
+    """The user's own bids: three on each of ``mine`` auctions, some of them outbid later."""
+    from auction.bidding import place_bid
+    for auction in auctions[:mine]:
+        for step in range(3):
+            place_bid(auction.id, me, 1000 + 10 * step)
+        if rng.random() < 0.5:
+            place_bid(auction.id, rng.choice(bidders), 1100)
+
+
+def grow(auctions, bidders, target, rng):
+    """Other users' bids, written directly at increasing amounts per auction."""
+    from auction.models import Bid
+    highest = {auction.id: 100000 for auction in auctions}
+    while Bid.objects.count() < target:
+        batch = []
+        for _ in range(min(10000, target - Bid.objects.count())):
+            auction = rng.choice(auctions)
+            highest[auction.id] += 1
+            batch.append(Bid(auction=auction, bidder=rng.choice(bidders), bid_amount=Decimal(highest[auction.id])))
+        Bid.objects.bulk_create(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100000,500000,1000000')
+    parser.add_argument('--mine', type=int, default=50, help="Auctions the measured user has bid on.")
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from django.utils.timezone import now
+    from rest_framework.test import APIClient
+    from rest_framework.throttling import SimpleRateThrottle
+    from auction.models import Auction, Vehicle
+
+    settings.ALLOWED_HOSTS = ['*']
+    SimpleRateThrottle.THROTTLE_RATES = {'anon': None, 'user': None}
+    rng = random.Random(5)
+    me = create_users(1, prefix='me')[0]
+    bidders = create_users(1000, prefix='crowd')
+    vehicles = Vehicle.objects.bulk_create([
+        Vehicle(make='Bench', model=f"Car {i}", year=2020, condition='Used', max_price=Decimal('99999'))
+        for i in range(AUCTIONS)
+    ])
+    start = now() - timedelta(hours=1)
+    auctions = Auction.objects.bulk_create([
+        Auction(vehicle=vehicle, starting_price=Decimal('1000'), start_time=start, end_time=start + timedelta(days=1, minutes=i))
+        for i, vehicle in enumerate(vehicles)
+    ])
+    populate(auctions, bidders, me, args.mine, rng)
+
+    client = APIClient()
+    client.force_authenticate(me)
+    url = reverse('my-auctions')
+    results = []
+    for size in sorted(int(value) for value in args.sizes.split(',')):
+        grow(auctions[args.mine:], bidders, size, rng)
+        times = []
+        for _ in range(args.repeat):
+            with CaptureQueriesContext(connection) as queries, Timer() as timer:
+                response = client.get(url, {'page_size': 50})
+            times.append(timer.elapsed * 1000)
+        times.sort()
+        results.append({
+            "platform_bids": size,
+            "rows": len(response.json()['results']),
+            "queries": len(queries),
+            "p50_ms": round(percentile(times, 50), 2),
+            "p95_ms": round(percentile(times, 95), 2),
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
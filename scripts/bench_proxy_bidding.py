@@ -0,0 +1,95 @@
+"""
+Requests and Bid rows needed to settle the same bidding contest with manual
+increments (each bidder re-bids whenever outbid) versus proxy maximums
+(each bidder registers once).
+
+    python scripts/bench_proxy_bidding.py --bidders 20 --auctions 20
+"""
+import argparse
+import json
+import random
+from decimal import Decimal
+
+from benchutils import setup_django, create_users, create_auction, Timer
+
+
+def manual_war(auction, users, valuations):
+    from auction.bidding import BidRejected, place_bid
+    from auction.models import Auction
+    from auction.proxy import bid_increment
+
+    requests = 0
+    while True:
+        state = Auction.objects.values('highest_bid', 'highest_bidder_id', 'starting_price').get(id=auction.id)
+        if state['highest_bidder_id'] is None:
+            amount = state['starting_price']
+        else:
+            amount = state['highest_bid'] + bid_increment(state['highest_bid'])
+        challengers = [
+            user for user in users
+            if user.pk != state['highest_bidder_id'] and valuations[user.pk] >= amount
+        ]
+        if not challengers:
+            return requests
+        requests += 1
+        try:
+            place_bid(auction.id, random.choice(challengers), amount)
+        except BidRejected:
+            pass
+
+
+def proxy_war(auction, users, valuations):
+    from auction.bidding import BidRejected, set_max_bid
+
+    requests = 0
+    for user in users:
+        requests += 1
+        try:
+            set_max_bid(auction.id, user, valuations[user.pk])
+        except BidRejected:
+            pass
+    return requests
+
+
+def run(strategy, auctions, bidders, seed):
+    from django.contrib.auth import get_user_model
+    from auction.models import Bid
+
+    random.seed(seed)
+    users = list(get_user_model().objects.order_by('username')[:bidders])
+    requests = 0
+    results = []
+    with Timer() as timer:
+        for _ in range(auctions):
+            auction = create_auction(starting_price=1000)
+            valuations = {user.pk: Decimal(random.randrange(1000, 20000)) for user in users}
+            requests += strategy(auction, users, valuations)
+            auction.refresh_from_db()
+            results.append(auction.highest_bid)
+    bids = Bid.objects.count()
+    Bid.objects.all().delete()
+    return {
+        "requests": requests,
+        "bid_rows": bids,
+        "seconds": round(timer.elapsed, 3),
+        "mean_final_price": str(sum(results) / len(results)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bidders', type=int, default=20)
+    parser.add_argument('--auctions', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django()
+    create_users(args.bidders)
+    print(json.dumps({
+        "manual": run(manual_war, args.auctions, args.bidders, args.seed),
+        "proxy": run(proxy_war, args.auctions, args.bidders, args.seed),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
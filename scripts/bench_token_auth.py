@@ -0,0 +1,59 @@
+"""
+Per-request cost of token authentication, plain DRF TokenAuthentication
+versus users.authentication.CachedTokenAuthentication.
+
+    python scripts/bench_token_auth.py --requests 20000 --users 100
+"""
+import argparse
+import json
+import random
+
+from benchutils import setup_django, create_users, Timer
+
+
+def run(authenticator, requests):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries, Timer() as timer:
+        for request in requests:
+            authenticator.authenticate(request)
+    return {
+        "us_per_request": round(timer.elapsed / len(requests) * 1e6, 2),
+        "queries": len(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIRequestFactory
+    from users.authentication import CachedTokenAuthentication, token_cache
+
+    create_users(args.users)
+    tokens = [Token.objects.create(user=user).key for user in get_user_model().objects.all()]
+    factory = APIRequestFactory()
+    requests = [
+        factory.get('/api/auction/auctions/', HTTP_AUTHORIZATION=f"Token {random.choice(tokens)}")
+        for _ in range(args.requests)
+    ]
+
+    token_cache.clear()
+    results = {
+        "plain": run(TokenAuthentication(), requests),
+        "cached": run(CachedTokenAuthentication(), requests),
+        "cache_hits": token_cache.hits,
+        "cache_misses": token_cache.misses,
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Vehicle search latency (auction.search.search_vehicles) as the inventory
+grows. 'rare' matches the same 50 vehicles at every size; the other
+queries match a fixed share of the inventory. 'like_scan' is the same
+count-and-facets done with icontains filters, for comparison.
+
+    python scripts/bench_vehicle_search.py --sizes 10000,100000,300000
+"""
+import argparse
+import json
+import random
+from decimal import Decimal
+
+from benchutils import setup_django, percentile, Timer
+
+MAKES = {
+    'Toyota': ['Camry', 'Corolla', 'RAV4', 'Prius', 'Hilux'],
+    'Honda': ['Civic', 'Accord', 'CR-V', 'Jazz'],
+    'Ford': ['Focus', 'Fiesta', 'Mustang', 'Ranger', 'Transit'],
+    'Volkswagen': ['Golf', 'Polo', 'Passat', 'Tiguan'],
+    'BMW': ['320i', 'X3', 'X5', 'M3'],
+    'Kia': ['Rio', 'Sportage', 'Ceed', 'Picanto'],
+}
+CONDITIONS = ['New', 'Used', 'Certified', 'Salvage']
+RARE = 50
+QUERIES = {
+    'rare': ('elise', {}),
+    'narrow': ('mustang', {}),
+    'broad': ('toyota', {}),
+    'filtered': ('ford', {'year_min': 2018, 'price_max': Decimal('20000')}),
+}
+
+
+def grow(target, rng):
+    from auction.models import Vehicle
+    if not Vehicle.objects.exists():
+        Vehicle.objects.bulk_create([
+            Vehicle(make='Lotus', model='Elise', year=2005 + i % 15, condition='Used', max_price=Decimal('40000'))
+            for i in range(RARE)
+        ])
+    while Vehicle.objects.count() < target:
+        batch = []
+        for _ in range(min(5000, target - Vehicle.objects.count())):
+            make = rng.choice(list(MAKES))
+            batch.append(Vehicle(
+                make=make, model=f"{rng.choice(MAKES[make])} {rng.choice(['', 'Sport', 'Hybrid', 'Limited'])}".strip(),
+                year=rng.randrange(1995, 2026), condition=rng.choice(CONDITIONS),
+                max_price=Decimal(rng.randrange(2000, 90000)),
+            ))
+        Vehicle.objects.bulk_create(batch)
+
+
+def measure(run, repeat):
+    times = []
+    for _ in range(repeat):
+        with Timer() as timer:
+            run()
+        times.append(timer.elapsed * 1000)
+    times.sort()
+    return {"p50_ms": round(percentile(times, 50), 2), "p95_ms": round(percentile(times, 95), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,100000,300000')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db.models import Count, Q
+    from auction.models import Vehicle
+    from auction.search import search_vehicles
+
+    rng = random.Random(7)
+    results = []
+    for size in sorted(int(value) for value in args.sizes.split(',')):
+        grow(size, rng)
+        row = {"vehicles": size}
+        for name, (text, filters) in QUERIES.items():
+            count = search_vehicles(text, **filters)[1]
+            row[name] = dict(measure(lambda: search_vehicles(text, **filters), args.repeat), matches=count)
+        like = Vehicle.objects.filter(Q(make__icontains='mustang') | Q(model__icontains='mustang'))
+        row["like_scan"] = measure(
+            lambda: (list(like[:20]), list(like.values('make', 'year', 'condition').annotate(count=Count('id')))),
+            args.repeat,
+        )
+        results.append(row)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
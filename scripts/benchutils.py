@@ -0,0 +1,76 @@
+"""
+Shared helpers for the benchmark scripts in this folder.
+
+Benchmarks run against a throwaway SQLite file (never the project db.sqlite3)
+and talk to the ORM directly, so no server needs to be running.
+"""
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from datetime import timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django(db_path=None):
+    """Point Django at a scratch database, migrate it and return its path."""
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'car_auction.settings')
+
+    import django
+    from django.conf import settings
+
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='bench_', suffix='.sqlite3')
+        os.close(fd)
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def create_users(count, prefix='bench'):
+    from django.contrib.auth import get_user_model
+    User = get_user_model()
+    users = [
+        User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com", mobile=f"{prefix[:3]}{i:09d}")
+        for i in range(count)
+    ]
+    User.objects.bulk_create(users)
+    return users
+
+
+def create_auction(starting_price=1000, duration=timedelta(hours=1), make='Bench', model='Car'):
+    from django.utils.timezone import now
+    from auction.models import Vehicle, Auction
+    vehicle = Vehicle.objects.create(
+        make=make, model=model, year=2020, condition='Used', max_price=Decimal('99999')
+    )
+    return Auction.objects.create(
+        vehicle=vehicle,
+        starting_price=Decimal(starting_price),
+        start_time=now() - timedelta(minutes=1),
+        end_time=now() + duration,
+    )
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
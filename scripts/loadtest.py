@@ -0,0 +1,267 @@
+"""
+Load test for browsing, bidding and login against a running server.
+
+Step 1 provisions users (with tokens and a shared password) and open
+auctions straight into the database the server uses, and writes a fixture
+file. Step 2 drives a weighted mix of requests from concurrent asyncio
+clients (plain HTTP/1.1 keep-alive, no extra packages) and prints a JSON
+report with throughput and p50/p95/p99 latency per endpoint, so runs can be
+diffed between releases.
+
+    python scripts/loadtest.py provision --db db.sqlite3 --users 200 --auctions 50
+    python manage.py runserver --noreload      # or: uvicorn car_auction.asgi:application
+    python scripts/loadtest.py run --concurrency 50 --duration 30 \\
+        --mix browse=60,detail=15,bid=20,login=5 --output before.json
+
+Responses are counted per status code. The default DRF throttle rates
+(REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']) turn most anonymous traffic into
+429s within seconds, and BID_RATE_LIMIT caps each user's bids per auction,
+so raise both on the server under test when measuring capacity rather than
+throttling.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from benchutils import percentile
+
+ENDPOINTS = {
+    'browse': ('GET', '/api/auction/auctions/?page_size=20'),
+    'detail': ('GET', '/api/auction/auctions/{auction}/'),
+    'bid': ('POST', '/api/auction/bids/place/'),
+    'login': ('POST', '/api/users/login/'),
+}
+
+
+def provision(args):
+    from benchutils import setup_django, create_users, create_auction
+    setup_django(args.db)
+    from datetime import timedelta
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.authtoken.models import Token
+
+    # create_users derives mobiles from the first three characters, so vary those per run
+    prefix = f"{random.randrange(100, 1000)}load_"
+    users = create_users(args.users, prefix=prefix)
+    # Hash once and share it; hashing per user would dominate provisioning
+    get_user_model().objects.filter(pk__in=[user.pk for user in users]).update(password=make_password(args.password))
+    tokens = Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+    auctions = [
+        create_auction(starting_price=args.starting_price, duration=timedelta(hours=args.hours), make='Load', model=f"{prefix}{n}")
+        for n in range(args.auctions)
+    ]
+    fixture = {
+        "users": [{"email": user.email, "token": token.key} for user, token in zip(users, tokens)],
+        "password": args.password,
+        "auctions": [{"id": str(auction.id), "starting_price": str(auction.starting_price)} for auction in auctions],
+    }
+    with open(args.fixture, 'w') as handle:
+        json.dump(fixture, handle, indent=2)
+    print(f"Provisioned {len(users)} users and {len(auctions)} auctions into {args.db}; fixture in {args.fixture}")
+
+
+class HttpClient:
+    """Minimal keep-alive HTTP/1.1 client: enough for JSON request/response pairs."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b''
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Accept: application/json"]
+        if body is not None:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+        await self.writer.drain()
+        try:
+            return await self._read_response()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            await self.close()
+            raise
+
+    async def _read_response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+        else:
+            body = await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, body
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class LoadTest:
+    def __init__(self, fixture, base_url, mix, concurrency, duration, seed):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.users = fixture['users']
+        self.password = fixture['password']
+        self.auctions = fixture['auctions']
+        self.prices = {auction['id']: Decimal(auction['starting_price']) for auction in self.auctions}
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.random = random.Random(seed)
+        self.latencies = {name: [] for name in self.names}
+        self.statuses = {name: {} for name in self.names}
+        self.errors = {name: 0 for name in self.names}
+
+    def build(self, name):
+        method, path = ENDPOINTS[name]
+        user = self.random.choice(self.users)
+        headers, body = {}, None
+        if name == 'detail':
+            path = path.format(auction=self.random.choice(self.auctions)['id'])
+        elif name == 'bid':
+            auction_id = self.random.choice(self.auctions)['id']
+            # Bid a little over the last price we know of; stale guesses get 400s, like real users
+            self.prices[auction_id] += Decimal(self.random.randrange(10, 100))
+            headers['Authorization'] = f"Token {user['token']}"
+            body = {"auction": auction_id, "bid_amount": str(self.prices[auction_id])}
+        elif name == 'login':
+            body = {"email": user['email'], "password": self.password}
+        return method, path, headers, body
+
+    async def worker(self, deadline):
+        client = HttpClient(self.host, self.port)
+        try:
+            while time.perf_counter() < deadline:
+                name = self.random.choices(self.names, self.weights)[0]
+                method, path, headers, body = self.build(name)
+                started = time.perf_counter()
+                try:
+                    status, _ = await client.request(method, path, headers, body)
+                except (OSError, ValueError, asyncio.IncompleteReadError):
+                    self.errors[name] += 1
+                    continue
+                self.latencies[name].append((time.perf_counter() - started) * 1000)
+                self.statuses[name][status] = self.statuses[name].get(status, 0) + 1
+        finally:
+            await client.close()
+
+    async def run(self):
+        started = time.perf_counter()
+        deadline = started + self.duration
+        await asyncio.gather(*(self.worker(deadline) for _ in range(self.concurrency)))
+        return self.report(time.perf_counter() - started)
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name in self.names:
+            latencies = sorted(self.latencies[name])
+            endpoints[name] = {
+                "requests": len(latencies),
+                "errors": self.errors[name],
+                "status": {str(code): count for code, count in sorted(self.statuses[name].items())},
+                "throughput_rps": round(len(latencies) / elapsed, 2),
+                "latency_ms": {
+                    "mean": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+                    "p50": round(percentile(latencies, 50), 2),
+                    "p95": round(percentile(latencies, 95), 2),
+                    "p99": round(percentile(latencies, 99), 2),
+                    "max": round(latencies[-1], 2) if latencies else 0.0,
+                },
+            }
+        total = sum(endpoint['requests'] for endpoint in endpoints.values())
+        return {
+            "config": {
+                "concurrency": self.concurrency,
+                "duration_s": self.duration,
+                "mix": dict(zip(self.names, self.weights)),
+                "users": len(self.users),
+                "auctions": len(self.auctions),
+            },
+            "elapsed_s": round(elapsed, 3),
+            "total": {"requests": total, "throughput_rps": round(total / elapsed, 2)},
+            "endpoints": endpoints,
+        }
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint '{name}' (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run(args):
+    with open(args.fixture) as handle:
+        fixture = json.load(handle)
+    test = LoadTest(fixture, args.base_url, args.mix, args.concurrency, args.duration, args.seed)
+    report = asyncio.run(test.run())
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + "\n")
+    print(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    setup = commands.add_parser('provision', help="Create users, tokens and auctions and write the fixture file.")
+    setup.add_argument('--db', required=True, help="SQLite file the server under test uses.")
+    setup.add_argument('--users', type=int, default=200)
+    setup.add_argument('--auctions', type=int, default=50)
+    setup.add_argument('--password', default='loadtest-pass-123')
+    setup.add_argument('--starting-price', type=int, default=1000)
+    setup.add_argument('--hours', type=float, default=24, help="How long the auctions stay open.")
+    setup.add_argument('--fixture', default='loadtest_fixture.json')
+    setup.set_defaults(handler=provision)
+
+    load = commands.add_parser('run', help="Drive traffic and print the JSON report.")
+    load.add_argument('--base-url', default='http://127.0.0.1:8000')
+    load.add_argument('--fixture', default='loadtest_fixture.json')
+    load.add_argument('--mix', type=parse_mix, default=parse_mix('browse=60,detail=15,bid=20,login=5'))
+    load.add_argument('--concurrency', type=int, default=20)
+    load.add_argument('--duration', type=float, default=30, help="Seconds to run.")
+    load.add_argument('--seed', type=int, default=1)
+    load.add_argument('--output', help="Also write the report to this file.")
+    load.set_defaults(handler=run)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,13 +13,22 @@ USER_TOKENS = [
     
 ]
 
+# List endpoints are cursor-paginated; follow the `next` links to get everything
+def fetch_all(url):
+    results = []
+    while url:
+        page = requests.get(url, params={"page_size": 100}).json()
+        results.extend(page['results'])
+        url = page['next']
+    return results
+
 # Helper to get all vehicles
-vehicles = requests.get(f"{API_BASE}vehicles/").json()
+vehicles = fetch_all(f"{API_BASE}vehicles/")
 print("Fetched vehicles:", vehicles)
 vehicle_ids = [v['id'] for v in vehicles]
 
 # Helper to get all existing auctions (to avoid duplicates)
-existing_auctions = requests.get(f"{API_BASE}auctions/").json()
+existing_auctions = fetch_all(f"{API_BASE}auctions/")
 # Use vehicle_details['id'] for nested vehicle UUID
 auction_vehicle_ids = set(
     a['vehicle_details']['id'] if 'vehicle_details' in a and a['vehicle_details'] else a.get('vehicle')
@@ -1,12 +1,18 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import User, OutboundEmail
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ('id', 'username', 'email', 'mobile', 'is_staff', 'is_active')
     search_fields = ('username', 'email', 'mobile')
 
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'channel', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'channel')
+    readonly_fields = ('claimed_by',)
+
 
 
 admin.site.site_header = "B2A2 Car Auction Admin"
@@ -0,0 +1,39 @@
+"""
+Async variant of DRF's APIView.
+
+DRF dispatches synchronously, so under ASGI every DRF view runs in Django's
+shared sync thread. AsyncAPIView keeps DRF's request parsing, content
+negotiation, exception handling and schema generation but lets handlers be
+``async def``; under WSGI Django simply runs them through async_to_sync.
+
+Everything ``initial()`` does must stay free of blocking I/O, so these views
+take no authentication classes and only DB-free permissions/throttles.
+"""
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    view_is_async = True
+    authentication_classes = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if hasattr(response, '__await__'):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,129 @@
+"""
+Token authentication with a per-process token -> user cache.
+
+DRF's TokenAuthentication joins Token and User on every request. This keeps
+the result in a bounded LRU with a TTL (TOKEN_AUTH_CACHE settings) and can
+also consult a shared Django cache alias before going to the database.
+Entries are dropped on logout (token deleted), on any save of the user
+(password reset, deactivation) and when the TTL runs out; the TTL is what
+bounds staleness in *other* processes' local caches.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+DEFAULTS = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 60,
+    # Optional Django cache alias shared between processes, e.g. 'default'
+    'SHARED_CACHE': None,
+}
+
+
+def _config(name):
+    return getattr(settings, 'TOKEN_AUTH_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class TokenCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, user, token)
+        self._keys_by_user = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], entry[2]
+                self._discard(key)
+            self.misses += 1
+
+        shared = self.shared_tier()
+        if shared is not None:
+            cached = shared.get(self._shared_key(key))
+            if cached is not None:
+                self._store_local(key, *cached)
+                return cached
+        return None
+
+    def set(self, key, user, token):
+        self._store_local(key, user, token)
+        shared = self.shared_tier()
+        if shared is not None:
+            shared.set(self._shared_key(key), (user, token), timeout=_config('TTL'))
+
+    def invalidate(self, key):
+        with self._lock:
+            self._discard(key)
+        shared = self.shared_tier()
+        if shared is not None:
+            shared.delete(self._shared_key(key))
+
+    def invalidate_user(self, user_id, keys=()):
+        with self._lock:
+            local_keys = set(self._keys_by_user.get(user_id, ()))
+            for key in local_keys:
+                self._discard(key)
+        shared = self.shared_tier()
+        if shared is not None:
+            shared.delete_many([self._shared_key(key) for key in local_keys | set(keys)])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = self.misses = 0
+
+    def _store_local(self, key, user, token):
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + _config('TTL'), user, token)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > _config('MAX_ENTRIES'):
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[1].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_user[entry[1].pk]
+
+    @staticmethod
+    def shared_tier():
+        alias = _config('SHARED_CACHE')
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _shared_key(key):
+        return f"auth-token:{key}"
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+        else:
+            user, token = cached
+            if not user.is_active:
+                raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        # Each request gets its own copy, so nothing a view does to request.user leaks into the cache
+        return copy.copy(user), token
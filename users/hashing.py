@@ -0,0 +1,82 @@
+"""
+Password hashing off the request thread.
+
+PBKDF2 is deliberately slow. Login and registration hand it to a small,
+bounded thread pool (hashlib releases the GIL while hashing), so a login
+storm waits in that pool's queue instead of tying up the event loop or the
+threads that serve bids. Once PASSWORD_HASH_MAX_PENDING calls are queued or
+running, further ones fail fast with HashingBusy and the views answer 503.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class HashingPool:
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(self, fn, *args):
+        max_pending = self.max_pending or settings.PASSWORD_HASH_MAX_PENDING
+        with self._lock:
+            if self._pending >= max_pending:
+                raise HashingBusy()
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers or settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash',
+                )
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    @property
+    def pending(self):
+        return self._pending
+
+
+pool = HashingPool()
+
+
+def _verify(raw_password, encoded):
+    valid = check_password(raw_password, encoded)
+    must_update = False
+    if valid:
+        try:
+            must_update = identify_hasher(encoded).must_update(encoded)
+        except ValueError:
+            pass
+    return valid, must_update
+
+
+async def averify_password(raw_password, encoded):
+    """Return (valid, must_update); must_update means the hash should be upgraded."""
+    return await pool.run(_verify, raw_password, encoded)
+
+
+async def amake_password(raw_password):
+    return await pool.run(make_password, raw_password)
+
+
+async def aset_password(user, raw_password):
+    """user.set_password() with the hash made on the pool; the next save() reports the change to the validators."""
+    user.password = await amake_password(raw_password)
+    user._password = raw_password
@@ -0,0 +1,212 @@
+"""
+Outbound email queue.
+
+``enqueue_email``/``enqueue_mailgun`` write an OutboundEmail row and return
+immediately. An EmailWorker claims due rows in batches, sends them over one
+reused SMTP connection / HTTP session per batch, and reschedules failures
+with exponential backoff until EMAIL_QUEUE_MAX_ATTEMPTS.
+
+Workers run from ``manage.py send_queued_emails``. With
+EMAIL_QUEUE_IN_PROCESS (the default) the web process also drains the queue
+on a background thread after each enqueue, so nothing is lost if no
+separate worker is running. That thread sleeps until the next retry is due
+and exits once nothing is pending.
+"""
+import logging
+import os
+import threading
+import uuid
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+MAILGUN_DOMAIN = "sandboxf934aad3f3b64cd4a7a1311ffcdd545f.mailgun.org"
+MAILGUN_URL = f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages"
+MAILGUN_FROM = f"Mailgun Sandbox <postmaster@{MAILGUN_DOMAIN}>"
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    email = OutboundEmail.objects.create(
+        channel=OutboundEmail.SMTP,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        to=list(to),
+        subject=subject,
+        body=body,
+    )
+    _kick_in_process_worker()
+    return email
+
+
+def enqueue_mailgun(subject, body, to):
+    email = OutboundEmail.objects.create(
+        channel=OutboundEmail.MAILGUN,
+        from_email=MAILGUN_FROM,
+        to=list(to),
+        subject=subject,
+        body=body,
+    )
+    _kick_in_process_worker()
+    return email
+
+
+class EmailWorker:
+    def __init__(self, batch_size=None, lease_seconds=300, session=None):
+        self.batch_size = batch_size or getattr(settings, 'EMAIL_QUEUE_BATCH_SIZE', 50)
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = getattr(settings, 'EMAIL_QUEUE_MAX_ATTEMPTS', 5)
+        self.retry_base = getattr(settings, 'EMAIL_QUEUE_RETRY_SECONDS', 30)
+        if session is None:
+            # A session passed in comes with its own credentials
+            session = requests.Session()
+            session.auth = ("api", os.getenv('API_KEY', '0c887d2082c0cd158bf2a0892c23f52a-623424ea-31107b3f'))
+        self.session = session
+
+    def claim(self):
+        """Atomically take up to batch_size due rows. Expired leases (crashed workers) count as due."""
+        current_time = timezone.now()
+        token = uuid.uuid4()
+        is_due = Q(status__in=[OutboundEmail.PENDING, OutboundEmail.SENDING], next_attempt_at__lte=current_time)
+        due = OutboundEmail.objects.filter(is_due).order_by('next_attempt_at').values('id')[:self.batch_size]
+        # One UPDATE both selects and claims, and SQLite takes its write lock
+        # straight away. The outer filter repeats the due check: databases
+        # with concurrent writers re-evaluate it against rows another worker
+        # claimed after the subquery ran, so two workers never share a row.
+        claimed = OutboundEmail.objects.filter(is_due, id__in=due).update(
+            status=OutboundEmail.SENDING, next_attempt_at=current_time + self.lease, claimed_by=token,
+        )
+        if not claimed:
+            return []
+        return list(OutboundEmail.objects.filter(claimed_by=token))
+
+    def run_once(self):
+        """Claim and send one batch; returns the number of rows processed."""
+        batch = self.claim()
+        if not batch:
+            return 0
+        smtp = [email for email in batch if email.channel == OutboundEmail.SMTP]
+        mailgun = [email for email in batch if email.channel == OutboundEmail.MAILGUN]
+        if smtp:
+            self._send_smtp(smtp)
+        for email in mailgun:
+            self._deliver(email, self._send_mailgun)
+        return len(batch)
+
+    def drain(self):
+        total = 0
+        while True:
+            processed = self.run_once()
+            if not processed:
+                return total
+            total += processed
+
+    def next_due(self):
+        """When the earliest pending row (e.g. a retry in backoff) is due, or None if nothing is pending."""
+        return (
+            OutboundEmail.objects.filter(status=OutboundEmail.PENDING)
+            .order_by('next_attempt_at').values_list('next_attempt_at', flat=True).first()
+        )
+
+    def _send_smtp(self, emails):
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            for email in emails:
+                self._failed(email, exc)
+            return
+        try:
+            for email in emails:
+                self._deliver(email, lambda email: connection.send_messages([
+                    EmailMessage(email.subject, email.body, email.from_email, email.to, connection=connection)
+                ]))
+        finally:
+            connection.close()
+
+    def _send_mailgun(self, email):
+        response = self.session.post(MAILGUN_URL, data={
+            "from": email.from_email,
+            "to": email.to,
+            "subject": email.subject,
+            "text": email.body,
+        }, timeout=10)
+        response.raise_for_status()
+
+    def _deliver(self, email, send):
+        try:
+            send(email)
+        except Exception as exc:
+            self._failed(email, exc)
+        else:
+            self._record(email, status=OutboundEmail.SENT, attempts=email.attempts + 1, sent_at=timezone.now(), last_error='')
+
+    def _failed(self, email, exc):
+        attempts = email.attempts + 1
+        if attempts >= self.max_attempts:
+            status, next_attempt_at = OutboundEmail.FAILED, timezone.now()
+            logger.error("Giving up on email %s after %s attempts: %s", email.id, attempts, exc)
+        else:
+            status = OutboundEmail.PENDING
+            next_attempt_at = timezone.now() + timedelta(seconds=self.retry_base * 2 ** (attempts - 1))
+            logger.warning("Email %s failed (attempt %s), retrying: %s", email.id, attempts, exc)
+        self._record(email, status=status, attempts=attempts, next_attempt_at=next_attempt_at, last_error=str(exc)[:2000])
+
+    def _record(self, email, **fields):
+        # Only while our claim holds: once the lease expires another worker
+        # may have claimed the row, and its outcome is the one to keep.
+        if not OutboundEmail.objects.filter(id=email.id, claimed_by=email.claimed_by).update(**fields):
+            logger.warning("Lost the claim on email %s before recording its outcome", email.id)
+
+
+_in_process_lock = threading.Lock()
+_in_process_running = False
+_in_process_wakeup = threading.Event()
+
+
+def _kick_in_process_worker():
+    if not getattr(settings, 'EMAIL_QUEUE_IN_PROCESS', True):
+        return
+    transaction.on_commit(_start_in_process_worker)
+
+
+def _start_in_process_worker():
+    global _in_process_running
+    with _in_process_lock:
+        if _in_process_running:
+            # It may be asleep waiting for a retry; the new row is due now
+            _in_process_wakeup.set()
+            return
+        _in_process_running = True
+    threading.Thread(target=_run_in_process_worker, name='email-queue', daemon=True).start()
+
+
+def _run_in_process_worker():
+    global _in_process_running
+    try:
+        worker = EmailWorker()
+        while True:
+            _in_process_wakeup.clear()
+            worker.drain()
+            with _in_process_lock:
+                # Anything enqueued while we were sending found us still
+                # running and didn't start a thread, and failed sends wait
+                # for their backoff; stay up until nothing is pending.
+                next_due = worker.next_due()
+                if next_due is None:
+                    _in_process_running = False
+                    return
+            _in_process_wakeup.wait(max(0.0, (next_due - timezone.now()).total_seconds()))
+    except Exception:
+        logger.exception("In-process email worker stopped")
+        with _in_process_lock:
+            _in_process_running = False
+    finally:
+        db_connection.close()
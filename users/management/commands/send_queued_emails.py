@@ -0,0 +1,45 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from users.mail import EmailWorker
+
+
+class Command(BaseCommand):
+    help = "Send queued outbound emails, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Sending threads, each with its own SMTP connection and HTTP session.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Rows each worker claims at a time.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain what is due now and exit.")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        sent = []
+
+        def work():
+            worker = EmailWorker(batch_size=options['batch_size'])
+            try:
+                while not stop.is_set():
+                    processed = worker.drain()
+                    sent.append(processed)
+                    if options['once']:
+                        return
+                    stop.wait(options['interval'])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, daemon=True) for _ in range(options['workers'])]
+        for thread in threads:
+            thread.start()
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS(f"Processed {sum(sent)} email(s)."))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:25
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.comparison.Collate('email', 'NOCASE'), name='user_email_nocase_idx'),
+        ),
+    ]
@@ -1,12 +1,20 @@
 import uuid
 from django.db import models
+from django.db.models.functions import Collate
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 class User(AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     mobile = models.CharField(max_length=15, unique=True)
     reset_token = models.UUIDField(blank=True, null=True, unique=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin prefix search on email (see auction.admin.LargeTableAdmin)
+            models.Index(Collate('email', 'NOCASE'), name='user_email_nocase_idx'),
+        ]
+
     def __str__(self):
         return self.username
 
@@ -19,3 +27,42 @@ class PasswordResetToken(models.Model):
     def is_valid(self):
         from django.utils.timezone import now
         return (now() - self.created_at).total_seconds() < 3600  # 1 hour expiry
+
+
+class OutboundEmail(models.Model):
+    """
+    Durable outbound mail queue. Request handlers enqueue rows and return;
+    users.mail.EmailWorker claims, sends and retries them.
+    """
+    SMTP = 'smtp'
+    MAILGUN = 'mailgun'
+    CHANNEL_CHOICES = [(SMTP, 'SMTP'), (MAILGUN, 'Mailgun')]
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SENDING, 'Sending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default=SMTP)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # When the row is next due; while SENDING it is the claim's lease expiry
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.UUIDField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    # Covers password resets and deactivation
+    keys = ()
+    if token_cache.shared_tier() is not None:
+        keys = list(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+    token_cache.invalidate_user(instance.pk, keys)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
@@ -1,5 +1,21 @@
-from django.test import TestCase
+import threading
+import time
+import uuid
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocMemEmailBackend
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .authentication import token_cache
+from .hashing import pool
+from . import mail as mail_queue
+from .mail import EmailWorker, enqueue_email, enqueue_mailgun
+from .models import OutboundEmail
 
 # Create your tests here.
 
@@ -16,3 +32,180 @@ class UserModelTestCase(TestCase):
     def test_user_uuid(self):
         self.assertIsNotNone(self.user.id)
         self.assertEqual(len(str(self.user.id)), 36)
+
+
+class FailingSession:
+    def post(self, *args, **kwargs):
+        raise ConnectionError("mailgun unreachable")
+
+
+@override_settings(EMAIL_QUEUE_IN_PROCESS=False)
+class OutboundEmailQueueTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='reset', email='reset@example.com', password='testpass123', mobile='5551234567'
+        )
+
+    def test_password_reset_only_enqueues(self):
+        response = APIClient().post(reverse('request_password_reset'), {'email': 'reset@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            sorted(OutboundEmail.objects.values_list('channel', flat=True)),
+            [OutboundEmail.MAILGUN, OutboundEmail.SMTP],
+        )
+
+    def test_worker_sends_smtp_batch(self):
+        for n in range(3):
+            enqueue_email(f"Subject {n}", "Body", ['reset@example.com'])
+        self.assertEqual(EmailWorker().drain(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.SENT).count(), 3)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        email = enqueue_mailgun("Subject", "Body", ['reset <reset@example.com>'])
+        EmailWorker(session=FailingSession()).drain()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn('mailgun unreachable', email.last_error)
+
+    def test_outcome_is_not_recorded_over_another_workers_claim(self):
+        email = enqueue_mailgun("Subject", "Body", ['reset <reset@example.com>'])
+        other = uuid.uuid4()
+
+        class SlowSession(FailingSession):
+            def post(self, *args, **kwargs):
+                # The lease ran out mid-send and another worker took the row
+                OutboundEmail.objects.filter(id=email.id).update(claimed_by=other)
+                return super().post(*args, **kwargs)
+
+        session = SlowSession()
+        EmailWorker(session=session).drain()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.claimed_by), (OutboundEmail.SENDING, 0, other))
+        self.assertFalse(hasattr(session, 'auth'))
+
+
+class FlakyEmailBackend(LocMemEmailBackend):
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures:
+            FlakyEmailBackend.failures -= 1
+            raise ConnectionError("smtp unreachable")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_QUEUE_IN_PROCESS=True, EMAIL_QUEUE_RETRY_SECONDS=0.2, EMAIL_BACKEND='users.tests.FlakyEmailBackend',
+)
+class InProcessEmailWorkerTestCase(TransactionTestCase):
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.02)
+
+    def test_worker_stays_up_for_a_backoff_retry(self):
+        FlakyEmailBackend.failures = 1
+        email = enqueue_email("Subject", "Body", ['retry@example.com'])
+        self.wait_for(lambda: OutboundEmail.objects.get(id=email.id).status == OutboundEmail.SENT)
+        self.assertEqual(OutboundEmail.objects.get(id=email.id).attempts, 2)
+        self.assertEqual(len(mail.outbox), 1)
+        self.wait_for(lambda: not mail_queue._in_process_running)
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='cached', email='cached@example.com', password='testpass123', mobile='5559876543'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.url = reverse('vehicle-bulk')
+
+    def authenticate(self):
+        # The bulk import endpoint answers 400 to an empty authenticated POST
+        return self.client.post(self.url, {}).status_code
+
+    def test_repeat_requests_skip_token_lookup(self):
+        self.assertEqual(self.authenticate(), 400)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), 400)
+        self.assertEqual(token_cache.hits, 1)
+
+    def test_logout_invalidates_token(self):
+        self.authenticate()
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+        self.assertEqual(self.authenticate(), 401)
+
+    def test_deactivation_invalidates_cached_user(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.authenticate(), 401)
+
+    def test_password_reset_drops_cached_user(self):
+        self.authenticate()
+        self.user.reset_token = uuid.uuid4()
+        self.user.save()
+        self.authenticate()
+        response = APIClient().post(
+            reverse('reset_password', args=[self.user.reset_token]),
+            {'password': 'newpass456', 'confirmPassword': 'newpass456'},
+            HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+
+class AsyncAuthViewsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def register(self, email='async@example.com', mobile='5550001111'):
+        return self.client.post(reverse('register_user'), {
+            'name': 'async', 'mobile': mobile, 'email': email,
+            'password': 'testpass123', 'confirmPassword': 'testpass123',
+        }, format='json')
+
+    def test_register_then_login(self):
+        self.assertEqual(self.register().status_code, 201)
+        self.assertTrue(get_user_model().objects.get(email='async@example.com').check_password('testpass123'))
+
+        response = self.client.post(reverse('login'), {'email': 'async@example.com', 'password': 'testpass123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['token'], Token.objects.get(user__email='async@example.com').key)
+
+        response = self.client.post(reverse('custom_token_auth'), {'email': 'async@example.com', 'password': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_register_reports_the_new_password(self):
+        with mock.patch('django.contrib.auth.password_validation.password_changed') as password_changed:
+            self.assertEqual(self.register().status_code, 201)
+        user = get_user_model().objects.get(email='async@example.com')
+        password_changed.assert_called_once_with('testpass123', user)
+
+    def test_duplicate_registration_rejected(self):
+        self.register()
+        response = self.register(mobile='5550002222')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Email already registered')
+
+    @override_settings(PASSWORD_HASH_MAX_PENDING=1)
+    def test_login_storm_is_shed_when_pool_is_full(self):
+        self.register()
+        release = threading.Event()
+        pool.submit(release.wait)  # occupies the only pending slot
+        try:
+            response = self.client.post(reverse('login'), {'email': 'async@example.com', 'password': 'testpass123'})
+        finally:
+            release.set()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
@@ -1,20 +1,20 @@
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from .models import User
 from django.contrib.auth.hashers import make_password, check_password
 import uuid
-from django.core.mail import send_mail
 from django.conf import settings
 from django.shortcuts import render
-import os
-import requests
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import serializers
 from rest_framework.authtoken.views import ObtainAuthToken
+from .async_views import AsyncAPIView
+from .hashing import HashingBusy, amake_password, aset_password, averify_password
+from .mail import enqueue_email, enqueue_mailgun
 from .serializers import RegisterSerializer, LoginSerializer, PasswordResetRequestSerializer, PasswordResetConfirmSerializer
 import logging
 
@@ -22,65 +22,104 @@ logging.basicConfig(level=logging.INFO)
 
 
 
-@swagger_auto_schema(method='post', request_body=LoginSerializer, responses={200: 'Login successful', 400: 'Invalid email or password'})
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def login_user(request):
+def _hashing_busy():
+    return Response(
+        {"message": "Too many sign-in requests, please retry shortly."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _authenticate(email, password):
     """
-    User login endpoint. Accepts email and password, returns token and user info on success.
+    Return the user for this email/password or None. The hash check runs on
+    the hashing pool; hashes made with an outdated hasher are upgraded.
     """
-    serializer = LoginSerializer(data=request.data)
-    if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    email = serializer.validated_data['email']
-    password = serializer.validated_data['password']
+    user = await User.objects.filter(email=email).afirst()
+    if user is None:
+        return None
+    valid, must_update = await averify_password(password, user.password)
+    if not valid:
+        return None
+    if must_update:
+        user.password = await amake_password(password)
+        await User.objects.filter(pk=user.pk).aupdate(password=user.password)
+    return user
+
+
+class LoginView(AsyncAPIView):
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(request_body=LoginSerializer, responses={200: 'Login successful', 400: 'Invalid email or password', 503: 'Busy, retry shortly'})
+    async def post(self, request):
+        """
+        User login endpoint. Accepts email and password, returns token and user info on success.
+        """
+        serializer = LoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        email = serializer.validated_data['email']
+        password = serializer.validated_data['password']
 
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
-        return Response({"message": "Invalid email or password"}, status=status.HTTP_400_BAD_REQUEST)
-
-    if not user.check_password(password):
-        return Response({"message": "Invalid email or password"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            user = await _authenticate(email, password)
+        except HashingBusy:
+            return _hashing_busy()
+        if user is None:
+            return Response({"message": "Invalid email or password"}, status=status.HTTP_400_BAD_REQUEST)
+
+        token, _ = await Token.objects.aget_or_create(user=user)
+        return Response({
+            "message": "Login successful",
+            "user": {"id": str(user.id), "username": user.username, "email": user.email},
+            "token": token.key
+        }, status=status.HTTP_200_OK)
+
+
+class RegisterView(AsyncAPIView):
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(request_body=RegisterSerializer, responses={201: 'Registration successful', 400: 'Validation error', 503: 'Busy, retry shortly'})
+    async def post(self, request):
+        """
+        User registration endpoint. Accepts name, mobile, email, password, confirmPassword. Returns success message on registration.
+        """
+        serializer = RegisterSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        name = serializer.validated_data['name']
+        mobile = serializer.validated_data['mobile']
+        email = serializer.validated_data['email']
+        password = serializer.validated_data['password']
+        confirm_password = serializer.validated_data['confirmPassword']
+
+        if password != confirm_password:
+            return Response({"message": "Passwords do not match"}, status=status.HTTP_400_BAD_REQUEST)
 
-    token, _ = Token.objects.get_or_create(user=user)
-    return Response({
-        "message": "Login successful",
-        "user": {"id": str(user.id), "username": user.username, "email": user.email},
-        "token": token.key
-    }, status=status.HTTP_200_OK)
+        if await User.objects.filter(email=email).aexists():
+            return Response({"message": "Email already registered"}, status=status.HTTP_400_BAD_REQUEST)
 
+        if await User.objects.filter(mobile=mobile).aexists():
+            return Response({"message": "Mobile already registered"}, status=status.HTTP_400_BAD_REQUEST)
 
+        user = User(username=name, mobile=mobile, email=email)
+        try:
+            await aset_password(user, password)
+        except HashingBusy:
+            return _hashing_busy()
+        await user.asave()
+        return Response({"message": "Registration successful!", "user": {"id": str(user.id), "username": user.username, "email": user.email}}, status=status.HTTP_201_CREATED)
 
-@swagger_auto_schema(method='post', request_body=RegisterSerializer, responses={201: 'Registration successful', 400: 'Validation error'})
+@swagger_auto_schema(method='post', responses={200: 'Logged out'})
 @api_view(['POST'])
-@permission_classes([AllowAny])
-def register_user(request):
+@permission_classes([IsAuthenticated])
+def logout_user(request):
     """
-    User registration endpoint. Accepts name, mobile, email, password, confirmPassword. Returns success message on registration.
+    Delete the caller's auth token. A new one is issued on the next login.
     """
-    serializer = RegisterSerializer(data=request.data)
-    if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    name = serializer.validated_data['name']
-    mobile = serializer.validated_data['mobile']
-    email = serializer.validated_data['email']
-    password = serializer.validated_data['password']
-    confirm_password = serializer.validated_data['confirmPassword']
-
-    if password != confirm_password:
-        return Response({"message": "Passwords do not match"}, status=status.HTTP_400_BAD_REQUEST)
-
-    if User.objects.filter(email=email).exists():
-        return Response({"message": "Email already registered"}, status=status.HTTP_400_BAD_REQUEST)
-
-    if User.objects.filter(mobile=mobile).exists():
-        return Response({"message": "Mobile already registered"}, status=status.HTTP_400_BAD_REQUEST)
-
-    user = User(username=name, mobile=mobile, email=email)
-    user.set_password(password)
-    user.save()
-    return Response({"message": "Registration successful!", "user": {"id": str(user.id), "username": user.username, "email": user.email}}, status=status.HTTP_201_CREATED)
+    if request.auth is not None:
+        request.auth.delete()
+    return Response({"message": "Logged out"}, status=status.HTTP_200_OK)
 
 # Password Reset Request - PUBLIC
 @swagger_auto_schema(method='post', request_body=PasswordResetRequestSerializer)
@@ -105,26 +144,11 @@ def request_password_reset(request):
     reset_link = request.build_absolute_uri(f"/api/users/password-reset/{reset_token}/")
     print("reset_link:", reset_link)
 
-    # Send the password reset email
+    # Queue the password reset email (SMTP, plus Mailgun); a worker sends them
     subject = "Password Reset Request"
     message = f"Click the link below to reset your password:\n{reset_link}"
-    from_email = settings.EMAIL_HOST_USER
-    send_mail(
-        subject,
-        message,
-        from_email,
-        [email],
-        fail_silently=False,
-    )
-
-    # (Optional) Also send via Mailgun if needed
-    try:
-        send_reset_pswd_link_message(reset_link, user)
-    except Exception as e:
-        # Use logging instead of print for error reporting
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f'Unable to send password reset mail from mailgun to the user: {e}')
+    enqueue_email(subject, message, [email])
+    send_reset_pswd_link_message(reset_link, user)
 
     return Response({"message": "Password reset link sent to email."}, status=status.HTTP_200_OK)
 
@@ -170,16 +194,13 @@ def reset_password(request, token):
 
 
 def send_reset_pswd_link_message(reset_link, user):
-    return requests.post(
-        "https://api.mailgun.net/v3/sandboxf934aad3f3b64cd4a7a1311ffcdd545f.mailgun.org/messages",
-        auth=("api", os.getenv('API_KEY', '0c887d2082c0cd158bf2a0892c23f52a-623424ea-31107b3f')),
-        data={
-            "from": "Mailgun Sandbox <postmaster@sandboxf934aad3f3b64cd4a7a1311ffcdd545f.mailgun.org>",
-            "to": f"{user.username} <{user.email}>",
-            "subject": f"Hello {user.username} Password Reset Request ",
-            "text": f"""Hello {user.username}
+    return enqueue_mailgun(
+        subject=f"Hello {user.username} Password Reset Request ",
+        body=f"""Hello {user.username}
                         Click the link below to reset your password:\n {reset_link}
-            """})
+            """,
+        to=[f"{user.username} <{user.email}>"],
+    )
 
 
 
@@ -187,18 +208,17 @@ def send_reset_pswd_link_message(reset_link, user):
 
 
 
-class CustomObtainAuthToken(ObtainAuthToken):
-    def post(self, request, *args, **kwargs):
+class CustomObtainAuthToken(AsyncAPIView, ObtainAuthToken):
+    async def post(self, request, *args, **kwargs):
         email = request.data.get('email')
         password = request.data.get('password')
-        
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            return Response({'error': 'Invalid email or password'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not user.check_password(password):
+        try:
+            user = await _authenticate(email, password or '')
+        except HashingBusy:
+            return _hashing_busy()
+        if user is None:
             return Response({'error': 'Invalid email or password'}, status=status.HTTP_400_BAD_REQUEST)
 
-        token, _ = Token.objects.get_or_create(user=user)
+        token, _ = await Token.objects.aget_or_create(user=user)
         return Response({'token': token.key})